@@ -2,16 +2,23 @@
 # AUTH.PY - Utilitários de autenticação e segurança
 # ============================================================================
 # Este arquivo contém funções para:
-# - Hash de senhas
-# - Verificação de senhas
-# - Criação e validação de tokens JWT
+# - Hash de senhas (bcrypt ou argon2id, com custo calibrado na inicialização)
+# - Verificação de senhas (também em versões assíncronas, fora do event loop)
+# - Identificação de hashes que precisam ser refeitos (custo/algoritmo antigo)
+# - Criação e validação de tokens JWT (com cache de tokens já verificados)
 # ============================================================================
 
 from passlib.context import CryptContext
 from jose import JWTError, jwt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
+import asyncio
+import logging
+import math
 import os
+import time
+from cache import TTLCache
 
 # ============================================================================
 # CONFIGURAÇÕES
@@ -23,9 +30,53 @@ SECRET_KEY = os.getenv("SECRET_KEY", "sua-chave-secreta-muito-segura-mude-em-pro
 ALGORITHM = "HS256"  # Algoritmo de criptografia
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # Token expira em 7 dias
 
-# Contexto para hash de senhas usando bcrypt
+# Tokens já verificados (token -> payload), válidos até o "exp" do token.
+# Evita repetir a verificação HMAC e o parse JSON para o mesmo token.
+verified_tokens = TTLCache(
+    "tokens",
+    maxsize=int(os.getenv("TOKEN_CACHE_MAXSIZE", "8192")),
+    ttl=60 * ACCESS_TOKEN_EXPIRE_MINUTES
+)
+
+logger = logging.getLogger(__name__)
+
+# Perfil de hash de senhas (ver configure_password_hashing)
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")  # "bcrypt" ou "argon2"
+# Tempo alvo de uma verificação; a calibração aumenta o custo até atingi-lo (0 = desligada)
+PASSWORD_HASH_TARGET_MS = float(os.getenv("PASSWORD_HASH_TARGET_MS", "250"))
+# Custos mínimos: a calibração nunca escolhe valores menores
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_MAX_ROUNDS = 16
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "2"))
+ARGON2_MAX_TIME_COST = 10
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "19456"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "1"))
+
+# Algoritmos aceitos na verificação; apenas o configurado é usado em novos hashes
+SUPPORTED_SCHEMES = ["bcrypt", "argon2"]
+
+# Contexto para hash de senhas (bcrypt no custo padrão até a configuração)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Pool dedicado para o bcrypt (que libera o GIL), para não bloquear o event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Máximo de operações de hash pendentes (em execução + na fila) antes de recusar
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 8)))
+
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_pending_hashes = 0
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Lançada quando a fila de hash de senhas está cheia.
+    O servidor converte em resposta 503.
+    """
+    pass
+
 
 # ============================================================================
 # FUNÇÕES DE HASH DE SENHA
@@ -66,6 +117,168 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Indica se o hash usa um algoritmo ou custo abaixo do perfil atual
+    (operação barata: apenas interpreta o hash).
+    """
+    return pwd_context.needs_update(hashed_password)
+
+
+# ============================================================================
+# PERFIL DE HASH E CALIBRAÇÃO
+# ============================================================================
+
+def _argon2_available() -> bool:
+    """
+    Verifica se o backend do argon2 (argon2-cffi) está instalado.
+    """
+    try:
+        import argon2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_context(scheme: str, rounds: int) -> CryptContext:
+    """
+    Cria o contexto com o algoritmo e o custo (rounds do bcrypt ou
+    time_cost do argon2) informados. Hashes com custo menor ou de outro
+    algoritmo são marcados para atualização (needs_update).
+    """
+    schemes = [scheme] + [s for s in SUPPORTED_SCHEMES if s != scheme]
+    if not _argon2_available():
+        schemes.remove("argon2")
+
+    settings = {
+        f"{scheme}__default_rounds": rounds,
+        f"{scheme}__min_rounds": rounds,
+    }
+    if scheme == "argon2":
+        settings.update(
+            argon2__memory_cost=ARGON2_MEMORY_COST,
+            argon2__parallelism=ARGON2_PARALLELISM,
+            argon2__type="ID",
+        )
+
+    return CryptContext(schemes=schemes, default=scheme, deprecated="auto", **settings)
+
+
+def _measure_ms(context: CryptContext, samples: int = 3) -> float:
+    """
+    Menor tempo (ms) de um hash com o contexto, entre algumas amostras.
+    """
+    best = float("inf")
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash("calibracao-de-custo")
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def _calibrate_rounds(scheme: str, target_ms: float) -> int:
+    """
+    Escolhe o custo que leva a verificação mais perto do tempo alvo.
+
+    O bcrypt dobra o tempo a cada round (mede com 8 rounds e extrapola);
+    o argon2 cresce linearmente com o time_cost (mede com time_cost=1).
+    """
+    if scheme == "bcrypt":
+        base_ms = _measure_ms(_build_context("bcrypt", 8))
+        rounds = 8 + round(math.log2(target_ms / base_ms))
+        return max(BCRYPT_ROUNDS, min(rounds, BCRYPT_MAX_ROUNDS))
+
+    base_ms = _measure_ms(_build_context("argon2", 1))
+    return max(ARGON2_TIME_COST, min(round(target_ms / base_ms), ARGON2_MAX_TIME_COST))
+
+
+def configure_password_hashing(
+    scheme: str = PASSWORD_HASH_SCHEME,
+    target_ms: float = PASSWORD_HASH_TARGET_MS
+) -> dict:
+    """
+    Define o perfil de hash de senhas do processo, calibrando o custo para
+    que uma verificação leve cerca de target_ms nesta máquina.
+    Executada na inicialização (fora do event loop, ver configure_password_hashing_async).
+
+    Args:
+        scheme: "bcrypt" ou "argon2" (argon2id; requer argon2-cffi)
+        target_ms: Tempo alvo em ms (0 = usa os custos mínimos configurados)
+
+    Returns:
+        Perfil aplicado, ex: {"scheme": "bcrypt", "rounds": 12, "hash_ms": 241.3}
+    """
+    global pwd_context
+
+    if scheme not in SUPPORTED_SCHEMES:
+        raise ValueError(f"PASSWORD_HASH_SCHEME inválido: {scheme}")
+    if scheme == "argon2" and not _argon2_available():
+        logger.warning("argon2-cffi não instalado; usando bcrypt para novos hashes")
+        scheme = "bcrypt"
+
+    rounds = BCRYPT_ROUNDS if scheme == "bcrypt" else ARGON2_TIME_COST
+    if target_ms > 0:
+        rounds = _calibrate_rounds(scheme, target_ms)
+
+    context = _build_context(scheme, rounds)
+    profile = {"scheme": scheme, "rounds": rounds, "hash_ms": round(_measure_ms(context, samples=1), 1)}
+    pwd_context = context
+
+    logger.info(f"Password hashing profile: {profile}")
+    return profile
+
+
+async def configure_password_hashing_async(**kwargs) -> dict:
+    """
+    Versão assíncrona de configure_password_hashing, executada no pool de hash.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, lambda: configure_password_hashing(**kwargs)
+    )
+
+
+async def _run_in_hash_pool(func, *args):
+    """
+    Executa uma função de hash no pool dedicado, respeitando o limite de
+    operações pendentes.
+    
+    Raises:
+        PasswordHasherBusy: se o limite de operações pendentes foi atingido
+    """
+    global _pending_hashes
+    
+    if _pending_hashes >= PASSWORD_HASH_MAX_PENDING:
+        raise PasswordHasherBusy()
+    
+    _pending_hashes += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _pending_hashes -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Versão assíncrona de hash_password, executada fora do event loop.
+    
+    Raises:
+        PasswordHasherBusy: se o pool de hash estiver saturado
+    """
+    return await _run_in_hash_pool(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Versão assíncrona de verify_password, executada fora do event loop.
+    
+    Raises:
+        PasswordHasherBusy: se o pool de hash estiver saturado
+    """
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
 # ============================================================================
 # FUNÇÕES DE TOKEN JWT
 # ============================================================================
@@ -74,6 +287,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     """
     Cria um token JWT com os dados fornecidos.
     
+    Além de "sub" (email), os tokens da API incluem "id" e "role" do usuário,
+    permitindo autorizar rotas sem consultar o banco.
+    
     Args:
         data: Dicionário com os dados a serem incluídos no token
         expires_delta: Tempo de expiração customizado (opcional)
@@ -82,7 +298,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         Token JWT assinado
         
     Exemplo:
-        >>> create_access_token({"sub": "user@example.com"})
+        >>> create_access_token({"sub": "user@example.com", "id": "123", "role": "user"})
         'eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...'
     """
     to_encode = data.copy()
@@ -104,6 +320,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 def verify_token(token: str) -> Optional[dict]:
     """
     Verifica e decodifica um token JWT.
+    Tokens já verificados são servidos do cache até expirarem.
     
     Args:
         token: Token JWT a ser verificado
@@ -115,13 +332,23 @@ def verify_token(token: str) -> Optional[dict]:
         >>> verify_token("eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...")
         {'sub': 'user@example.com', 'exp': 1234567890}
     """
+    payload = verified_tokens.get(token)
+    if payload is not None:
+        return payload
+    
     try:
         # Tenta decodificar o token
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         # Token inválido ou expirado
         return None
+    
+    # Guarda no cache apenas até o momento de expiração do token
+    remaining = payload.get("exp", 0) - time.time()
+    if remaining > 0:
+        verified_tokens.set(token, payload, ttl=remaining)
+    
+    return payload
 
 
 def get_user_from_token(token: str) -> Optional[str]:
@@ -0,0 +1,181 @@
+# ============================================================================
+# AVAILABILITY.PY - Disponibilidade de horários dos serviços
+# ============================================================================
+# Este arquivo contém funções para:
+# - Verificar se uma data/horário faz parte da agenda de um serviço
+# - Calcular os horários livres de um serviço em um intervalo de datas
+#
+# Agendamentos ativos (não cancelados) são marcados com o campo
+# "slot_taken". Um índice único parcial em
+# (service_id, date, time, slot_taken) garante que cada horário só possa
+# ser reservado uma vez, sem precisar ler antes de escrever.
+# ============================================================================
+
+import logging
+import re
+from datetime import date, timedelta
+from fastapi import HTTPException
+from typing import Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Campo presente (True) apenas em agendamentos que ocupam o horário
+SLOT_TAKEN_FIELD = "slot_taken"
+
+# Status que liberam o horário
+RELEASED_STATUSES = {"cancelled"}
+
+# Nomes dos dias usados em availability_days (índice = date.weekday())
+WEEKDAYS = [
+    "Segunda-feira",
+    "Terça-feira",
+    "Quarta-feira",
+    "Quinta-feira",
+    "Sexta-feira",
+    "Sábado",
+    "Domingo",
+]
+
+DEFAULT_RANGE_DAYS = 14  # Intervalo padrão da consulta de disponibilidade
+MAX_RANGE_DAYS = 62  # Intervalo máximo permitido
+
+# Única grafia aceita: as datas são comparadas como texto (intervalos,
+# índice único dos horários, contadores por dia), então "20301010" ou
+# "2030-W41-4" não podem ser tratadas como a mesma data de "2030-10-10"
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+# ============================================================================
+# FUNÇÕES
+# ============================================================================
+
+def parse_date(value: str) -> date:
+    """
+    Converte uma data no formato YYYY-MM-DD.
+
+    Raises:
+        HTTPException 400: se a data for inválida ou estiver em outro formato
+    """
+    try:
+        if not DATE_PATTERN.fullmatch(value):
+            raise ValueError(value)
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Data inválida: {value} (use YYYY-MM-DD)")
+
+
+def is_slot_offered(service: dict, booking_date: str, booking_time: str) -> bool:
+    """
+    Verifica se a data/horário faz parte da agenda do serviço
+    (dia da semana em availability_days e horário em time_slots).
+    """
+    weekday = WEEKDAYS[parse_date(booking_date).weekday()]
+    return (
+        weekday in service.get("availability_days", [])
+        and booking_time in service.get("time_slots", [])
+    )
+
+
+def resolve_range(date_from: Optional[str], date_to: Optional[str]) -> Tuple[date, date]:
+    """
+    Valida e completa o intervalo de datas da consulta de disponibilidade.
+
+    Raises:
+        HTTPException 400: se o intervalo for inválido ou grande demais
+    """
+    start = parse_date(date_from) if date_from else date.today()
+    end = parse_date(date_to) if date_to else start + timedelta(days=DEFAULT_RANGE_DAYS - 1)
+
+    if end < start:
+        raise HTTPException(status_code=400, detail="A data final deve ser posterior à inicial")
+    if (end - start).days + 1 > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Intervalo máximo de {MAX_RANGE_DAYS} dias")
+
+    return start, end
+
+
+def compute_free_slots(
+    service: dict,
+    start: date,
+    end: date,
+    taken: Iterable[Tuple[str, str]]
+) -> List[dict]:
+    """
+    Calcula os horários livres de cada dia do intervalo.
+
+    Args:
+        service: Documento do serviço
+        start: Primeira data do intervalo
+        end: Última data do intervalo (inclusive)
+        taken: Pares (date, time) já reservados
+
+    Returns:
+        Lista de {"date", "weekday", "slots"} apenas para os dias em que
+        o serviço atende
+    """
+    taken_set: Set[Tuple[str, str]] = set(taken)
+    days = set(service.get("availability_days", []))
+    time_slots = service.get("time_slots", [])
+
+    result = []
+    current = start
+    while current <= end:
+        weekday = WEEKDAYS[current.weekday()]
+        if weekday in days:
+            day = current.isoformat()
+            result.append({
+                "date": day,
+                "weekday": weekday,
+                "slots": [t for t in time_slots if (day, t) not in taken_set],
+            })
+        current += timedelta(days=1)
+
+    return result
+
+
+async def backfill_slot_flags(db) -> None:
+    """
+    Marca agendamentos ativos criados antes do campo "slot_taken".
+    Idempotente; executado na inicialização, antes de criar os índices.
+
+    Dados antigos podem ter mais de um agendamento ativo no mesmo horário
+    (não havia bloqueio): apenas o mais antigo de cada horário é marcado,
+    e só se o horário ainda não estiver ocupado, para que o índice único
+    possa ser criado. Os demais são apenas registrados no log.
+    """
+    unflagged = await db.bookings.aggregate([
+        {"$match": {"status": {"$nin": list(RELEASED_STATUSES)}, SLOT_TAKEN_FIELD: {"$exists": False}}},
+        {"$sort": {"created_at": 1, "_id": 1}},
+        {"$group": {
+            "_id": {"service_id": "$service_id", "date": "$date", "time": "$time"},
+            "first_id": {"$first": "$id"},
+            "count": {"$sum": 1}
+        }}
+    ]).to_list(None)
+    if not unflagged:
+        return
+
+    flagged = await db.bookings.find(
+        {SLOT_TAKEN_FIELD: True, "service_id": {"$in": list({g["_id"]["service_id"] for g in unflagged})}},
+        {"_id": 0, "service_id": 1, "date": 1, "time": 1}
+    ).to_list(None)
+    taken = {(b["service_id"], b["date"], b["time"]) for b in flagged}
+
+    to_flag = []
+    duplicates = 0
+    for group in unflagged:
+        slot = group["_id"]
+        if (slot["service_id"], slot["date"], slot["time"]) in taken:
+            duplicates += group["count"]
+        else:
+            to_flag.append(group["first_id"])
+            duplicates += group["count"] - 1
+
+    if to_flag:
+        await db.bookings.update_many({"id": {"$in": to_flag}}, {"$set": {SLOT_TAKEN_FIELD: True}})
+    if duplicates:
+        logger.warning(f"{duplicates} agendamento(s) ativo(s) em horários já ocupados não foram marcados")
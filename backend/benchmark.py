@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+# ============================================================================
+# BENCHMARK.PY - Teste de carga HTTP da API com resultados em JSON
+# ============================================================================
+# Este script:
+# - Popula um banco de benchmark (separado do banco da aplicação) com uma
+#   escala de dados configurável (serviços, usuários, agendamentos)
+# - Sobe o servidor (uvicorn) apontando para esse banco, com o mesmo perfil
+#   de hash de senhas usado no seed (calibrado uma vez nesta máquina), para
+#   que os logins não disparem a troca do hash (rehash) durante a carga
+# - Reproduz tráfego misto por um tempo fixo, com N clientes simultâneos:
+#     catalog   - leitura anônima do catálogo, busca e horários livres
+#     login     - login de usuários
+#     booking   - criação de agendamentos
+#     dashboard - painel do organizador (agendamentos e totais)
+# - Mede o health check (/api/) sozinho e durante uma rajada de logins
+#   (o bcrypt roda em um pool de threads e não deve travar o event loop)
+# - Reporta, por rota, vazão e latências p50/p95/p99, e salva em JSON
+#   para comparar dois commits
+#
+# Usa o MONGO_URL do .env (requer um mongod local). Uso:
+#   python benchmark.py --scale small --duration 30 --output bench/antes.json
+#   python benchmark.py --scale small,medium,large --output bench/escalas.json
+#   python benchmark.py --compare bench/antes.json bench/depois.json
+# ============================================================================
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+import httpx
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from auth import configure_password_hashing, hash_password
+from availability import SLOT_TAKEN_FIELD, WEEKDAYS
+from booking_stats import rebuild_ratings, rebuild_stats
+from invalidation import touch
+from models import Booking, Service, User
+from search import USER_NAME_FIELD, fold
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Escalas de dados: quantidades criadas antes do teste
+SCALES = {
+    "small": {"organizers": 5, "services": 20, "users": 50, "bookings_per_user": 5},
+    "medium": {"organizers": 20, "services": 200, "users": 1000, "bookings_per_user": 10},
+    "large": {"organizers": 50, "services": 1000, "users": 10000, "bookings_per_user": 20},
+}
+
+# Peso de cada cenário no tráfego misto
+DEFAULT_MIX = {"catalog": 60, "login": 10, "booking": 15, "dashboard": 15}
+
+PASSWORD = "benchmark-123"
+SERVICE_TYPES = ["Saúde", "Educação", "Beleza", "Assistência Social", "Jurídico"]
+TIME_SLOTS = ["08:00", "09:00", "10:00", "11:00", "13:00", "14:00", "15:00", "16:00"]
+SEARCH_TERMS = ["saude", "aula", "consulta", "apoio", "corte"]
+
+STARTUP_TIMEOUT_SECONDS = 120
+# Logins feitos antes do teste para obter tokens (não medidos)
+TOKEN_POOL_SIZE = 20
+
+# Health check medido durante a rajada de logins
+HEALTH_ROUTE = "GET /api/"
+HEALTH_PROBE_INTERVAL_SECONDS = 0.01
+
+
+# ============================================================================
+# DADOS
+# ============================================================================
+
+def _offered_dates(service: dict, start: date, days: int) -> List[str]:
+    """
+    Datas (YYYY-MM-DD) em que o serviço atende, a partir de start.
+    """
+    return [
+        (start + timedelta(days=i)).isoformat()
+        for i in range(days)
+        if WEEKDAYS[(start + timedelta(days=i)).weekday()] in service["availability_days"]
+    ]
+
+
+async def seed(db, scale: dict, rng: random.Random) -> dict:
+    """
+    Recria o banco de benchmark na escala pedida.
+
+    Returns:
+        Dados usados pelos cenários (emails, IDs dos serviços)
+    """
+    for name in await db.list_collection_names():
+        await db.drop_collection(name)
+
+    # Mesmo hash para todos (seed rápido), no perfil configurado em main()
+    hashed = hash_password(PASSWORD)
+
+    organizers = [
+        User(email=f"org{i}@benchmark.com", name=f"Organizador {i}", hashed_password=hashed, role="organizer")
+        for i in range(scale["organizers"])
+    ]
+    users = [
+        User(email=f"user{i}@benchmark.com", name=f"Usuário {i}", hashed_password=hashed)
+        for i in range(scale["users"])
+    ]
+    await db.users.insert_many([u.model_dump() for u in organizers + users])
+
+    services = []
+    for i in range(scale["services"]):
+        service_type = rng.choice(SERVICE_TYPES)
+        services.append(Service(
+            name=f"{service_type} {i}",
+            type=service_type,
+            description=f"Serviço de {service_type.lower()} número {i}",
+            organizer_id=organizers[i % len(organizers)].id,
+            availability_days=rng.sample(WEEKDAYS[:6], 3),
+            time_slots=TIME_SLOTS,
+            location=f"Bairro {i % 10}",
+        ).model_dump())
+    await db.services.insert_many([{**s, **touch()} for s in services])
+
+    # Agendamentos passados e futuros, sem repetir horários
+    today = date.today()
+    dates_by_service = {s["id"]: _offered_dates(s, today - timedelta(days=180), 240) for s in services}
+    taken = set()
+    bookings = []
+    for user in users:
+        for _ in range(scale["bookings_per_user"]):
+            service = rng.choice(services)
+            slot = (service["id"], rng.choice(dates_by_service[service["id"]]), rng.choice(TIME_SLOTS))
+            if slot in taken:
+                continue
+            taken.add(slot)
+            status = rng.choice(["pending", "confirmed", "completed", "cancelled"])
+            booking = Booking(
+                service_id=slot[0], date=slot[1], time=slot[2], user_id=user.id, status=status,
+                rating=rng.randint(1, 5) if status == "completed" else None
+            ).model_dump()
+            booking[USER_NAME_FIELD] = fold(user.name)
+            booking.update(touch())
+            if status != "cancelled":
+                booking[SLOT_TAKEN_FIELD] = True
+            bookings.append(booking)
+
+    for i in range(0, len(bookings), 5000):
+        await db.bookings.insert_many(bookings[i:i + 5000])
+
+    # Contadores do painel e avaliações, como a aplicação mantém a cada escrita
+    await rebuild_stats(db, only_if_empty=False)
+    await rebuild_ratings(db, only_if_missing=False)
+
+    return {
+        "users": [u.email for u in users],
+        "organizers": [o.email for o in organizers],
+        "services": [{"id": s["id"], "availability_days": s["availability_days"]} for s in services],
+        "counts": {"users": len(users), "services": len(services), "bookings": len(bookings)},
+    }
+
+
+# ============================================================================
+# SERVIDOR
+# ============================================================================
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def hashing_env(profile: dict) -> dict:
+    """
+    Variáveis de ambiente que fixam no servidor o perfil de hash de senhas
+    (sem recalibrar), ex: {"PASSWORD_HASH_TARGET_MS": "0", "BCRYPT_ROUNDS": "13", ...}
+    """
+    cost_variable = "BCRYPT_ROUNDS" if profile["scheme"] == "bcrypt" else "ARGON2_TIME_COST"
+    return {
+        "PASSWORD_HASH_SCHEME": profile["scheme"],
+        "PASSWORD_HASH_TARGET_MS": "0",
+        cost_variable: str(profile["rounds"]),
+    }
+
+
+def start_server(db_name: str, port: int, workers: int, extra_env: Optional[dict] = None) -> subprocess.Popen:
+    """
+    Sobe o uvicorn com o banco de benchmark e espera o primeiro request.
+    """
+    env = {**os.environ, "DB_NAME": db_name, **(extra_env or {})}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT_DIR, env=env
+    )
+
+    started = time.perf_counter()
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError("O servidor encerrou durante a inicialização")
+        if time.perf_counter() - started > STARTUP_TIMEOUT_SECONDS:
+            process.terminate()
+            raise RuntimeError("Tempo limite de inicialização excedido")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/api/", timeout=1)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.05)
+
+
+# ============================================================================
+# CENÁRIOS
+# ============================================================================
+
+class Recorder:
+    """
+    Latências e status por rota.
+    """
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    async def request(self, http: httpx.AsyncClient, route: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await http.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            response, status = None, type(e).__name__
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.latencies.setdefault(route, []).append(elapsed_ms)
+        counts = self.statuses.setdefault(route, {})
+        counts[status] = counts.get(status, 0) + 1
+        return response
+
+
+async def _login(http: httpx.AsyncClient, email: str) -> dict:
+    response = await http.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def catalog(http, rec: Recorder, data: dict, tokens: dict, rng: random.Random):
+    roll = rng.random()
+    if roll < 0.6:
+        await rec.request(http, "GET /api/services", "GET", "/api/services", params={"limit": 50})
+    elif roll < 0.8:
+        await rec.request(http, "GET /api/services/search", "GET", "/api/services/search",
+                          params={"q": rng.choice(SEARCH_TERMS)})
+    else:
+        service = rng.choice(data["services"])
+        await rec.request(http, "GET /api/services/{id}/availability", "GET",
+                          f"/api/services/{service['id']}/availability")
+
+
+async def login(http, rec: Recorder, data: dict, tokens: dict, rng: random.Random):
+    await rec.request(http, "POST /api/auth/login", "POST", "/api/auth/login",
+                      json={"email": rng.choice(data["users"]), "password": PASSWORD})
+
+
+async def booking(http, rec: Recorder, data: dict, tokens: dict, rng: random.Random):
+    service = rng.choice(data["services"])
+    dates = _offered_dates(service, date.today() + timedelta(days=1), 60)
+    # 201/200 = criado, 409 = horário já ocupado (esperado sob carga)
+    await rec.request(http, "POST /api/bookings", "POST", "/api/bookings",
+                      headers=rng.choice(tokens["users"]),
+                      json={"service_id": service["id"], "date": rng.choice(dates), "time": rng.choice(TIME_SLOTS)})
+
+
+async def dashboard(http, rec: Recorder, data: dict, tokens: dict, rng: random.Random):
+    headers = rng.choice(tokens["organizers"])
+    await rec.request(http, "GET /api/bookings/organizer/stats", "GET",
+                      "/api/bookings/organizer/stats", headers=headers)
+    await rec.request(http, "GET /api/bookings/organizer/all", "GET",
+                      "/api/bookings/organizer/all", headers=headers, params={"limit": 100})
+
+
+SCENARIOS = {"catalog": catalog, "login": login, "booking": booking, "dashboard": dashboard}
+
+
+async def run_load(base_url: str, data: dict, mix: dict, duration: float, concurrency: int, seed_value: int) -> Recorder:
+    """
+    Executa o tráfego misto por `duration` segundos com `concurrency` clientes.
+    """
+    rec = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as http:
+        tokens = {
+            "users": [await _login(http, e) for e in data["users"][:TOKEN_POOL_SIZE]],
+            "organizers": [await _login(http, e) for e in data["organizers"][:TOKEN_POOL_SIZE]],
+        }
+        names, weights = list(mix), list(mix.values())
+        deadline = time.perf_counter() + duration
+
+        async def client(index: int):
+            rng = random.Random(seed_value + index)
+            while time.perf_counter() < deadline:
+                scenario = rng.choices(names, weights)[0]
+                await SCENARIOS[scenario](http, rec, data, tokens, rng)
+
+        await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return rec
+
+
+async def run_login_storm(base_url: str, data: dict, duration: float, concurrency: int, seed_value: int) -> dict:
+    """
+    Mede o health check (/api/) por `duration` segundos sem carga e depois
+    por mais `duration` segundos com `concurrency` clientes fazendo login
+    sem parar. Com o bcrypt fora do event loop, o p99 deve se manter.
+
+    Returns:
+        {"baseline": resumo, "during_logins": resumo} (ver summarize)
+    """
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as http:
+
+        async def probe(rec: Recorder, deadline: float):
+            while time.perf_counter() < deadline:
+                await rec.request(http, HEALTH_ROUTE, "GET", "/api/")
+                await asyncio.sleep(HEALTH_PROBE_INTERVAL_SECONDS)
+
+        baseline = Recorder()
+        await probe(baseline, time.perf_counter() + duration)
+
+        storm = Recorder()
+        deadline = time.perf_counter() + duration
+
+        async def login_client(index: int):
+            rng = random.Random(seed_value + index)
+            while time.perf_counter() < deadline:
+                await login(http, storm, data, {}, rng)
+
+        await asyncio.gather(probe(storm, deadline), *(login_client(i) for i in range(concurrency)))
+
+    return {"baseline": summarize(baseline, duration), "during_logins": summarize(storm, duration)}
+
+
+# ============================================================================
+# RELATÓRIO
+# ============================================================================
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    """
+    Percentil por posição mais próxima (nearest-rank).
+    """
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(rec: Recorder, duration: float) -> dict:
+    routes = {}
+    for route, latencies in sorted(rec.latencies.items()):
+        values = sorted(latencies)
+        routes[route] = {
+            "requests": len(values),
+            "throughput_rps": round(len(values) / duration, 2),
+            "p50_ms": round(_percentile(values, 50), 2),
+            "p95_ms": round(_percentile(values, 95), 2),
+            "p99_ms": round(_percentile(values, 99), 2),
+            "max_ms": round(values[-1], 2),
+            "mean_ms": round(statistics.fmean(values), 2),
+            "statuses": rec.statuses[route],
+        }
+    total = sum(r["requests"] for r in routes.values())
+    return {"total_requests": total, "throughput_rps": round(total / duration, 2), "routes": routes}
+
+
+def print_summary(scale_name: str, summary: dict) -> None:
+    print(f"\n=== Escala: {scale_name} — {summary['throughput_rps']} req/s ===")
+    print(f"{'Rota':45} {'req':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}  status")
+    for route, r in summary["routes"].items():
+        print(f"{route:45} {r['requests']:>7} {r['throughput_rps']:>8} {r['p50_ms']:>8} "
+              f"{r['p95_ms']:>8} {r['p99_ms']:>8}  {r['statuses']}")
+
+
+def print_login_storm(result: dict, concurrency: int) -> None:
+    baseline = result["baseline"]["routes"].get(HEALTH_ROUTE)
+    during = result["during_logins"]["routes"].get(HEALTH_ROUTE)
+    logins = result["during_logins"]["routes"].get("POST /api/auth/login", {})
+    if not baseline or not during:
+        return
+    print(f"\n--- Health check durante {concurrency} logins simultâneos ---")
+    print(f"{'':20} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for label, r in (("sem logins", baseline), ("com logins", during)):
+        print(f"{label:20} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}")
+    print(f"logins: {logins.get('requests', 0)} ({logins.get('throughput_rps', 0)} req/s), "
+          f"status {logins.get('statuses', {})}")
+
+
+def compare(before_path: str, after_path: str) -> None:
+    """
+    Compara dois arquivos de resultado (p95 e vazão por rota e escala).
+    """
+    before = json.loads(Path(before_path).read_text())
+    after = json.loads(Path(after_path).read_text())
+    print(f"Antes:  {before['git_commit']} ({before['started_at']})")
+    print(f"Depois: {after['git_commit']} ({after['started_at']})")
+
+    for scale_name, result in after["results"].items():
+        old = before["results"].get(scale_name)
+        if not old:
+            continue
+        print(f"\n=== Escala: {scale_name} ===")
+        print(f"{'Rota':45} {'p95 antes':>10} {'p95 depois':>11} {'Δ%':>7} {'req/s antes':>12} {'req/s depois':>13}")
+        for route, r in result["routes"].items():
+            o = old["routes"].get(route)
+            if not o:
+                continue
+            delta = (r["p95_ms"] - o["p95_ms"]) / o["p95_ms"] * 100 if o["p95_ms"] else 0
+            print(f"{route:45} {o['p95_ms']:>10} {r['p95_ms']:>11} {delta:>+7.1f} "
+                  f"{o['throughput_rps']:>12} {r['throughput_rps']:>13}")
+
+        if result.get("login_storm") and old.get("login_storm"):
+            print(f"\n{'Health check p99':45} {'antes':>10} {'depois':>11}")
+            for phase in ("baseline", "during_logins"):
+                o = old["login_storm"][phase]["routes"].get(HEALTH_ROUTE, {})
+                r = result["login_storm"][phase]["routes"].get(HEALTH_ROUTE, {})
+                print(f"{phase:45} {o.get('p99_ms', '-'):>10} {r.get('p99_ms', '-'):>11}")
+
+
+# ============================================================================
+# EXECUÇÃO
+# ============================================================================
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _parse_mix(value: str) -> dict:
+    mix = dict(DEFAULT_MIX)
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Cenário desconhecido: {name}")
+        mix[name] = float(weight)
+    return {k: v for k, v in mix.items() if v > 0}
+
+
+def run_scale(scale_name: str, args, hashing: dict) -> dict:
+    """
+    Popula o banco, sobe o servidor e executa a carga para uma escala.
+    """
+    scale = SCALES[scale_name]
+    rng = random.Random(args.seed)
+
+    async def _seed():
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        try:
+            return await seed(client[args.db_name], scale, rng)
+        finally:
+            client.close()
+
+    print(f"🌱 Populando '{args.db_name}' na escala {scale_name} {scale}...")
+    data = asyncio.run(_seed())
+
+    port = _free_port()
+    process = start_server(args.db_name, port, args.workers, hashing_env(hashing))
+    try:
+        print(f"🚀 Carga: {args.concurrency} clientes por {args.duration}s, mix {args.mix}")
+        rec = asyncio.run(run_load(
+            f"http://127.0.0.1:{port}", data, args.mix, args.duration, args.concurrency, args.seed
+        ))
+        storm = None
+        if args.login_storm > 0:
+            print(f"🔑 Health check sem carga e com {args.concurrency} logins simultâneos ({args.login_storm}s cada)")
+            storm = asyncio.run(run_login_storm(
+                f"http://127.0.0.1:{port}", data, args.login_storm, args.concurrency, args.seed
+            ))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    summary = summarize(rec, args.duration)
+    print_summary(scale_name, summary)
+    if storm:
+        print_login_storm(storm, args.concurrency)
+    return {"scale": scale, "data": data["counts"], **summary, "login_storm": storm}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API Conectando")
+    parser.add_argument("--scale", default="small", help=f"Escalas separadas por vírgula ({', '.join(SCALES)})")
+    parser.add_argument("--duration", type=float, default=30, help="Segundos de carga por escala")
+    parser.add_argument("--concurrency", type=int, default=20, help="Clientes simultâneos")
+    parser.add_argument("--workers", type=int, default=1, help="Workers do uvicorn")
+    parser.add_argument("--mix", type=_parse_mix, default=dict(DEFAULT_MIX),
+                        help="Pesos dos cenários, ex: catalog=60,login=10,booking=15,dashboard=15")
+    parser.add_argument("--login-storm", type=float, default=10,
+                        help="Segundos de cada fase da medição do health check com logins (0 desliga)")
+    parser.add_argument("--seed", type=int, default=42, help="Semente dos dados e do tráfego")
+    parser.add_argument("--db-name", default=f"{os.environ.get('DB_NAME', 'conectando')}_benchmark",
+                        help="Banco usado no teste (é apagado e recriado)")
+    parser.add_argument("--output", help="Arquivo JSON para salvar os resultados")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DEPOIS"), help="Compara dois resultados")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.db_name == os.environ.get("DB_NAME"):
+        parser.error("--db-name não pode ser o banco da aplicação (ele é apagado)")
+
+    scale_names = [s.strip() for s in args.scale.split(",")]
+    for name in scale_names:
+        if name not in SCALES:
+            parser.error(f"Escala desconhecida: {name}")
+
+    # Calibra uma vez: o seed e o servidor usam o mesmo custo
+    hashing = configure_password_hashing()
+    print(f"🔐 Hash de senhas: {hashing}")
+
+    report = {
+        "git_commit": _git_commit(),
+        "started_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "settings": {
+            "duration": args.duration, "concurrency": args.concurrency, "workers": args.workers,
+            "login_storm": args.login_storm,
+            "mix": args.mix, "seed": args.seed, "password_hashing": hashing,
+        },
+        "results": {name: run_scale(name, args, hashing) for name in scale_names},
+    }
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"\n💾 Resultados salvos em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# ============================================================================
+# BENCHMARK_STARTUP.PY - Tempo de inicialização e latência do primeiro request
+# ============================================================================
+# Sobe o servidor (uvicorn) em um subprocesso e mede:
+# - Tempo até o primeiro request respondido (o uvicorn só aceita conexões
+#   depois do lifespan: pool aberto, índices, calibração e warm-up)
+# - Latência do primeiro request de cada rota pública e a de um request
+#   seguinte (já "quente"), para avaliar o efeito do warm-up
+#
+# Usa o MONGO_URL/DB_NAME do .env. Uso:
+#   python benchmark_startup.py                 # com warm-up
+#   python benchmark_startup.py --no-warmup     # para comparar
+#   python benchmark_startup.py --runs 5 --output startup.json
+# ============================================================================
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+import httpx
+from database import WARMUP_PATHS
+
+ROOT_DIR = Path(__file__).parent
+STARTUP_TIMEOUT_SECONDS = 60
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _timed_get(http: httpx.Client, path: str) -> float:
+    """
+    Faz um GET e retorna a latência em ms.
+    """
+    start = time.perf_counter()
+    http.get(path)
+    return (time.perf_counter() - start) * 1000
+
+
+def measure_once(warmup: bool) -> dict:
+    """
+    Sobe o servidor uma vez e mede a inicialização e os primeiros requests.
+    """
+    port = _free_port()
+    env = {**os.environ, "WARMUP_ENABLED": "1" if warmup else "0"}
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT_DIR, env=env
+    )
+
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as http:
+            # Tempo até o primeiro request respondido
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError("O servidor encerrou durante a inicialização")
+                if time.perf_counter() - started > STARTUP_TIMEOUT_SECONDS:
+                    raise RuntimeError("Tempo limite de inicialização excedido")
+                try:
+                    http.get("/api/")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.01)
+            time_to_first_request = (time.perf_counter() - started) * 1000
+
+            routes = {}
+            for path in WARMUP_PATHS:
+                first = _timed_get(http, path)
+                second = _timed_get(http, path)
+                routes[path] = {"first_ms": round(first, 2), "warm_ms": round(second, 2)}
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    return {"time_to_first_request_ms": round(time_to_first_request, 1), "routes": routes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização da API")
+    parser.add_argument("--runs", type=int, default=3, help="Número de inicializações")
+    parser.add_argument("--no-warmup", action="store_true", help="Desliga o warm-up das rotas")
+    parser.add_argument("--output", help="Arquivo JSON para salvar o resultado")
+    args = parser.parse_args()
+
+    runs = [measure_once(warmup=not args.no_warmup) for _ in range(args.runs)]
+
+    result = {
+        "warmup": not args.no_warmup,
+        "runs": runs,
+        "median_time_to_first_request_ms": statistics.median(r["time_to_first_request_ms"] for r in runs),
+        "median_first_request_ms": {
+            path: statistics.median(r["routes"][path]["first_ms"] for r in runs)
+            for path in WARMUP_PATHS
+        },
+    }
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+# ============================================================================
+# BOOKING_STATS.PY - Contadores de agendamentos por serviço
+# ============================================================================
+# Este arquivo contém funções para:
+# - Manter, a cada escrita, contadores por serviço e por status ($inc)
+# - Ler as estatísticas do painel do organizador sem percorrer agendamentos
+# - Reconstruir os contadores a partir dos agendamentos existentes
+# - Calcular o histórico mensal do usuário em uma única agregação
+# - Manter a soma/quantidade/média das avaliações em cada serviço
+#
+# Documento da coleção "booking_stats" (um por serviço):
+#   {
+#     "service_id": "...", "organizer_id": "...",
+#     "total": 10,                               # todos os agendamentos
+#     "status": {"pending": 3, "confirmed": 5, ...},
+#     "by_date": {"2025-10-20": 2, ...}          # agendamentos não cancelados
+#   }
+# ============================================================================
+
+from datetime import date
+from typing import Iterable, Optional, Tuple
+from pymongo import UpdateOne
+from availability import RELEASED_STATUSES
+from invalidation import touch
+
+STATS_COLLECTION = "booking_stats"
+
+
+# ============================================================================
+# ATUALIZAÇÃO DOS CONTADORES
+# ============================================================================
+
+async def record_booking_created(db, service: dict, booking: dict) -> None:
+    """
+    Contabiliza um novo agendamento.
+
+    Args:
+        db: Banco de dados do Motor
+        service: Documento do serviço agendado
+        booking: Documento do agendamento criado
+    """
+    increments = {"total": 1, f"status.{booking['status']}": 1}
+    if booking["status"] not in RELEASED_STATUSES:
+        increments[f"by_date.{booking['date']}"] = 1
+
+    await db[STATS_COLLECTION].update_one(
+        {"service_id": service["id"]},
+        {"$inc": increments, "$setOnInsert": {"organizer_id": service["organizer_id"]}},
+        upsert=True
+    )
+
+
+async def record_status_change(db, booking: dict, new_status: Optional[str]) -> None:
+    """
+    Move um agendamento de um status para outro nos contadores.
+
+    Args:
+        db: Banco de dados do Motor
+        booking: Documento do agendamento ANTES da alteração
+        new_status: Novo status (None ou igual ao atual = nada a fazer)
+    """
+    increments = _status_increments(booking, new_status)
+    if not increments:
+        return
+
+    await db[STATS_COLLECTION].update_one(
+        {"service_id": booking["service_id"]},
+        {"$inc": increments}
+    )
+
+
+async def record_status_changes(db, changes: Iterable[Tuple[dict, str]]) -> None:
+    """
+    Versão em lote de record_status_change: agrupa os incrementos por
+    serviço e aplica tudo em um único bulk_write.
+
+    Args:
+        db: Banco de dados do Motor
+        changes: Pares (agendamento ANTES da alteração, novo status)
+    """
+    by_service = {}
+    for booking, new_status in changes:
+        totals = by_service.setdefault(booking["service_id"], {})
+        for field, value in _status_increments(booking, new_status).items():
+            totals[field] = totals.get(field, 0) + value
+
+    operations = [
+        UpdateOne({"service_id": service_id}, {"$inc": increments})
+        for service_id, increments in by_service.items()
+        if increments
+    ]
+    if operations:
+        await db[STATS_COLLECTION].bulk_write(operations, ordered=False)
+
+
+def _status_increments(booking: dict, new_status: Optional[str]) -> dict:
+    """
+    Incrementos dos contadores para mover um agendamento de status.
+    """
+    old_status = booking["status"]
+    if not new_status or new_status == old_status:
+        return {}
+
+    increments = {f"status.{old_status}": -1, f"status.{new_status}": 1}
+
+    # Agendamentos cancelados deixam de contar no dia (e voltam se reativados)
+    was_active = old_status not in RELEASED_STATUSES
+    is_active = new_status not in RELEASED_STATUSES
+    if was_active != is_active:
+        increments[f"by_date.{booking['date']}"] = 1 if is_active else -1
+
+    return increments
+
+
+# ============================================================================
+# LEITURA
+# ============================================================================
+
+async def get_organizer_stats(db, organizer_id: str, today: Optional[date] = None) -> dict:
+    """
+    Soma os contadores dos serviços do organizador.
+
+    Returns:
+        Dicionário com total, pending, confirmed, completed, cancelled e today
+    """
+    today_key = f"by_date.{(today or date.today()).isoformat()}"
+    counters = await db[STATS_COLLECTION].find(
+        {"organizer_id": organizer_id},
+        {"_id": 0, "total": 1, "status": 1, today_key: 1}
+    ).to_list(None)
+
+    stats = {"total": 0, "pending": 0, "confirmed": 0, "completed": 0, "cancelled": 0, "today": 0}
+    for counter in counters:
+        stats["total"] += counter.get("total", 0)
+        for status, count in counter.get("status", {}).items():
+            if status in stats:
+                stats[status] += count
+        stats["today"] += sum(counter.get("by_date", {}).values())
+
+    return stats
+
+
+# ============================================================================
+# HISTÓRICO DO USUÁRIO
+# ============================================================================
+
+MAX_HISTORY_MONTHS = 60  # Máximo de meses retornados no histórico
+
+# Mês (YYYY-MM) da data YYYY-MM-DD do agendamento. Com $split/$concat em vez
+# de $substrBytes, que o mongomock usado nos testes não implementa
+_DATE_PARTS = {"$split": ["$date", "-"]}
+MONTH_EXPRESSION = {"$concat": [
+    {"$arrayElemAt": [_DATE_PARTS, 0]}, "-", {"$arrayElemAt": [_DATE_PARTS, 1]}
+]}
+
+
+def _history_group(group_id) -> dict:
+    """
+    Estágio $group com os totais do histórico (por mês ou geral).
+    """
+    def count_status(status):
+        return {"$sum": {"$cond": [{"$eq": ["$status", status]}, 1, 0]}}
+
+    return {"$group": {
+        "_id": group_id,
+        "total": {"$sum": 1},
+        "completed": count_status("completed"),
+        "cancelled": count_status("cancelled"),
+        "no_show": count_status("no_show"),
+        "rating_count": {"$sum": {"$cond": [{"$gt": ["$rating", None]}, 1, 0]}},
+        "average_rating": {"$avg": "$rating"},  # Ignora agendamentos sem avaliação
+    }}
+
+
+async def get_user_history(
+    db,
+    user_id: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> dict:
+    """
+    Resume o histórico de agendamentos do usuário por mês.
+    Usa uma única agregação sobre o índice (user_id, date).
+
+    Returns:
+        {"summary": {...}, "months": [{"month": "YYYY-MM", ...}]}, com no
+        máximo MAX_HISTORY_MONTHS meses (os mais recentes)
+    """
+    match = {"user_id": user_id}
+    if start or end:
+        match["date"] = {}
+        if start:
+            match["date"]["$gte"] = start.isoformat()
+        if end:
+            match["date"]["$lte"] = end.isoformat()
+
+    result = await db.bookings.aggregate([
+        {"$match": match},
+        {"$facet": {
+            "summary": [_history_group(None)],
+            "months": [
+                _history_group(MONTH_EXPRESSION),
+                {"$sort": {"_id": -1}},
+                {"$limit": MAX_HISTORY_MONTHS},
+            ],
+        }},
+    ]).to_list(1)
+
+    facets = result[0] if result else {"summary": [], "months": []}
+    summary = facets["summary"][0] if facets["summary"] else {}
+    summary.pop("_id", None)
+
+    months = []
+    for bucket in facets["months"]:
+        bucket["month"] = bucket.pop("_id")
+        months.append(bucket)
+
+    return {"summary": summary, "months": months}
+
+
+# ============================================================================
+# AVALIAÇÕES POR SERVIÇO
+# ============================================================================
+
+def _rating_update(sum_delta: int, count_delta: int) -> list:
+    """
+    Atualização (pipeline) que ajusta soma e quantidade de avaliações e
+    recalcula a média no mesmo comando atômico.
+    """
+    return [
+        {"$set": {
+            "rating_sum": {"$add": [{"$ifNull": ["$rating_sum", 0]}, sum_delta]},
+            "rating_count": {"$add": [{"$ifNull": ["$rating_count", 0]}, count_delta]},
+        }},
+        {"$set": {
+            "rating_average": {"$cond": [
+                {"$gt": ["$rating_count", 0]},
+                {"$divide": ["$rating_sum", "$rating_count"]},
+                None
+            ]},
+            **touch(),
+        }},
+    ]
+
+
+async def record_rating_change(db, booking: dict, new_rating: Optional[int]) -> bool:
+    """
+    Atualiza as avaliações agregadas do serviço quando um agendamento
+    recebe ou altera sua avaliação.
+
+    Args:
+        db: Banco de dados do Motor
+        booking: Documento do agendamento ANTES da alteração
+        new_rating: Nova avaliação (None = não alterada)
+
+    Returns:
+        True se o serviço foi alterado
+    """
+    old_rating = booking.get("rating")
+    if new_rating is None or new_rating == old_rating:
+        return False
+
+    sum_delta = new_rating - (old_rating or 0)
+    count_delta = 0 if old_rating is not None else 1
+
+    await db.services.update_one(
+        {"id": booking["service_id"]},
+        _rating_update(sum_delta, count_delta)
+    )
+    return True
+
+
+async def rebuild_ratings(db, only_if_missing: bool = True) -> None:
+    """
+    Recalcula as avaliações agregadas de todos os serviços.
+    Na inicialização, só roda se algum serviço ainda não tiver os campos.
+    """
+    if only_if_missing and not await db.services.find_one(
+        {"rating_count": {"$exists": False}}, {"_id": 1}
+    ):
+        return
+
+    grouped = await db.bookings.aggregate([
+        {"$match": {"rating": {"$ne": None}}},
+        {"$group": {"_id": "$service_id", "sum": {"$sum": "$rating"}, "count": {"$sum": 1}}}
+    ]).to_list(None)
+    ratings = {row["_id"]: row for row in grouped}
+
+    services = await db.services.find({}, {"_id": 0, "id": 1}).to_list(None)
+    if not services:
+        return
+
+    operations = []
+    for service in services:
+        rating = ratings.get(service["id"], {"sum": 0, "count": 0})
+        operations.append(UpdateOne({"id": service["id"]}, {"$set": {
+            "rating_sum": rating["sum"],
+            "rating_count": rating["count"],
+            "rating_average": rating["sum"] / rating["count"] if rating["count"] else None,
+        }}))
+
+    await db.services.bulk_write(operations)
+
+
+# ============================================================================
+# RECONSTRUÇÃO
+# ============================================================================
+
+async def rebuild_stats(db, only_if_empty: bool = True) -> None:
+    """
+    Recalcula todos os contadores a partir da coleção de agendamentos.
+    Na inicialização, só roda se ainda não houver contadores.
+    """
+    if only_if_empty and await db[STATS_COLLECTION].find_one({}, {"_id": 1}):
+        return
+
+    grouped = await db.bookings.aggregate([
+        {"$group": {
+            "_id": {"service_id": "$service_id", "status": "$status", "date": "$date"},
+            "count": {"$sum": 1}
+        }}
+    ]).to_list(None)
+
+    counters = {}
+    for row in grouped:
+        key = row["_id"]
+        counter = counters.setdefault(key["service_id"], {"total": 0, "status": {}, "by_date": {}})
+        counter["total"] += row["count"]
+        counter["status"][key["status"]] = counter["status"].get(key["status"], 0) + row["count"]
+        if key["status"] not in RELEASED_STATUSES:
+            counter["by_date"][key["date"]] = counter["by_date"].get(key["date"], 0) + row["count"]
+
+    if not counters:
+        return
+
+    services = await db.services.find(
+        {"id": {"$in": list(counters)}},
+        {"_id": 0, "id": 1, "organizer_id": 1}
+    ).to_list(None)
+    organizers = {s["id"]: s["organizer_id"] for s in services}
+
+    await db[STATS_COLLECTION].bulk_write([
+        UpdateOne(
+            {"service_id": service_id},
+            {"$set": {**counter, "organizer_id": organizers.get(service_id)}},
+            upsert=True
+        )
+        for service_id, counter in counters.items()
+    ])
@@ -0,0 +1,130 @@
+# ============================================================================
+# CACHE.PY - Cache em memória (LRU + TTL) por processo
+# ============================================================================
+# Este arquivo contém:
+# - TTLCache: cache limitado em tamanho (LRU) com expiração por tempo (TTL)
+# - Um registro de todos os caches do processo, usado para expor
+#   estatísticas (hits/misses) e para invalidações
+# - Funções de ETag para respostas condicionais (304 Not Modified)
+# ============================================================================
+
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional
+
+# Registro de todos os caches criados neste processo (nome -> cache)
+CACHES: Dict[str, "TTLCache"] = {}
+
+# Valor sentinela para diferenciar "não está no cache" de "None armazenado"
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache LRU com expiração por tempo.
+
+    - Quando cheio, descarta o item usado há mais tempo
+    - Itens expiram `ttl` segundos após serem armazenados
+    - Conta acertos (hits) e faltas (misses)
+
+    Exemplo:
+        >>> users = TTLCache("users", maxsize=1024, ttl=60)
+        >>> users.set("a@b.com", user)
+        >>> users.get("a@b.com")
+        User(...)
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+        CACHES[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Retorna o valor armazenado ou `default` se ausente/expirado.
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Armazena um valor (ttl opcional sobrescreve o padrão do cache).
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Remove um item do cache (se existir).
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove todos os itens do cache.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        Retorna estatísticas de uso do cache.
+        """
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def cache_stats() -> Dict[str, dict]:
+    """
+    Retorna as estatísticas de todos os caches do processo.
+    """
+    return {name: cache.stats() for name, cache in CACHES.items()}
+
+
+# ============================================================================
+# ETAGS
+# ============================================================================
+
+def make_etag(body: bytes) -> str:
+    """
+    Cria um ETag forte a partir do conteúdo da resposta.
+    Derivado do conteúdo, é o mesmo em todos os processos do servidor.
+    """
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Verifica se o header If-None-Match do cliente corresponde ao ETag.
+    """
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
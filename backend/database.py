@@ -0,0 +1,133 @@
+# ============================================================================
+# DATABASE.PY - Conexão com o MongoDB e aquecimento do servidor
+# ============================================================================
+# Este arquivo contém funções para:
+# - Ler do ambiente as configurações do pool de conexões do MongoDB
+# - Criar o cliente do Motor com essas configurações
+# - Abrir as conexões do pool antes do primeiro request
+# - Aquecer as rotas mais usadas (código, caches e serialização) antes de o
+#   worker ficar pronto
+#
+# Variáveis de ambiente (todas opcionais):
+#   MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS,
+#   MONGO_CONNECT_TIMEOUT_MS, MONGO_SERVER_SELECTION_TIMEOUT_MS,
+#   MONGO_SOCKET_TIMEOUT_MS, MONGO_WAIT_QUEUE_TIMEOUT_MS
+#   WARMUP_ENABLED (padrão: 1)
+# ============================================================================
+
+import asyncio
+import logging
+import os
+import time
+from typing import Iterable
+from motor.motor_asyncio import AsyncIOMotorClient
+from metrics import command_listener
+from query_monitor import query_monitor_listener
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Opção do pymongo -> (variável de ambiente, valor padrão; None = padrão do driver)
+POOL_SETTINGS = {
+    "maxPoolSize": ("MONGO_MAX_POOL_SIZE", 100),
+    "minPoolSize": ("MONGO_MIN_POOL_SIZE", 10),
+    "maxIdleTimeMS": ("MONGO_MAX_IDLE_TIME_MS", 300000),
+    "connectTimeoutMS": ("MONGO_CONNECT_TIMEOUT_MS", 10000),
+    "serverSelectionTimeoutMS": ("MONGO_SERVER_SELECTION_TIMEOUT_MS", 10000),
+    "socketTimeoutMS": ("MONGO_SOCKET_TIMEOUT_MS", None),
+    "waitQueueTimeoutMS": ("MONGO_WAIT_QUEUE_TIMEOUT_MS", None),
+}
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+
+# Rotas públicas aquecidas na inicialização
+WARMUP_PATHS = [
+    "/api/",
+    "/api/services",
+    "/api/services?sort=top_rated",
+    "/api/services/search?q=servico",
+]
+
+
+# ============================================================================
+# CLIENTE
+# ============================================================================
+
+def client_options() -> dict:
+    """
+    Opções do pool de conexões lidas do ambiente.
+
+    Exemplo:
+        >>> client_options()
+        {'maxPoolSize': 100, 'minPoolSize': 10, 'maxIdleTimeMS': 300000, ...}
+    """
+    options = {}
+    for option, (env_name, default) in POOL_SETTINGS.items():
+        value = os.getenv(env_name)
+        if value is not None:
+            options[option] = int(value)
+        elif default is not None:
+            options[option] = default
+    return options
+
+
+def create_client(mongo_url: str) -> AsyncIOMotorClient:
+    """
+    Cria o cliente do Motor com as opções do pool e os listeners de comandos
+    (métricas e detecção de N+1/consultas lentas).
+    """
+    return AsyncIOMotorClient(
+        mongo_url,
+        event_listeners=[command_listener, query_monitor_listener],
+        **client_options()
+    )
+
+
+# ============================================================================
+# AQUECIMENTO
+# ============================================================================
+
+async def warm_up_pool(client: AsyncIOMotorClient, connections: int) -> float:
+    """
+    Verifica o servidor (ping) e abre `connections` conexões do pool com
+    pings simultâneos, para que os primeiros requests não paguem a
+    conexão/TLS.
+
+    Returns:
+        Tempo gasto em ms
+
+    Raises:
+        PyMongoError: se o servidor não responder (falha na inicialização)
+    """
+    start = time.perf_counter()
+    await client.admin.command("ping")
+    if connections > 1:
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(connections)))
+    return (time.perf_counter() - start) * 1000
+
+
+async def warm_up_routes(app, paths: Iterable[str] = WARMUP_PATHS) -> float:
+    """
+    Executa uma vez as rotas públicas mais usadas, dentro do processo
+    (sem rede): carrega o código das rotas, as dependências, a serialização
+    e preenche o cache do catálogo. Erros apenas geram um aviso.
+
+    Returns:
+        Tempo gasto em ms
+    """
+    import httpx
+
+    start = time.perf_counter()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as http:
+        for path in paths:
+            try:
+                response = await http.get(path)
+                if response.status_code >= 500:
+                    logger.warning(f"Warm-up {path}: HTTP {response.status_code}")
+            except Exception as e:
+                logger.warning(f"Warm-up {path} falhou: {e}")
+    return (time.perf_counter() - start) * 1000
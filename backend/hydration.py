@@ -0,0 +1,111 @@
+# ============================================================================
+# HYDRATION.PY - Junção de agendamentos com serviços e usuários
+# ============================================================================
+# Este arquivo contém funções para:
+# - Buscar em lote (uma consulta $in por coleção) os documentos relacionados
+# - Montar respostas BookingWithDetails a partir de dicionários em memória
+#
+# Assim, o número de consultas ao MongoDB é constante, independente de
+# quantos agendamentos estejam sendo listados.
+# ============================================================================
+
+from typing import Dict, Iterable, List, Optional
+from models import BookingWithDetails, Service, UserResponse
+from projections import projection
+from serialization import construct
+
+
+# ============================================================================
+# FUNÇÕES AUXILIARES
+# ============================================================================
+
+async def fetch_by_ids(
+    collection,
+    ids: Iterable[str],
+    projection: Optional[dict] = None
+) -> Dict[str, dict]:
+    """
+    Busca vários documentos pelo campo "id" em uma única consulta.
+
+    Args:
+        collection: Coleção do Motor (ex: db.services)
+        ids: IDs a buscar (duplicados são ignorados)
+        projection: Campos a buscar (opcional; o "id" é sempre incluído)
+
+    Returns:
+        Dicionário {id: documento}
+    """
+    unique_ids = list(set(ids))
+    if not unique_ids:
+        return {}
+
+    if projection is not None:
+        projection = {**projection, "id": 1}
+
+    documents = await collection.find({"id": {"$in": unique_ids}}, projection).to_list(None)
+    return {doc["id"]: doc for doc in documents}
+
+
+# ============================================================================
+# FUNÇÃO PRINCIPAL
+# ============================================================================
+
+async def hydrate_bookings(
+    db,
+    bookings: List[dict],
+    include: Iterable[str] = ("service", "user"),
+    services_by_id: Optional[Dict[str, dict]] = None,
+    service_fields: Optional[Iterable[str]] = None,
+    user_fields: Optional[Iterable[str]] = None
+) -> List[BookingWithDetails]:
+    """
+    Popula agendamentos com os detalhes do serviço e/ou do usuário.
+
+    Args:
+        db: Banco de dados do Motor
+        bookings: Documentos de agendamento vindos do MongoDB
+        include: Relações a popular ("service", "user")
+        services_by_id: Serviços já carregados pelo chamador (opcional),
+            evitando buscá-los novamente
+        service_fields / user_fields: Campos a buscar de cada relação
+            (None = todos os campos públicos)
+
+    Returns:
+        Lista de BookingWithDetails na mesma ordem dos agendamentos
+
+    Exemplo:
+        >>> await hydrate_bookings(db, bookings, include=("service",))
+        [BookingWithDetails(..., service=Service(...), user=None)]
+    """
+    include = set(include)
+
+    # Uma consulta por coleção, com deduplicação dos IDs
+    services = {}
+    if "service" in include:
+        services = services_by_id
+        if services is None:
+            services = await fetch_by_ids(
+                db.services, (b["service_id"] for b in bookings),
+                projection(Service, service_fields)
+            )
+
+    users = {}
+    if "user" in include:
+        users = await fetch_by_ids(
+            db.users, (b["user_id"] for b in bookings),
+            projection(UserResponse, user_fields)  # Nunca busca a senha
+        )
+
+    # Junção em memória (documentos do banco, sem revalidação)
+    result = []
+    for booking in bookings:
+        service = services.get(booking.get("service_id"))
+        user = users.get(booking.get("user_id"))
+
+        result.append(construct(BookingWithDetails, {
+            **booking,
+            "service": construct(Service, service) if service else None,
+            "user": construct(UserResponse, user) if user else None,
+        }))
+
+    return result
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# ============================================================================
+# INDEXES.PY - Índices do MongoDB e verificação dos planos de consulta
+# ============================================================================
+# Este arquivo contém:
+# - A declaração de todos os índices usados pelas rotas da API
+# - A criação desses índices na inicialização do servidor
+# - Uma verificação (explain) que falha se alguma consulta fizer COLLSCAN
+#   ou, nas rotas com ordenação, ordenar em memória (SORT)
+#
+# Uso pela linha de comando:
+#   python indexes.py            -> cria os índices
+#   python indexes.py --check    -> cria os índices e verifica os planos
+# ============================================================================
+
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# DECLARAÇÃO DOS ÍNDICES
+# ============================================================================
+
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        # Consulta periódica da invalidação de caches (invalidation.py)
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ],
+    "services": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        # Catálogo público: filtro por active + paginação por _id
+        IndexModel([("active", ASCENDING), ("_id", ASCENDING)], name="active_id"),
+        # Serviços do organizador: filtro por organizer_id + paginação por _id
+        IndexModel([("organizer_id", ASCENDING), ("_id", ASCENDING)], name="organizer_id_id"),
+        # Catálogo ordenado por avaliação (sort=top_rated)
+        IndexModel(
+            [("active", ASCENDING), ("rating_average", DESCENDING), ("rating_count", DESCENDING), ("_id", ASCENDING)],
+            name="active_top_rated"
+        ),
+        # Busca textual (search.py): português, sem diferenciar acentos
+        IndexModel(
+            [("name", TEXT), ("description", TEXT), ("location", TEXT)],
+            default_language="portuguese",
+            weights={"name": 10, "location": 3, "description": 1},
+            name="services_text"
+        ),
+        # Filtros da busca: tipo, local e dia da semana (multikey)
+        IndexModel([("active", ASCENDING), ("type", ASCENDING)], name="active_type"),
+        IndexModel([("active", ASCENDING), ("location", ASCENDING)], name="active_location"),
+        IndexModel([("active", ASCENDING), ("availability_days", ASCENDING)], name="active_availability_days"),
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ],
+    "bookings": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel(
+            [("service_id", ASCENDING), ("date", ASCENDING), ("time", ASCENDING)],
+            name="service_date_time"
+        ),
+        IndexModel([("user_id", ASCENDING), ("created_at", ASCENDING)], name="user_created_at"),
+        # Listagens paginadas por _id: agendamentos do usuário e do organizador
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_id"),
+        IndexModel([("service_id", ASCENDING), ("_id", ASCENDING)], name="service_id_id"),
+        # Filtro por status no painel do organizador
+        IndexModel([("service_id", ASCENDING), ("status", ASCENDING), ("date", ASCENDING)], name="service_status_date"),
+        # Histórico do usuário por período
+        IndexModel([("user_id", ASCENDING), ("date", ASCENDING)], name="user_date"),
+        # Um único agendamento ativo por horário (ver availability.py)
+        IndexModel(
+            [("service_id", ASCENDING), ("date", ASCENDING), ("time", ASCENDING), ("slot_taken", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"slot_taken": True},
+            name="active_slot_unique"
+        ),
+    ],
+    "booking_stats": [
+        IndexModel([("service_id", ASCENDING)], unique=True, name="service_id_unique"),
+        IndexModel([("organizer_id", ASCENDING)], name="organizer_id"),
+    ],
+}
+
+
+# ============================================================================
+# CONSULTAS DAS ROTAS (usadas na verificação com explain)
+# ============================================================================
+# Cada item: (rota, coleção, filtro, ordenação)
+
+ROUTE_QUERIES = [
+    ("get_current_user", "users", {"email": "check@example.com"}, None),
+    ("register", "users", {"email": "check@example.com"}, None),
+    ("login", "users", {"email": "check@example.com"}, None),
+    ("update_user_profile", "users", {"id": "check"}, None),
+    ("hydrate_bookings[user]", "users", {"id": {"$in": ["check"]}}, None),
+    ("get_all_services", "services", {"active": True}, [("_id", ASCENDING)]),
+    ("get_all_services[top_rated]", "services", {"active": True},
+     [("rating_average", DESCENDING), ("rating_count", DESCENDING), ("_id", ASCENDING)]),
+    ("search_services[day]", "services", {"active": True, "availability_days": "Sábado"}, None),
+    ("get_service", "services", {"id": "check"}, None),
+    ("get_my_services", "services", {"organizer_id": "check"}, [("_id", ASCENDING)]),
+    ("update_service", "services", {"id": "check"}, None),
+    ("delete_service", "services", {"id": "check"}, None),
+    ("create_booking", "services", {"id": "check", "active": True}, None),
+    ("hydrate_bookings[service]", "services", {"id": {"$in": ["check"]}}, None),
+    ("get_my_bookings", "bookings", {"user_id": "check"}, [("_id", ASCENDING)]),
+    ("get_organizer_bookings", "bookings", {"service_id": {"$in": ["check"]}}, [("_id", ASCENDING)]),
+    ("get_service_availability", "bookings",
+     {"service_id": "check", "date": {"$gte": "2025-01-01", "$lte": "2025-01-31"}, "slot_taken": True}, None),
+    ("update_booking", "bookings", {"id": "check"}, None),
+    ("cancel_booking", "bookings", {"id": "check"}, None),
+    ("get_my_history", "bookings", {"user_id": "check", "date": {"$gte": "2025-01-01"}}, None),
+    ("get_organizer_stats", "booking_stats", {"organizer_id": "check"}, None),
+    ("watch_changes[poll]", "services", {"updated_at": {"$gt": datetime(2025, 1, 1)}}, None),
+]
+
+
+# ============================================================================
+# FUNÇÕES
+# ============================================================================
+
+async def ensure_indexes(db) -> None:
+    """
+    Cria (se ainda não existirem) todos os índices declarados em INDEXES.
+    Chamado na inicialização do servidor; é idempotente.
+    """
+    for collection_name, indexes in INDEXES.items():
+        # Índices únicos podem falhar com dados duplicados: cada um é criado
+        # em uma chamada própria, para não impedir a criação dos demais
+        shared = [index for index in indexes if not index.document.get("unique")]
+        batches = ([shared] if shared else []) + [
+            [index] for index in indexes if index.document.get("unique")
+        ]
+        for batch in batches:
+            try:
+                await db[collection_name].create_indexes(batch)
+            except OperationFailure as e:
+                names = ", ".join(index.document["name"] for index in batch)
+                logger.error(f"Falha ao criar índices ({names}) em '{collection_name}': {e}")
+
+
+def _plan_stages(plan) -> list:
+    """
+    Retorna todos os estágios (stage) de um plano de execução.
+    """
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def find_collection_scans(db) -> list:
+    """
+    Executa explain() na consulta de cada rota.
+
+    Returns:
+        Lista de (rota, estágio) cujo plano vencedor usa COLLSCAN ou, nas
+        rotas com ordenação, ordena em memória (SORT)
+    """
+    offenders = []
+    for route, collection_name, query, sort in ROUTE_QUERIES:
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.explain()
+
+        stages = _plan_stages(explanation["queryPlanner"]["winningPlan"])
+        if "COLLSCAN" in stages:
+            offenders.append((route, "COLLSCAN"))
+        elif sort and "SORT" in stages:
+            offenders.append((route, "SORT"))
+
+    return offenders
+
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+async def main(check: bool) -> int:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from dotenv import load_dotenv
+    from pathlib import Path
+    import os
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        print("🗂️  Criando índices...")
+        await ensure_indexes(db)
+
+        if not check:
+            return 0
+
+        print("🔍 Verificando planos de consulta...")
+        offenders = await find_collection_scans(db)
+        if offenders:
+            for route, stage in offenders:
+                print(f"❌ {stage} em: {route}")
+            return 1
+
+        print(f"✅ Nenhuma das {len(ROUTE_QUERIES)} consultas faz COLLSCAN ou ordena em memória")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(check="--check" in sys.argv)))
@@ -0,0 +1,173 @@
+# ============================================================================
+# INVALIDATION.PY - Invalidação de caches entre processos (workers)
+# ============================================================================
+# Cada worker do uvicorn tem seus próprios caches em memória (cache.py).
+# Este arquivo mantém esses caches coerentes entre processos:
+# - Observa as coleções com handlers registrados (hoje users e services)
+#   via change streams do MongoDB (requer replica set)
+# - Em um mongod standalone, consulta periodicamente o campo "updated_at"
+# - Repassa cada alteração aos handlers registrados por coleção
+# ============================================================================
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Campo de data de modificação usado pelo modo de consulta periódica
+UPDATED_AT_FIELD = "updated_at"
+
+POLL_INTERVAL_SECONDS = float(os.getenv("CACHE_INVALIDATION_POLL_SECONDS", "2"))
+# Cada consulta periódica volta esse intervalo antes da última alteração vista:
+# "updated_at" vem do relógio do worker antes de a escrita ser confirmada, então
+# uma escrita pode aparecer depois de outra com data maior (ou de outro worker
+# com o relógio adiantado)
+POLL_OVERLAP_SECONDS = float(os.getenv("CACHE_INVALIDATION_POLL_OVERLAP_SECONDS", "5"))
+RETRY_DELAY_SECONDS = 5.0
+
+# Campos necessários aos handlers (consulta periódica busca apenas estes)
+POLL_PROJECTION = {"_id": 0, "id": 1, "email": 1, UPDATED_AT_FIELD: 1}
+
+# Handlers registrados: coleção -> funções que recebem o documento alterado
+# (ou None quando o documento não está disponível, ex: remoção).
+# Apenas coleções com handlers são observadas.
+_handlers: Dict[str, List[Callable[[Optional[dict]], None]]] = {}
+
+
+# ============================================================================
+# REGISTRO DE HANDLERS
+# ============================================================================
+
+def on_change(collection_name: str, handler: Callable[[Optional[dict]], None]) -> None:
+    """
+    Registra um handler chamado a cada alteração na coleção.
+
+    Exemplo:
+        >>> on_change("services", lambda doc: catalog_cache.clear())
+    """
+    _handlers.setdefault(collection_name, []).append(handler)
+
+
+def publish(collection_name: str, document: Optional[dict]) -> None:
+    """
+    Repassa uma alteração a todos os handlers da coleção.
+    """
+    for handler in _handlers.get(collection_name, []):
+        try:
+            handler(document)
+        except Exception:
+            logger.exception(f"Erro no handler de invalidação de '{collection_name}'")
+
+
+def touch() -> dict:
+    """
+    Retorna o $set de "updated_at" a incluir em toda escrita, para que o modo
+    de consulta periódica perceba a alteração.
+    """
+    now = datetime.utcnow()
+    # O MongoDB guarda datas com precisão de milissegundos: truncar aqui
+    # permite comparar o valor escrito com o lido de volta
+    return {UPDATED_AT_FIELD: now.replace(microsecond=now.microsecond // 1000 * 1000)}
+
+
+# ============================================================================
+# CHANGE STREAMS
+# ============================================================================
+
+async def _watch_change_streams(db, collections: List[str]) -> None:
+    """
+    Observa as coleções via change stream do banco de dados.
+
+    Raises:
+        OperationFailure: se o servidor não suportar change streams
+    """
+    pipeline = [{"$match": {"ns.coll": {"$in": collections}}}]
+    async with db.watch(pipeline, full_document="updateLookup") as stream:
+        logger.info("Cache invalidation: watching change streams")
+        async for change in stream:
+            publish(change["ns"]["coll"], change.get("fullDocument"))
+
+
+# ============================================================================
+# CONSULTA PERIÓDICA (FALLBACK)
+# ============================================================================
+
+async def _poll_updated_at(db, collections: List[str]) -> None:
+    """
+    Consulta periodicamente documentos com "updated_at" recente.
+    Usado quando change streams não estão disponíveis (mongod standalone).
+
+    Cada consulta cobre POLL_OVERLAP_SECONDS antes da última alteração vista;
+    alterações já publicadas na janela, identificadas por (id, updated_at),
+    não são repetidas.
+    """
+    logger.info(f"Cache invalidation: polling every {POLL_INTERVAL_SECONDS}s")
+
+    overlap = timedelta(seconds=POLL_OVERLAP_SECONDS)
+    start = datetime.utcnow()
+    last_seen = {name: start for name in collections}
+    # Coleção -> alterações publicadas que ainda estão dentro da janela
+    published: Dict[str, Set[Tuple[Optional[str], datetime]]] = {name: set() for name in collections}
+
+    while True:
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+        for name in collections:
+            changed = await db[name].find(
+                {UPDATED_AT_FIELD: {"$gt": last_seen[name] - overlap}},
+                POLL_PROJECTION
+            ).to_list(None)
+
+            in_window = set()
+            for document in changed:
+                key = (document.get("id"), document[UPDATED_AT_FIELD])
+                in_window.add(key)
+                if key in published[name]:
+                    continue
+                publish(name, document)
+                last_seen[name] = max(last_seen[name], document[UPDATED_AT_FIELD])
+            published[name] = in_window
+
+
+# ============================================================================
+# FUNÇÃO PRINCIPAL
+# ============================================================================
+
+async def watch_changes(db) -> None:
+    """
+    Tarefa de fundo que mantém os caches coerentes entre processos.
+    Usa change streams quando disponíveis e, caso contrário, a consulta
+    periódica por "updated_at". Reconecta automaticamente em caso de erro.
+    """
+    collections = list(_handlers)
+    if not collections:
+        return
+
+    use_change_streams = True
+
+    while True:
+        try:
+            if use_change_streams:
+                await _watch_change_streams(db, collections)
+            else:
+                await _poll_updated_at(db, collections)
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            if use_change_streams:
+                # Ex: "The $changeStream stage is only supported on replica sets"
+                logger.info(f"Change streams indisponíveis ({e}); usando consulta periódica")
+                use_change_streams = False
+                continue
+            logger.warning(f"Erro na invalidação de caches: {e}")
+            await asyncio.sleep(RETRY_DELAY_SECONDS)
+        except PyMongoError as e:
+            logger.warning(f"Erro na invalidação de caches: {e}")
+            await asyncio.sleep(RETRY_DELAY_SECONDS)
@@ -0,0 +1,297 @@
+# ============================================================================
+# METRICS.PY - Métricas de latência por rota e de comandos do MongoDB
+# ============================================================================
+# Este arquivo contém:
+# - Histogramas e contadores em memória (por processo/worker)
+# - MetricsMiddleware: mede cada request pela rota (template, ex:
+#   /api/services/{service_id}), com método e status
+# - MongoCommandListener: listener de comandos do pymongo que atribui a
+#   quantidade e a duração dos comandos ao request que os executou
+# - render_metrics(): exposição no formato texto do Prometheus
+#
+# A atribuição usa uma ContextVar: o Motor executa cada operação em uma
+# thread copiando o contexto do request, então o listener encontra os
+# contadores do request que disparou o comando.
+# ============================================================================
+
+import logging
+import time
+from bisect import bisect_left
+from collections import Counter as Tally
+from contextvars import ContextVar
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Limites dos buckets (segundos), os mesmos do cliente oficial do Prometheus
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Limites dos buckets de comandos do MongoDB por request
+COMMAND_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Rota usada para comandos fora de um request (ex: invalidação de caches)
+BACKGROUND_ROUTE = "background"
+# Rota usada para requests que não correspondem a nenhuma rota (404)
+UNMATCHED_ROUTE = "unmatched"
+
+
+# ============================================================================
+# HISTOGRAMAS E CONTADORES
+# ============================================================================
+
+class Histogram:
+    """
+    Histograma com buckets cumulativos, separado por labels.
+
+    Exemplo:
+        >>> h = Histogram("http_request_duration_seconds", "Latência", ("route",))
+        >>> h.observe(("/api/services",), 0.012)
+    """
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [contagem por bucket (não cumulativa; o último é +Inf), soma, total]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = Lock()
+
+    def observe(self, label_values: Tuple[str, ...], value: float) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, (list(counts), total, count))
+                      for labels, (counts, total, count) in sorted(self._series.items())]
+
+        for label_values, (counts, total, count) in series:
+            labels = _format_labels(self.labels, label_values)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+class Counter:
+    """
+    Contador monotônico separado por labels.
+    """
+
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = Lock()
+
+    def inc(self, label_values: Tuple[str, ...], amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{{{_format_labels(self.labels, label_values)}}} {value}")
+        return lines
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    """
+    Labels no formato do Prometheus: route="/api/x",method="GET"
+    """
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Duração dos requests por rota", ("method", "route")
+)
+REQUESTS_TOTAL = Counter(
+    "http_requests_total", "Requests por rota e status", ("method", "route", "status")
+)
+REQUEST_DB_COMMANDS = Histogram(
+    "http_request_db_commands", "Comandos do MongoDB por request",
+    ("method", "route"), buckets=COMMAND_COUNT_BUCKETS
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds", "Tempo gasto no MongoDB por request", ("method", "route")
+)
+DB_COMMANDS_TOTAL = Counter(
+    "mongodb_commands_total", "Comandos do MongoDB por rota e comando", ("route", "command", "outcome")
+)
+DB_COMMAND_SECONDS_TOTAL = Counter(
+    "mongodb_command_duration_seconds_total", "Tempo total dos comandos do MongoDB", ("route", "command")
+)
+
+METRICS = [
+    REQUEST_DURATION, REQUESTS_TOTAL, REQUEST_DB_COMMANDS, REQUEST_DB_DURATION,
+    DB_COMMANDS_TOTAL, DB_COMMAND_SECONDS_TOTAL,
+]
+
+
+# ============================================================================
+# CONTEXTO DO REQUEST
+# ============================================================================
+
+class RequestStats:
+    """
+    Comandos do MongoDB executados por um request.
+    """
+
+    def __init__(self, scope: dict):
+        self.scope = scope  # O roteamento adiciona a rota ao scope
+        self.method = scope.get("method", "")
+        self.status = 500
+        self.db_commands = 0
+        self.db_seconds = 0.0
+        # Formato dos filtros executados -> quantidade (ver query_monitor.py)
+        self.shapes: Tally = Tally()
+        self._lock = Lock()
+
+    def record_command(self, seconds: float) -> None:
+        with self._lock:
+            self.db_commands += 1
+            self.db_seconds += seconds
+
+    def record_shape(self, shape: str) -> None:
+        with self._lock:
+            self.shapes[shape] += 1
+
+    @property
+    def route(self) -> str:
+        return _route_template(self.scope)
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+# Funções chamadas ao fim de cada request com os seus RequestStats
+_finish_hooks: List[Callable[[RequestStats], None]] = []
+
+
+def on_request_finished(hook: Callable[[RequestStats], None]) -> None:
+    """
+    Registra uma função chamada ao fim de cada request.
+
+    Exemplo:
+        >>> on_request_finished(lambda stats: print(stats.route, stats.db_commands))
+    """
+    _finish_hooks.append(hook)
+
+
+def _route_template(scope: dict) -> str:
+    """
+    Template da rota que atendeu o request (evita uma série por ID).
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+# ============================================================================
+# MIDDLEWARE
+# ============================================================================
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede cada request HTTP até o fim do corpo da
+    resposta (inclui respostas em streaming).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                stats.status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_request.reset(token)
+            elapsed = time.perf_counter() - start
+            labels = (scope["method"], stats.route)
+            REQUEST_DURATION.observe(labels, elapsed)
+            REQUESTS_TOTAL.inc(labels + (str(stats.status),))
+            REQUEST_DB_COMMANDS.observe(labels, stats.db_commands)
+            REQUEST_DB_DURATION.observe(labels, stats.db_seconds)
+
+            for hook in _finish_hooks:
+                try:
+                    hook(stats)
+                except Exception:
+                    logger.exception("Erro em hook de fim de request")
+
+
+# ============================================================================
+# LISTENER DE COMANDOS DO MONGODB
+# ============================================================================
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    Atribui cada comando do MongoDB ao request atual (ver current_request).
+    Registrado no cliente via event_listeners (database.create_client).
+    """
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._record(event, "success")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event, "failure")
+
+    def _record(self, event, outcome: str) -> None:
+        seconds = event.duration_micros / 1_000_000
+        stats = current_request.get()
+        route = BACKGROUND_ROUTE
+        if stats is not None:
+            stats.record_command(seconds)
+            route = stats.route
+
+        DB_COMMANDS_TOTAL.inc((route, event.command_name, outcome))
+        DB_COMMAND_SECONDS_TOTAL.inc((route, event.command_name), seconds)
+
+
+command_listener = MongoCommandListener()
+
+
+# ============================================================================
+# EXPOSIÇÃO
+# ============================================================================
+
+def render_metrics() -> str:
+    """
+    Todas as métricas deste processo no formato texto do Prometheus.
+    """
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
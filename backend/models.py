@@ -6,7 +6,7 @@
 # ============================================================================
 
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Dict, Literal, Optional, List
 from datetime import datetime
 import uuid
 
@@ -108,6 +108,12 @@ class Service(ServiceBase):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     organizer_id: str  # ID do organizador que criou o serviço
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Avaliações agregadas, mantidas a cada avaliação de agendamento
+    rating_sum: int = 0
+    rating_count: int = 0
+    rating_average: Optional[float] = None
+    # URLs da foto enviada por upload: {"original": ..., "card": ..., "thumb": ...}
+    photo_variants: Optional[Dict[str, str]] = None
 
     class Config:
         json_schema_extra = {
@@ -122,10 +128,33 @@ class Service(ServiceBase):
         }
 
 
+class FacetCount(BaseModel):
+    """
+    Quantidade de resultados para um valor de faceta (ex: um tipo).
+    """
+    value: str
+    count: int
+
+
+class ServiceSearchResult(BaseModel):
+    """
+    Resultado paginado da busca de serviços, com facetas por tipo.
+    """
+    items: List[Service] = []
+    total: int = 0
+    page: int = 1
+    limit: int
+    facets: Dict[str, List[FacetCount]] = {}  # {"type": [FacetCount, ...]}
+
+
 # ============================================================================
 # MODELOS DE AGENDAMENTO
 # ============================================================================
 
+# Status aceitos nas alterações (também usados como chaves dos contadores)
+BookingStatus = Literal["pending", "confirmed", "completed", "cancelled", "no_show"]
+
+
 class BookingBase(BaseModel):
     """
     Modelo base do agendamento.
@@ -171,11 +200,75 @@ class BookingUpdate(BaseModel):
     Modelo para atualização de agendamento.
     Todos os campos são opcionais.
     """
-    status: Optional[str] = None
-    rating: Optional[int] = None
+    status: Optional[BookingStatus] = None
+    rating: Optional[int] = Field(None, ge=1, le=5)  # Avaliação de 1 a 5
     notes: Optional[str] = None
 
 
+class OrganizerStats(BaseModel):
+    """
+    Estatísticas do painel de agendamentos do organizador.
+    """
+    total: int = 0
+    pending: int = 0
+    confirmed: int = 0
+    completed: int = 0
+    cancelled: int = 0
+    today: int = 0  # Agendamentos (não cancelados) para hoje
+
+
+class HistoryTotals(BaseModel):
+    """
+    Totais do histórico de agendamentos (geral ou de um mês).
+    """
+    total: int = 0
+    completed: int = 0
+    cancelled: int = 0
+    no_show: int = 0
+    rating_count: int = 0
+    average_rating: Optional[float] = None
+
+
+class HistoryMonth(HistoryTotals):
+    """
+    Totais do histórico em um mês (formato: YYYY-MM).
+    """
+    month: str
+
+
+class BookingHistory(BaseModel):
+    """
+    Histórico de agendamentos do usuário agrupado por mês.
+    """
+    summary: HistoryTotals
+    months: List[HistoryMonth] = []
+
+
+class BulkStatusUpdate(BaseModel):
+    """
+    Alteração de status de vários agendamentos de uma vez (organizador).
+    """
+    ids: List[str] = Field(..., min_length=1, max_length=500)
+    status: BookingStatus
+
+
+class BulkStatusItem(BaseModel):
+    """
+    Resultado da alteração de um agendamento.
+    result: updated, unchanged, not_found, forbidden, conflict ou changed
+    """
+    id: str
+    result: str
+
+
+class BulkStatusResult(BaseModel):
+    """
+    Resultado da alteração de status em lote.
+    """
+    updated: int = 0
+    results: List[BulkStatusItem] = []
+
+
 # ============================================================================
 # MODELO DE TOKEN JWT
 # ============================================================================
@@ -189,6 +282,16 @@ class Token(BaseModel):
     user: UserResponse  # Informações do usuário
 
 
+class TokenData(BaseModel):
+    """
+    Identidade do usuário extraída das claims do token JWT.
+    Suficiente para autorizar rotas sem consultar o banco.
+    """
+    id: str
+    email: str
+    role: str
+
+
 # ============================================================================
 # MODELOS DE RESPOSTA COM POPULAÇÃO DE DADOS
 # ============================================================================
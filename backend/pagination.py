@@ -0,0 +1,147 @@
+# ============================================================================
+# PAGINATION.PY - Paginação por cursor (keyset) e respostas em streaming
+# ============================================================================
+# Este arquivo contém funções para:
+# - Paginar consultas pelo _id do MongoDB (?after=<cursor>&limit=)
+# - Percorrer um cursor do Motor em lotes, sem carregar tudo na memória
+# - Gerar respostas NDJSON (um documento JSON por linha)
+# ============================================================================
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+DEFAULT_PAGE_SIZE = 100  # Sem ?limit=; listagens completas seguem o cursor
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 200  # Documentos por lote no modo streaming
+
+# Header com o cursor da próxima página (ausente na última página)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+# ============================================================================
+# FUNÇÕES DE CURSOR
+# ============================================================================
+
+def keyset_query(query: dict, after: Optional[str]) -> dict:
+    """
+    Adiciona a condição de keyset (_id > after) à consulta.
+
+    Args:
+        query: Filtro original
+        after: Cursor recebido do cliente (opcional)
+
+    Returns:
+        Novo filtro com a condição do cursor
+    """
+    if not after:
+        return query
+
+    try:
+        after_id = ObjectId(after)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+
+    return {**query, "_id": {"$gt": after_id}}
+
+
+def keyset_projection(projection: Optional[dict]) -> Optional[dict]:
+    """
+    Garante o _id na projeção (usado como cursor).
+    """
+    return {**projection, "_id": 1} if projection is not None else None
+
+
+async def fetch_page(
+    collection,
+    query: dict,
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    projection: Optional[dict] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Busca uma página de documentos ordenada por _id.
+
+    Args:
+        collection: Coleção do Motor
+        query: Filtro da consulta
+        after: Cursor da página anterior (opcional)
+        limit: Tamanho máximo da página
+        projection: Campos a buscar (opcional; o _id é sempre incluído)
+
+    Returns:
+        Tupla (documentos, cursor da próxima página ou None)
+    """
+    cursor = collection.find(
+        keyset_query(query, after), keyset_projection(projection)
+    ).sort("_id", 1).limit(limit + 1)
+    documents = await cursor.to_list(limit + 1)
+
+    # Um documento extra indica que existe próxima página
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = str(documents[-1]["_id"])
+
+    return documents, next_cursor
+
+
+async def iter_batches(
+    collection,
+    query: dict,
+    after: Optional[str] = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+    projection: Optional[dict] = None
+) -> AsyncIterator[List[dict]]:
+    """
+    Percorre todos os documentos da consulta em lotes.
+    Apenas um lote fica em memória por vez.
+    """
+    cursor = collection.find(
+        keyset_query(query, after), keyset_projection(projection)
+    ).sort("_id", 1).batch_size(batch_size)
+
+    batch = []
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+# ============================================================================
+# RESPOSTA NDJSON
+# ============================================================================
+
+def ndjson_response(
+    batches: AsyncIterator[List[dict]],
+    serialize: Callable[[List[dict]], Awaitable[list]],
+    include: Optional[dict] = None
+) -> StreamingResponse:
+    """
+    Cria uma resposta NDJSON que envia os documentos à medida que
+    o cursor do MongoDB os produz.
+
+    Args:
+        batches: Lotes de documentos (ver iter_batches)
+        serialize: Função assíncrona que converte um lote em modelos pydantic
+        include: Campos a enviar de cada item (opcional, ver projections.py)
+
+    Returns:
+        StreamingResponse com media type application/x-ndjson
+    """
+    async def generate():
+        async for batch in batches:
+            for item in await serialize(batch):
+                yield item.model_dump_json(include=include) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
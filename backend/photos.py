@@ -0,0 +1,308 @@
+# ============================================================================
+# PHOTOS.PY - Upload e armazenamento das fotos dos serviços
+# ============================================================================
+# Este arquivo contém funções para:
+# - Receber o upload em streaming, gravando em disco em blocos (sem manter
+#   o arquivo inteiro em memória) e calculando o hash do conteúdo; o acesso
+#   ao disco roda em threads (anyio), fora do event loop
+# - Armazenar cada foto pelo hash SHA-256 (uploads repetidos são deduplicados)
+# - Gerar miniaturas nos tamanhos usados pelos cards, em um pool de
+#   processos (fora do event loop), recusando imagens com mais de
+#   MAX_PHOTO_PIXELS pixels (arquivos pequenos que ocupariam centenas de
+#   MB ao serem decodificados)
+#
+# Estrutura em disco (MEDIA_DIR):
+#   photos/<hash>.<ext>         # original
+#   photos/<hash>-card.jpg      # card do catálogo (w-full h-48)
+#   photos/<hash>-thumb.jpg     # miniaturas das listas de agendamentos
+#   tmp/                        # uploads em andamento
+#
+# O Pillow é opcional: sem ele, as fotos são aceitas e servidas no tamanho
+# original.
+# ============================================================================
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+import anyio
+from fastapi import HTTPException
+
+try:
+    from PIL import Image  # noqa: F401
+    THUMBNAILS_ENABLED = True
+except ImportError:
+    THUMBNAILS_ENABLED = False
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+MEDIA_DIR = Path(os.getenv("MEDIA_DIR", str(Path(__file__).parent / "media")))
+PHOTOS_DIR = MEDIA_DIR / "photos"
+UPLOAD_TMP_DIR = MEDIA_DIR / "tmp"
+
+# URL pública das fotos (servidas por GET /api/media/photos/{nome}), relativa
+# ao backend: o frontend completa com REACT_APP_BACKEND_URL (mediaUrl)
+PHOTOS_URL = "/api/media/photos"
+
+MAX_PHOTO_BYTES = int(os.getenv("MAX_PHOTO_BYTES", str(5 * 1024 * 1024)))  # 5MB
+UPLOAD_CHUNK_BYTES = 64 * 1024
+# Largura x altura máxima aceita (24MP, uma foto de câmera comum)
+MAX_PHOTO_PIXELS = int(os.getenv("MAX_PHOTO_PIXELS", str(24_000_000)))
+
+PHOTO_WORKERS = int(os.getenv("PHOTO_WORKERS", "2"))
+
+# Miniaturas (largura x altura, recortadas como object-cover), em 2x para
+# telas de alta densidade:
+# - card: imagem dos cards de serviço (w-full h-48)
+# - thumb: miniaturas das listas de agendamentos (w-16 h-16 / w-12 h-12)
+THUMBNAIL_SIZES: Dict[str, Tuple[int, int]] = {
+    "card": (800, 384),
+    "thumb": (128, 128),
+}
+THUMBNAIL_QUALITY = 85
+
+# Formatos aceitos, identificados pelos primeiros bytes do arquivo
+# (o Content-Type enviado pelo cliente não é confiável)
+SIGNATURES = [
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+]
+
+# Nomes válidos em PHOTOS_DIR (evita acesso a outros arquivos)
+PHOTO_NAME_PATTERN = re.compile(r"^[0-9a-f]{64}(-card|-thumb)?\.(jpg|png|webp)$")
+
+# Cache de longa duração: o nome muda sempre que o conteúdo muda
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_photo_pool: Optional[ProcessPoolExecutor] = None
+
+
+class PhotoTooLarge(ValueError):
+    """
+    Imagem com mais pixels que MAX_PHOTO_PIXELS.
+    """
+
+
+# ============================================================================
+# FUNÇÕES AUXILIARES
+# ============================================================================
+
+def _detect_extension(head: bytes) -> Optional[str]:
+    """
+    Identifica o formato da imagem pelos primeiros bytes.
+    """
+    for signature, extension in SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _get_photo_pool() -> ProcessPoolExecutor:
+    """
+    Pool de processos das miniaturas (criado no primeiro uso).
+    Os processos são iniciados com spawn: um fork copiaria o processo do
+    servidor com as threads em andamento (monitores do pymongo, pool do
+    bcrypt) e os locks que elas seguram.
+    """
+    global _photo_pool
+    if _photo_pool is None:
+        _photo_pool = ProcessPoolExecutor(
+            max_workers=PHOTO_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _photo_pool
+
+
+def shutdown_photo_pool() -> None:
+    """
+    Encerra o pool de processos (chamado ao desligar o servidor).
+    """
+    global _photo_pool
+    if _photo_pool is not None:
+        _photo_pool.shutdown(wait=False, cancel_futures=True)
+        _photo_pool = None
+
+
+def photo_path(name: str) -> Path:
+    """
+    Caminho em disco de uma foto pelo nome público.
+
+    Raises:
+        HTTPException 404: se o nome não for de uma foto armazenada
+    """
+    path = PHOTOS_DIR / name
+    if not PHOTO_NAME_PATTERN.match(name) or not path.is_file():
+        raise HTTPException(status_code=404, detail="Foto não encontrada")
+    return path
+
+
+# ============================================================================
+# UPLOAD EM STREAMING
+# ============================================================================
+
+def _ensure_dirs() -> None:
+    UPLOAD_TMP_DIR.mkdir(parents=True, exist_ok=True)
+    PHOTOS_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def _move_into_place(tmp_path: Path, final_path: Path) -> None:
+    """
+    Move o upload para o nome definitivo ou o descarta se a foto já existir.
+    """
+    if final_path.exists():
+        tmp_path.unlink()  # Mesma foto já armazenada
+    else:
+        os.replace(tmp_path, final_path)
+
+
+async def store_upload(chunks: AsyncIterator[bytes]) -> Tuple[str, str]:
+    """
+    Grava o upload em disco bloco a bloco, calculando o SHA-256.
+    O arquivo vai para um temporário e só então é movido para o nome
+    definitivo (ou descartado, se a mesma foto já existir).
+
+    Args:
+        chunks: Corpo da requisição (ex: request.stream())
+
+    Returns:
+        Tupla (hash, extensão)
+
+    Raises:
+        HTTPException 413: se o arquivo passar de MAX_PHOTO_BYTES
+        HTTPException 415: se não for uma imagem JPEG, PNG ou WebP
+        HTTPException 400: se o corpo estiver vazio
+    """
+    await anyio.to_thread.run_sync(_ensure_dirs)
+
+    tmp_path = UPLOAD_TMP_DIR / f"{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as tmp_file:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > MAX_PHOTO_BYTES:
+                    raise HTTPException(status_code=413, detail="Foto maior que o tamanho máximo permitido")
+                if len(head) < 16:
+                    head += chunk[:16]
+                digest.update(chunk)
+                await tmp_file.write(chunk)
+
+        if not size:
+            raise HTTPException(status_code=400, detail="Nenhum arquivo enviado")
+
+        extension = _detect_extension(head)
+        if extension is None:
+            raise HTTPException(status_code=415, detail="Formato de imagem não suportado (use JPG, PNG ou WebP)")
+
+        content_hash = digest.hexdigest()
+        final_path = PHOTOS_DIR / f"{content_hash}.{extension}"
+        await anyio.to_thread.run_sync(_move_into_place, tmp_path, final_path)
+
+        return content_hash, extension
+    finally:
+        # Upload rejeitado ou interrompido (protegido de cancelamento)
+        with anyio.CancelScope(shield=True):
+            await anyio.to_thread.run_sync(lambda: tmp_path.unlink(missing_ok=True))
+
+
+# ============================================================================
+# MINIATURAS
+# ============================================================================
+
+def _make_thumbnails(
+    source: str,
+    content_hash: str,
+    photos_dir: Path,
+    tmp_dir: Path,
+    max_pixels: int
+) -> None:
+    """
+    Gera as miniaturas de uma foto (executada em um processo do pool;
+    diretórios e limite vêm como argumentos, já que o processo é novo).
+
+    Raises:
+        PhotoTooLarge: se a imagem tiver mais de max_pixels pixels
+            (verificado pelo cabeçalho, antes de decodificar)
+    """
+    from PIL import Image, ImageOps
+
+    try:
+        opened = Image.open(source)
+    except Image.DecompressionBombError as e:  # Muito acima do limite do Pillow
+        raise PhotoTooLarge(str(e))
+
+    with opened as image:
+        width, height = image.size
+        if width * height > max_pixels:
+            raise PhotoTooLarge(f"{width}x{height} pixels")
+
+        # Decodifica já reduzida (JPEG) e reduz as demais antes de processar,
+        # mantendo o menor lado acima da maior miniatura
+        largest = max(max(size) for size in THUMBNAIL_SIZES.values())
+        image.draft("RGB", (largest, largest))
+        factor = min(image.size) // largest
+        if factor > 1:
+            image = image.reduce(factor)
+
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for size_name, size in THUMBNAIL_SIZES.items():
+            target = photos_dir / f"{content_hash}-{size_name}.jpg"
+            tmp_target = tmp_dir / f"{uuid.uuid4().hex}.jpg"
+            thumbnail = ImageOps.fit(image, size, Image.LANCZOS)
+            thumbnail.save(tmp_target, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+            os.replace(tmp_target, target)
+
+
+async def create_variants(content_hash: str, extension: str) -> Dict[str, str]:
+    """
+    Garante as miniaturas da foto e retorna as URLs de cada tamanho.
+    Miniaturas já existentes (foto repetida) não são geradas de novo.
+
+    Returns:
+        {"original": url, "card": url, "thumb": url}; sem o Pillow (ou se a
+        imagem não puder ser lida), todos os tamanhos apontam para o original
+
+    Raises:
+        HTTPException 413: se a imagem tiver mais de MAX_PHOTO_PIXELS pixels
+            (a foto armazenada é apagada)
+    """
+    original = f"{content_hash}.{extension}"
+    variants = {"original": f"{PHOTOS_URL}/{original}"}
+
+    thumbnail_names = {size: f"{content_hash}-{size}.jpg" for size in THUMBNAIL_SIZES}
+    ready = THUMBNAILS_ENABLED and all((PHOTOS_DIR / n).exists() for n in thumbnail_names.values())
+
+    if THUMBNAILS_ENABLED and not ready:
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(
+                _get_photo_pool(), _make_thumbnails,
+                str(PHOTOS_DIR / original), content_hash, PHOTOS_DIR, UPLOAD_TMP_DIR, MAX_PHOTO_PIXELS
+            )
+            ready = True
+        except PhotoTooLarge as e:
+            await anyio.to_thread.run_sync(lambda: (PHOTOS_DIR / original).unlink(missing_ok=True))
+            raise HTTPException(status_code=413, detail=f"Foto com resolução acima do máximo permitido ({e})")
+        except Exception as e:
+            logger.warning(f"Não foi possível gerar as miniaturas de {original}: {e}")
+
+    for size, name in thumbnail_names.items():
+        variants[size] = f"{PHOTOS_URL}/{name}" if ready else variants["original"]
+
+    return variants
@@ -0,0 +1,132 @@
+# ============================================================================
+# PROJECTIONS.PY - Projeções do MongoDB e seleção de campos (?fields=)
+# ============================================================================
+# Este arquivo contém funções para:
+# - Montar projeções com apenas os campos dos modelos (sem _id, senha, etc.)
+# - Interpretar o parâmetro ?fields= das listagens
+#   (ex: "id,date,service.name")
+# - Derivar dessa seleção a projeção de cada coleção consultada, para que
+#   apenas os campos pedidos saiam do banco e cheguem ao cliente
+# ============================================================================
+
+import typing
+from typing import Dict, Iterable, Optional, Type, Union
+from fastapi import HTTPException
+from pydantic import BaseModel
+from models import Booking, Service, User, UserResponse
+
+# Seleção de campos no formato aceito pelo pydantic (include):
+#   {"id": True, "date": True, "service": {"name": True}}
+FieldSelection = Dict[str, Union[bool, dict]]
+
+# Campos sempre retornados nas listagens (identificam cada item)
+ALWAYS_INCLUDED = ("id",)
+
+
+# ============================================================================
+# PROJEÇÕES
+# ============================================================================
+
+def projection(model: Type[BaseModel], fields: Optional[Iterable[str]] = None) -> dict:
+    """
+    Projeção do MongoDB com os campos do modelo.
+
+    Args:
+        model: Modelo cujos campos são buscados
+        fields: Subconjunto dos campos (None = todos os campos do modelo);
+            nomes que não são campos do modelo são ignorados
+
+    Returns:
+        Projeção sem o _id (ex: {"_id": 0, "id": 1, "name": 1})
+
+    Exemplo:
+        >>> projection(Service, ["id", "name"])
+        {'_id': 0, 'id': 1, 'name': 1}
+    """
+    names = model.model_fields if fields is None else [f for f in fields if f in model.model_fields]
+    return {"_id": 0, **{name: 1 for name in names}}
+
+
+# Projeções completas de cada coleção (campos extras como _id, updated_at e
+# os campos de busca/controle não são lidos)
+USER_PROJECTION = projection(User)  # Inclui hashed_password: apenas para o login
+USER_PUBLIC_PROJECTION = projection(UserResponse)  # Demais leituras de usuários
+SERVICE_PROJECTION = projection(Service)
+BOOKING_PROJECTION = projection(Booking)
+
+
+# ============================================================================
+# SELEÇÃO DE CAMPOS (?fields=)
+# ============================================================================
+
+def _related_model(model: Type[BaseModel], name: str) -> Optional[Type[BaseModel]]:
+    """
+    Modelo aninhado de um campo (ex: BookingWithDetails.service -> Service).
+    """
+    annotation = model.model_fields[name].annotation
+    for candidate in (annotation, *typing.get_args(annotation)):
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+def parse_fields(model: Type[BaseModel], fields: Optional[str]) -> Optional[FieldSelection]:
+    """
+    Interpreta o parâmetro ?fields= de uma listagem.
+
+    Args:
+        model: Modelo de resposta da listagem
+        fields: Nomes separados por vírgula; campos de relações usam ponto
+            ("service.name"). O nome da relação sozinho ("service") inclui
+            todos os seus campos.
+
+    Returns:
+        Seleção de campos (sempre com "id"), ou None se fields não foi informado
+
+    Raises:
+        HTTPException 400: se algum campo não existir no modelo
+
+    Exemplo:
+        >>> parse_fields(BookingWithDetails, "date,service.name")
+        {'id': True, 'date': True, 'service': {'name': True}}
+    """
+    if not fields:
+        return None
+
+    selection: FieldSelection = {name: True for name in ALWAYS_INCLUDED}
+    for path in (p.strip() for p in fields.split(",")):
+        if not path:
+            continue
+
+        name, _, child = path.partition(".")
+        if name not in model.model_fields:
+            raise HTTPException(status_code=400, detail=f"Campo inválido: {path}")
+
+        if not child:
+            selection[name] = True
+            continue
+
+        related = _related_model(model, name)
+        if related is None or child not in related.model_fields:
+            raise HTTPException(status_code=400, detail=f"Campo inválido: {path}")
+
+        nested = selection.get(name)
+        if nested is not True:  # A relação inteira já foi pedida
+            selection[name] = {**(nested or {}), child: True}
+
+    return selection
+
+
+def selected(selection: Optional[FieldSelection], name: str) -> bool:
+    """
+    Indica se o campo (ou relação) foi pedido. Sem seleção, tudo é pedido.
+    """
+    return selection is None or name in selection
+
+
+def nested_fields(selection: Optional[FieldSelection], name: str) -> Optional[list]:
+    """
+    Campos pedidos de uma relação (None = todos os campos).
+    """
+    nested = selection.get(name) if selection is not None else None
+    return list(nested) if isinstance(nested, dict) else None
@@ -0,0 +1,248 @@
+# ============================================================================
+# QUERY_MONITOR.PY - Detecção de N+1 e log de consultas lentas no MongoDB
+# ============================================================================
+# Este arquivo contém:
+# - O "formato" de cada comando (coleção + filtro sem os valores), ex:
+#   find bookings {"user_id": "?", "date": {"$gte": "?"}}
+# - Um listener de comandos que registra o formato no request atual e
+#   loga comandos mais lentos que SLOW_QUERY_MS
+# - Um aviso ao fim do request quando ele executa mais de
+#   QUERY_COUNT_WARN_THRESHOLD comandos (típico de N+1), com os formatos
+#   mais repetidos
+# - QueryCounter, usado pelos testes (fixture "query_counter" em
+#   tests/conftest.py) para falhar quando o número de comandos de uma rota
+#   cresce com o tamanho do resultado:
+#
+#   def test_my_bookings_sem_n_mais_1(client, query_counter, criar_agendamentos):
+#       query_counter.assert_constant(
+#           lambda: client.get("/api/bookings/my-bookings", headers=auth),
+#           setup=criar_agendamentos,  # Recebe o tamanho n (não é contado)
+#           sizes=(1, 10, 50)
+#       )
+# ============================================================================
+
+import json
+import logging
+import os
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from pymongo import monitoring
+from metrics import RequestStats, current_request, on_request_finished
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Comandos por request acima dos quais um aviso é registrado
+QUERY_COUNT_WARN_THRESHOLD = int(os.getenv("QUERY_COUNT_WARN_THRESHOLD", "25"))
+# Duração (ms) a partir da qual um comando é considerado lento
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Quantidade de formatos mais repetidos incluídos no aviso
+TOP_SHAPES = 5
+
+# Onde fica o filtro em cada comando (nome do comando -> função)
+FILTER_LOCATIONS: Dict[str, Callable[[dict], Any]] = {
+    "find": lambda c: c.get("filter"),
+    "count": lambda c: c.get("query"),
+    "distinct": lambda c: c.get("query"),
+    "findAndModify": lambda c: c.get("query"),
+    "update": lambda c: (c.get("updates") or [{}])[0].get("q"),
+    "delete": lambda c: (c.get("deletes") or [{}])[0].get("q"),
+    "aggregate": lambda c: next(
+        (stage["$match"] for stage in c.get("pipeline", []) if "$match" in stage), None
+    ),
+}
+
+
+# ============================================================================
+# FORMATO DOS COMANDOS
+# ============================================================================
+
+def _mask(value: Any) -> Any:
+    """
+    Substitui os valores do filtro por "?", mantendo campos e operadores.
+    """
+    if isinstance(value, dict):
+        return {key: _mask(item) for key, item in value.items()}
+    if isinstance(value, list) and any(isinstance(item, dict) for item in value):
+        return [_mask(item) for item in value]  # Ex: $or, $and
+    return "?"
+
+
+def query_shape(command_name: str, command: dict) -> str:
+    """
+    Descreve o comando sem os valores, para agrupar consultas repetidas.
+
+    Exemplo:
+        >>> query_shape("find", {"find": "services", "filter": {"id": "abc"}})
+        'find services {"id": "?"}'
+    """
+    collection = command.get(command_name)
+    shape = f"{command_name} {collection}" if isinstance(collection, str) else command_name
+
+    locate = FILTER_LOCATIONS.get(command_name)
+    if locate is not None:
+        query = locate(command)
+        if query is not None:
+            shape += " " + json.dumps(_mask(query), sort_keys=True, default=str)
+    return shape
+
+
+# ============================================================================
+# LISTENER DE COMANDOS
+# ============================================================================
+
+class QueryMonitorListener(monitoring.CommandListener):
+    """
+    Registra o formato de cada comando no request atual, loga comandos
+    lentos e alimenta os contadores ativos da fixture query_counter.
+    Registrado no cliente via event_listeners (database.create_client).
+    """
+
+    def __init__(self):
+        # (connection_id, request_id) -> (formato, RequestStats do request)
+        self._pending: Dict[Tuple[Any, int], Tuple[str, Optional[RequestStats]]] = {}
+        self._lock = Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        shape = query_shape(event.command_name, event.command)
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (shape, current_request.get())
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event)
+
+    def _finish(self, event) -> None:
+        with self._lock:
+            shape, stats = self._pending.pop(
+                (event.connection_id, event.request_id), (event.command_name, None)
+            )
+
+        if stats is not None:
+            stats.record_shape(shape)
+        _count_active(shape)
+
+        duration_ms = event.duration_micros / 1000
+        if duration_ms >= SLOW_QUERY_MS:
+            logger.warning("Consulta lenta no MongoDB: " + json.dumps({
+                "route": stats.route if stats is not None else None,
+                "duration_ms": round(duration_ms, 1),
+                "shape": shape,
+            }))
+
+
+query_monitor_listener = QueryMonitorListener()
+
+
+# ============================================================================
+# AVISO DE N+1 AO FIM DO REQUEST
+# ============================================================================
+
+def check_request(stats: RequestStats) -> None:
+    """
+    Registra um aviso estruturado quando o request executou comandos demais.
+    """
+    if stats.db_commands <= QUERY_COUNT_WARN_THRESHOLD:
+        return
+
+    logger.warning("Muitos comandos do MongoDB em um request (possível N+1): " + json.dumps({
+        "route": stats.route,
+        "method": stats.method,
+        "status": stats.status,
+        "db_commands": stats.db_commands,
+        "db_ms": round(stats.db_seconds * 1000, 1),
+        "threshold": QUERY_COUNT_WARN_THRESHOLD,
+        "top_shapes": [{"shape": s, "count": n} for s, n in stats.shapes.most_common(TOP_SHAPES)],
+    }))
+
+
+on_request_finished(check_request)
+
+
+# ============================================================================
+# CONTADOR PARA TESTES
+# ============================================================================
+
+_active_counters: List["QueryCounter"] = []
+_active_lock = Lock()
+
+
+def _count_active(shape: str) -> None:
+    with _active_lock:
+        for counter in _active_counters:
+            counter.shapes.append(shape)
+
+
+class QueryCounter:
+    """
+    Conta os comandos do MongoDB executados (por qualquer request ou tarefa)
+    enquanto está ativo. Usado pela fixture query_counter (tests/conftest.py).
+
+    Exemplo:
+        >>> with QueryCounter() as counter:
+        ...     client.get("/api/bookings/my-bookings")
+        >>> counter.count
+        2
+    """
+
+    def __init__(self):
+        self.shapes: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.shapes)
+
+    def __enter__(self) -> "QueryCounter":
+        self.shapes = []
+        with _active_lock:
+            _active_counters.append(self)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        with _active_lock:
+            _active_counters.remove(self)
+
+    def measure(self, action: Callable[[], Any]) -> int:
+        """
+        Executa a ação e retorna quantos comandos ela executou.
+        """
+        with self:
+            action()
+        return self.count
+
+    def assert_constant(
+        self,
+        call: Callable[[], Any],
+        setup: Callable[[int], Any],
+        sizes: Iterable[int] = (1, 10, 50)
+    ) -> Dict[int, int]:
+        """
+        Falha se o número de comandos crescer com o tamanho do resultado.
+
+        Args:
+            call: Função que chama a rota (apenas os comandos dela contam)
+            setup: Função que prepara os dados para o tamanho n (não contada)
+            sizes: Tamanhos a comparar
+
+        Returns:
+            Comandos por tamanho, ex: {1: 2, 10: 2, 50: 2}
+
+        Raises:
+            AssertionError: se algum tamanho executar mais comandos que o menor
+        """
+        counts = {}
+        for size in sizes:
+            setup(size)
+            counts[size] = self.measure(call)
+        smallest = counts[min(counts)]
+        if any(count > smallest for count in counts.values()):
+            raise AssertionError(
+                f"O número de comandos do MongoDB cresce com o resultado (N+1): {counts}. "
+                f"Formatos no maior tamanho: {self.shapes}"
+            )
+        return counts
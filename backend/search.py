@@ -0,0 +1,232 @@
+# ============================================================================
+# SEARCH.PY - Busca textual e por filtros no catálogo de serviços
+# ============================================================================
+# Este arquivo contém funções para:
+# - Buscar serviços por texto (nome, descrição, local) via índice de texto
+# - Filtrar por tipo, dia da semana e local, sem diferenciar acentos
+#   ("saude" encontra "Saúde")
+# - Retornar, na mesma consulta, a contagem de serviços por tipo (facetas)
+# - Filtrar os agendamentos do organizador (status, serviço, datas e nome
+#   do usuário) diretamente no MongoDB
+# ============================================================================
+
+import re
+import unicodedata
+from typing import Dict, List, Optional
+from pymongo import UpdateOne
+from availability import WEEKDAYS, parse_date
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+
+# ============================================================================
+# FILTROS SEM ACENTOS
+# ============================================================================
+# Índices de texto não aceitam collation; por isso os filtros exatos são
+# resolvidos para os valores gravados que coincidem sem acentos/maiúsculas
+# e aplicados com $in (usando os índices normais).
+
+def fold(value: str) -> str:
+    """
+    Remove acentos e diferenças de maiúsculas ("Saúde" -> "saude").
+    """
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+def match_values(value: str, candidates: List[str]) -> List[str]:
+    """
+    Retorna os candidatos equivalentes ao valor, ignorando acentos.
+    """
+    folded = fold(value)
+    return [c for c in candidates if isinstance(c, str) and fold(c) == folded]
+
+
+# ============================================================================
+# FUNÇÕES
+# ============================================================================
+
+def build_search_pipeline(
+    q: Optional[str] = None,
+    type: Optional[List[str]] = None,
+    day: Optional[List[str]] = None,
+    location: Optional[List[str]] = None,
+    page: int = 1,
+    limit: int = DEFAULT_SEARCH_LIMIT
+) -> list:
+    """
+    Monta a agregação da busca de serviços.
+
+    Os filtros type/day/location recebem os valores exatos aceitos
+    (ver match_values). O filtro por tipo não é aplicado às facetas, para
+    que o cliente veja quantos resultados cada tipo teria com os demais filtros.
+    """
+    match = {"active": True}
+    if q:
+        # O índice de texto em português já ignora acentos e aplica stemming
+        match["$text"] = {"$search": q}
+    if day is not None:
+        match["availability_days"] = {"$in": day}
+    if location is not None:
+        match["location"] = {"$in": location}
+
+    type_match = [{"$match": {"type": {"$in": type}}}] if type is not None else []
+
+    if q:
+        ranking = [
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+            {"$sort": {"score": -1, "_id": 1}},
+        ]
+    else:
+        ranking = [{"$sort": {"_id": 1}}]
+
+    return [
+        {"$match": match},
+        {"$facet": {
+            "items": type_match + ranking + [
+                {"$skip": (page - 1) * limit},
+                {"$limit": limit},
+                {"$project": {"_id": 0, "score": 0}},
+            ],
+            "total": type_match + [{"$count": "count"}],
+            "types": [
+                {"$group": {"_id": "$type", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+            ],
+        }},
+    ]
+
+
+async def search_services(
+    db,
+    q: Optional[str] = None,
+    type: Optional[str] = None,
+    day: Optional[str] = None,
+    location: Optional[str] = None,
+    page: int = 1,
+    limit: int = DEFAULT_SEARCH_LIMIT
+) -> dict:
+    """
+    Executa a busca de serviços em uma única agregação.
+
+    Returns:
+        {"items": [...], "total": n, "page": p, "limit": l,
+         "facets": {"type": [{"value": "Saúde", "count": 3}, ...]}}
+    """
+    # Resolve os filtros exatos para os valores gravados (sem acentos)
+    types = match_values(type, await db.services.distinct("type", {"active": True})) if type else None
+    days = match_values(day, WEEKDAYS) if day else None
+    locations = (
+        match_values(location, await db.services.distinct("location", {"active": True}))
+        if location else None
+    )
+
+    pipeline = build_search_pipeline(
+        q=q, type=types, day=days, location=locations, page=page, limit=limit
+    )
+    result = await db.services.aggregate(pipeline).to_list(1)
+    facets = result[0] if result else {"items": [], "total": [], "types": []}
+
+    return {
+        "items": facets["items"],
+        "total": facets["total"][0]["count"] if facets["total"] else 0,
+        "page": page,
+        "limit": limit,
+        "facets": {"type": [{"value": t["_id"], "count": t["count"]} for t in facets["types"]]},
+    }
+
+
+# ============================================================================
+# BUSCA DE AGENDAMENTOS DO ORGANIZADOR
+# ============================================================================
+# Cada agendamento guarda o nome do usuário já normalizado (sem acentos,
+# minúsculo) em "search_user_name", evitando juntar a coleção de usuários
+# para filtrar por nome.
+
+USER_NAME_FIELD = "search_user_name"
+
+
+def build_booking_filter(
+    services_by_id: Dict[str, dict],
+    status: Optional[str] = None,
+    service_id: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    q: Optional[str] = None
+) -> dict:
+    """
+    Monta o filtro dos agendamentos do organizador.
+
+    Args:
+        services_by_id: Serviços do organizador (limitam o resultado)
+        status: Status do agendamento
+        service_id: Apenas um dos serviços do organizador
+        date_from / date_to: Intervalo de datas (YYYY-MM-DD, inclusive)
+        q: Texto buscado no nome do serviço ou do usuário
+
+    Raises:
+        HTTPException 400: se alguma data for inválida
+    """
+    service_ids = list(services_by_id)
+    if service_id:
+        service_ids = [service_id] if service_id in services_by_id else []
+
+    query = {"service_id": {"$in": service_ids}}
+    if status:
+        query["status"] = status
+    if date_from or date_to:
+        query["date"] = {}
+        # As datas são gravadas como texto YYYY-MM-DD: normaliza antes de comparar
+        if date_from:
+            query["date"]["$gte"] = parse_date(date_from).isoformat()
+        if date_to:
+            query["date"]["$lte"] = parse_date(date_to).isoformat()
+
+    if q:
+        folded = fold(q)
+        # Nomes de serviço são poucos e já estão em memória
+        matching_services = [
+            sid for sid in service_ids if folded in fold(services_by_id[sid].get("name", ""))
+        ]
+        query["$or"] = [
+            {"service_id": {"$in": matching_services}},
+            {USER_NAME_FIELD: {"$regex": re.escape(folded)}},
+        ]
+
+    return query
+
+
+async def set_booking_user_name(db, user_id: str, name: str) -> None:
+    """
+    Atualiza o nome normalizado em todos os agendamentos do usuário
+    (chamado quando o usuário altera o nome).
+    """
+    await db.bookings.update_many({"user_id": user_id}, {"$set": {USER_NAME_FIELD: fold(name)}})
+
+
+async def backfill_booking_user_names(db) -> None:
+    """
+    Preenche "search_user_name" nos agendamentos criados antes do campo.
+    Idempotente; executado na inicialização.
+    """
+    user_ids = await db.bookings.distinct("user_id", {USER_NAME_FIELD: {"$exists": False}})
+    if not user_ids:
+        return
+
+    users = await db.users.find(
+        {"id": {"$in": user_ids}}, {"_id": 0, "id": 1, "name": 1}
+    ).to_list(None)
+
+    if users:
+        await db.bookings.bulk_write([
+            UpdateOne(
+                {"user_id": user["id"], USER_NAME_FIELD: {"$exists": False}},
+                {"$set": {USER_NAME_FIELD: fold(user.get("name", ""))}}
+            )
+            for user in users
+        ])
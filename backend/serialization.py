@@ -0,0 +1,58 @@
+# ============================================================================
+# SERIALIZATION.PY - Serialização rápida de documentos lidos do MongoDB
+# ============================================================================
+# Documentos lidos do banco foram gravados pelos próprios modelos da API,
+# então não precisam ser validados de novo a cada leitura. Este arquivo:
+# - Monta modelos com model_construct (sem validação)
+# - Serializa listas direto para bytes JSON (pydantic-core), retornando a
+#   resposta pronta, sem a revalidação do response_model do FastAPI
+# ============================================================================
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Type
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+def construct(model: Type[BaseModel], document: dict) -> BaseModel:
+    """
+    Cria o modelo a partir de um documento confiável, sem validação.
+    Campos ausentes recebem o valor padrão; campos extras (ex: _id,
+    hashed_password) são ignorados, como na criação normal do modelo.
+    """
+    return model.model_construct(**document)
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def dump_list(
+    model: Type[BaseModel],
+    items: List[BaseModel],
+    include: Optional[dict] = None
+) -> bytes:
+    """
+    Serializa uma lista de modelos para bytes JSON.
+    Com include (ver projections.py), apenas os campos pedidos são enviados.
+    """
+    return _list_adapter(model).dump_json(
+        items, include={"__all__": include} if include is not None else None
+    )
+
+
+def list_response(
+    model: Type[BaseModel],
+    items: List[BaseModel],
+    headers: Optional[Dict[str, str]] = None,
+    include: Optional[dict] = None
+) -> Response:
+    """
+    Resposta JSON já serializada para uma lista de modelos.
+    """
+    return Response(
+        content=dump_list(model, items, include),
+        media_type="application/json",
+        headers=headers
+    )
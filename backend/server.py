@@ -5,22 +5,61 @@
 # para gerenciar usuários, serviços e agendamentos.
 # ============================================================================
 
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, BackgroundTasks, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 import os
+import asyncio
 import logging
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from models import (
     User, UserCreate, UserLogin, UserResponse,
-    Service, ServiceCreate,
+    Service, ServiceCreate, ServiceSearchResult,
     Booking, BookingCreate, BookingUpdate, BookingWithDetails,
-    Token
+    BookingHistory, BulkStatusResult, BulkStatusUpdate, OrganizerStats, Token, TokenData
+)
+from availability import (
+    SLOT_TAKEN_FIELD, RELEASED_STATUSES,
+    backfill_slot_flags, compute_free_slots, is_slot_offered, parse_date, resolve_range
+)
+from auth import (
+    hash_password_async, verify_password_async, needs_rehash, configure_password_hashing_async,
+    create_access_token, get_user_from_token, verify_token, PasswordHasherBusy
+)
+from booking_stats import (
+    get_organizer_stats, get_user_history, rebuild_ratings, rebuild_stats,
+    record_booking_created, record_rating_change, record_status_change, record_status_changes
+)
+from cache import TTLCache, cache_stats, etag_matches, make_etag
+from metrics import MetricsMiddleware, render_metrics
+from database import WARMUP_ENABLED, client_options, create_client, warm_up_pool, warm_up_routes
+from hydration import hydrate_bookings
+from indexes import ensure_indexes
+from invalidation import UPDATED_AT_FIELD, on_change, touch, watch_changes
+from serialization import construct, dump_list, list_response
+from photos import (
+    IMMUTABLE_CACHE_CONTROL, create_variants, photo_path, shutdown_photo_pool, store_upload
+)
+from projections import (
+    BOOKING_PROJECTION, SERVICE_PROJECTION, USER_PROJECTION, USER_PUBLIC_PROJECTION,
+    nested_fields, parse_fields, projection, selected
+)
+from search import (
+    DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT, USER_NAME_FIELD,
+    backfill_booking_user_names, build_booking_filter, fold, search_services, set_booking_user_name
+)
+from pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER,
+    fetch_page, iter_batches, ndjson_response
 )
-from auth import hash_password, verify_password, create_access_token, get_user_from_token
 
 # ============================================================================
 # CONFIGURAÇÃO INICIAL
@@ -29,10 +68,10 @@ from auth import hash_password, verify_password, create_access_token, get_user_f
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# Conexão com MongoDB
+# Conexão com MongoDB: criada pelo lifespan do app (ver create_app)
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+client: Optional[AsyncIOMotorClient] = None
+db = None
 
 # Configuração de logging
 logging.basicConfig(
@@ -41,23 +80,59 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Criar app FastAPI
-app = FastAPI(title="Conectando API", version="1.0.0")
-
 # Criar router com prefixo /api
 api_router = APIRouter(prefix="/api")
 
 # Segurança JWT
 security = HTTPBearer()
 
+# Cache dos usuários autenticados (chave: email do token)
+user_cache = TTLCache(
+    "users",
+    maxsize=int(os.getenv("USER_CACHE_MAXSIZE", "4096")),
+    ttl=float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+)
+
+# Cache do catálogo público de serviços: respostas já serializadas por
+# página (chave: parâmetros da consulta). Limpo a cada alteração de serviço.
+catalog_cache = TTLCache(
+    "catalog",
+    maxsize=int(os.getenv("CATALOG_CACHE_MAXSIZE", "256")),
+    ttl=float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300"))
+)
+
+# Ordenação "mais bem avaliados" do catálogo (serviços sem avaliação por último)
+TOP_RATED_SORT = [("rating_average", -1), ("rating_count", -1), ("_id", 1)]
+
+# Campos de serviço que não podem ser alterados pelo organizador
+PROTECTED_SERVICE_FIELDS = {
+    "id", "organizer_id", "created_at", "rating_sum", "rating_count", "rating_average", "photo_variants"
+}
+
+
+# Invalidação vinda de outros processos (ver invalidation.py)
+def _invalidate_user(user: Optional[dict]) -> None:
+    if user and user.get("email"):
+        user_cache.invalidate(user["email"])
+    else:
+        user_cache.clear()
+
+
+def _invalidate_catalog(service: Optional[dict]) -> None:
+    catalog_cache.clear()
+
+
+on_change("users", _invalidate_user)
+on_change("services", _invalidate_catalog)
+
 
 # ============================================================================
 # FUNÇÕES AUXILIARES
 # ============================================================================
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserResponse:
     """
-    Obtém o usuário atual a partir do token JWT.
+    Obtém o usuário atual (sem a senha) a partir do token JWT.
     Usado como dependência em rotas protegidas.
     """
     token = credentials.credentials
@@ -66,11 +141,86 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     if not user_email:
         raise HTTPException(status_code=401, detail="Token inválido ou expirado")
     
-    user = await db.users.find_one({"email": user_email})
+    return await _load_user(user_email)
+
+
+async def get_token_claims(credentials: HTTPAuthorizationCredentials = Depends(security)) -> TokenData:
+    """
+    Obtém a identidade (id, email, role) diretamente das claims do token JWT,
+    sem consultar o banco. Usado em rotas que só precisam autorizar o usuário.
+    """
+    payload = verify_token(credentials.credentials)
+    
+    if not payload or not payload.get("sub"):
+        raise HTTPException(status_code=401, detail="Token inválido ou expirado")
+    
+    if "id" in payload and "role" in payload:
+        return TokenData(id=payload["id"], email=payload["sub"], role=payload["role"])
+    
+    # Tokens antigos (apenas "sub"): carrega o usuário
+    user = await _load_user(payload["sub"])
+    return TokenData(id=user.id, email=user.email, role=user.role)
+
+
+async def _load_user(user_email: str) -> UserResponse:
+    """
+    Carrega o usuário pelo email, usando o cache de usuários.
+    Lê e guarda apenas os dados públicos: o hash da senha só é lido no login.
+    """
+    # Usuários mudam raramente: evita uma consulta ao banco por requisição
+    cached_user = user_cache.get(user_email)
+    if cached_user is not None:
+        return cached_user
+    
+    user = await db.users.find_one({"email": user_email}, USER_PUBLIC_PROJECTION)
     if not user:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
-    return User(**user)
+    user_obj = UserResponse(**user)
+    user_cache.set(user_email, user_obj)
+    return user_obj
+
+
+async def _raise_missing_or_forbidden(collection, document_id: str, not_found: str, forbidden: str):
+    """
+    Chamado quando uma escrita com a verificação de posse no filtro não
+    encontra o documento: diferencia "não existe" (404) de "sem permissão" (403).
+    """
+    if await collection.find_one({"id": document_id}, {"_id": 1}):
+        raise HTTPException(status_code=403, detail=forbidden)
+    raise HTTPException(status_code=404, detail=not_found)
+
+
+def _token_claims(user: User) -> dict:
+    """
+    Claims incluídas no token JWT do usuário.
+    """
+    return {"sub": user.email, "id": user.id, "role": user.role}
+
+
+async def _to_services(services: List[dict]) -> List[Service]:
+    """
+    Converte documentos do MongoDB em modelos Service (sem revalidação).
+    """
+    return [construct(Service, service) for service in services]
+
+
+def _booking_projection(include: Optional[dict], relations: tuple) -> dict:
+    """
+    Projeção dos agendamentos para os campos pedidos em ?fields=, incluindo
+    as chaves usadas para popular as relações (service_id, user_id).
+    """
+    booking_projection = projection(Booking, include)
+    for relation in relations:
+        booking_projection[f"{relation}_id"] = 1
+    return booking_projection
+
+
+def _cursor_headers(next_cursor: Optional[str]) -> dict:
+    """
+    Header com o cursor da próxima página, se houver.
+    """
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
 
 
 # ============================================================================
@@ -88,29 +238,48 @@ async def register(user_data: UserCreate):
     - **role**: "user" ou "organizer" (padrão: "user")
     """
     # Verifica se o email já existe
-    existing_user = await db.users.find_one({"email": user_data.email})
+    existing_user = await db.users.find_one({"email": user_data.email}, {"_id": 1})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email já cadastrado")
     
     # Cria o novo usuário com senha hasheada
     user_dict = user_data.model_dump(exclude={"password"})
-    user_dict["hashed_password"] = hash_password(user_data.password)
+    user_dict["hashed_password"] = await hash_password_async(user_data.password)
     
     new_user = User(**user_dict)
     
     # Salva no banco
-    await db.users.insert_one(new_user.model_dump())
+    await db.users.insert_one({**new_user.model_dump(), **touch()})
     
     # Cria token de acesso
-    access_token = create_access_token({"sub": new_user.email})
+    access_token = create_access_token(_token_claims(new_user))
     
     # Retorna token e dados do usuário
     user_response = UserResponse(**new_user.model_dump())
     return Token(access_token=access_token, user=user_response)
 
 
+async def _rehash_password(user_id: str, email: str, password: str, old_hash: str) -> None:
+    """
+    Refaz o hash da senha com o perfil atual (tarefa de fundo após o login).
+    Só grava se o hash não mudou desde o login; se o pool estiver ocupado,
+    tenta de novo no próximo login.
+    """
+    try:
+        new_hash = await hash_password_async(password)
+    except PasswordHasherBusy:
+        return
+    
+    result = await db.users.update_one(
+        {"id": user_id, "hashed_password": old_hash},
+        {"$set": {"hashed_password": new_hash, **touch()}}
+    )
+    if result.modified_count:
+        user_cache.invalidate(email)
+
+
 @api_router.post("/auth/login", response_model=Token, tags=["Autenticação"])
-async def login(credentials: UserLogin):
+async def login(credentials: UserLogin, background_tasks: BackgroundTasks):
     """
     Faz login no sistema.
     
@@ -118,22 +287,29 @@ async def login(credentials: UserLogin):
     - **password**: Senha
     
     Retorna um token JWT válido por 7 dias.
+    Hashes de senha com algoritmo/custo antigo são refeitos após a resposta.
     """
     # Busca o usuário pelo email
-    user = await db.users.find_one({"email": credentials.email})
+    user = await db.users.find_one({"email": credentials.email}, USER_PROJECTION)
     
     if not user:
         raise HTTPException(status_code=401, detail="Email ou senha incorretos")
     
     # Verifica a senha
-    if not verify_password(credentials.password, user["hashed_password"]):
+    if not await verify_password_async(credentials.password, user["hashed_password"]):
         raise HTTPException(status_code=401, detail="Email ou senha incorretos")
     
+    # Atualiza o hash fora do caminho da resposta (migração gradual)
+    if needs_rehash(user["hashed_password"]):
+        background_tasks.add_task(
+            _rehash_password, user["id"], user["email"], credentials.password, user["hashed_password"]
+        )
+    
     # Cria token de acesso
-    access_token = create_access_token({"sub": user["email"]})
+    user_obj = User(**user)
+    access_token = create_access_token(_token_claims(user_obj))
     
     # Retorna token e dados do usuário
-    user_obj = User(**user)
     user_response = UserResponse(**user_obj.model_dump())
     return Token(access_token=access_token, user=user_response)
 
@@ -143,18 +319,18 @@ async def login(credentials: UserLogin):
 # ============================================================================
 
 @api_router.get("/users/me", response_model=UserResponse, tags=["Usuários"])
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: UserResponse = Depends(get_current_user)):
     """
     Retorna as informações do usuário logado.
     Requer autenticação.
     """
-    return UserResponse(**current_user.model_dump())
+    return current_user
 
 
 @api_router.put("/users/me", response_model=UserResponse, tags=["Usuários"])
 async def update_user_profile(
     updates: dict,
-    current_user: User = Depends(get_current_user)
+    current_user: UserResponse = Depends(get_current_user)
 ):
     """
     Atualiza o perfil do usuário logado.
@@ -168,14 +344,22 @@ async def update_user_profile(
     if not filtered_updates:
         raise HTTPException(status_code=400, detail="Nenhum campo válido para atualizar")
     
-    # Atualiza no banco
-    await db.users.update_one(
+    # Atualiza e retorna o usuário atualizado em uma única operação
+    updated_user = await db.users.find_one_and_update(
         {"id": current_user.id},
-        {"$set": filtered_updates}
+        {"$set": {**filtered_updates, **touch()}},
+        projection=USER_PUBLIC_PROJECTION,
+        return_document=ReturnDocument.AFTER
     )
+    user_cache.invalidate(current_user.email)
+    
+    if not updated_user:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    
+    # Mantém o nome usado na busca de agendamentos do organizador
+    if "name" in filtered_updates:
+        await set_booking_user_name(db, current_user.id, filtered_updates["name"])
     
-    # Busca e retorna o usuário atualizado
-    updated_user = await db.users.find_one({"id": current_user.id})
     return UserResponse(**updated_user)
 
 
@@ -184,15 +368,90 @@ async def update_user_profile(
 # ============================================================================
 
 @api_router.get("/services", response_model=List[Service], tags=["Serviços"])
-async def get_all_services(active_only: bool = True):
+async def get_all_services(
+    request: Request,
+    active_only: bool = True,
+    after: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    sort: Optional[str] = Query(None, pattern="^top_rated$"),
+    fields: Optional[str] = None
+):
     """
     Lista todos os serviços disponíveis.
     
     - **active_only**: Se True, retorna apenas serviços ativos (padrão: True)
+    - **after**: Cursor da página anterior (header X-Next-Cursor)
+    - **limit**: Tamanho da página
+    - **stream**: Se True, envia todos os resultados em NDJSON
+    - **sort**: "top_rated" ordena pela média de avaliações (sem cursor/stream)
+    - **fields**: Campos a retornar, separados por vírgula (ex: id,name)
+    
+    Respostas são servidas de um cache já serializado, com ETag forte
+    (304 quando o cliente envia If-None-Match com o mesmo ETag).
     """
     query = {"active": True} if active_only else {}
-    services = await db.services.find(query).to_list(1000)
-    return [Service(**service) for service in services]
+    include = parse_fields(Service, fields)
+    service_projection = projection(Service, include)
+    
+    if sort and (after or stream):
+        raise HTTPException(status_code=400, detail="sort=top_rated não suporta after/stream")
+    
+    if stream:
+        return ndjson_response(
+            iter_batches(db.services, query, after, projection=service_projection),
+            _to_services, include
+        )
+    
+    cache_key = (active_only, after, limit, sort, tuple(include or ()))
+    snapshot = catalog_cache.get(cache_key)
+    if snapshot is None:
+        if sort:
+            services = await db.services.find(query, service_projection).sort(TOP_RATED_SORT).to_list(limit)
+            next_cursor = None
+        else:
+            services, next_cursor = await fetch_page(
+                db.services, query, after, limit, projection=service_projection
+            )
+        body = dump_list(Service, await _to_services(services), include)
+        snapshot = (body, make_etag(body), next_cursor)
+        catalog_cache.set(cache_key, snapshot)
+    
+    body, etag, next_cursor = snapshot
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@api_router.get("/services/search", response_model=ServiceSearchResult, tags=["Serviços"])
+async def search_services_route(
+    q: Optional[str] = None,
+    type: Optional[str] = None,
+    day: Optional[str] = None,
+    location: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT)
+):
+    """
+    Busca serviços ativos, ordenados por relevância.
+    Não diferencia acentos nem maiúsculas ("saude" encontra "Saúde").
+    
+    - **q**: Texto buscado em nome, descrição e local
+    - **type**: Tipo do serviço (ex: Saúde)
+    - **day**: Dia da semana disponível (ex: Segunda-feira)
+    - **location**: Local do serviço
+    - **page** / **limit**: Paginação
+    
+    Retorna também a contagem de resultados por tipo (facets.type).
+    """
+    return await search_services(
+        db, q=q, type=type, day=day, location=location, page=page, limit=limit
+    )
 
 
 @api_router.get("/services/{service_id}", response_model=Service, tags=["Serviços"])
@@ -200,16 +459,55 @@ async def get_service(service_id: str):
     """
     Obtém detalhes de um serviço específico.
     """
-    service = await db.services.find_one({"id": service_id})
+    service = await db.services.find_one({"id": service_id}, SERVICE_PROJECTION)
     if not service:
         raise HTTPException(status_code=404, detail="Serviço não encontrado")
     return Service(**service)
 
 
+@api_router.get("/services/{service_id}/availability", tags=["Serviços"])
+async def get_service_availability(
+    service_id: str,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to")
+):
+    """
+    Lista os horários livres de um serviço em um intervalo de datas.
+    
+    - **from**: Data inicial YYYY-MM-DD (padrão: hoje)
+    - **to**: Data final YYYY-MM-DD (padrão: 14 dias a partir de from)
+    """
+    start, end = resolve_range(date_from, date_to)
+    
+    service = await db.services.find_one(
+        {"id": service_id, "active": True},
+        {"_id": 0, "availability_days": 1, "time_slots": 1}
+    )
+    if not service:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado ou inativo")
+    
+    # Uma única consulta por intervalo para os horários já reservados
+    taken = await db.bookings.find(
+        {
+            "service_id": service_id,
+            "date": {"$gte": start.isoformat(), "$lte": end.isoformat()},
+            SLOT_TAKEN_FIELD: True
+        },
+        {"_id": 0, "date": 1, "time": 1}
+    ).to_list(None)
+    
+    return {
+        "service_id": service_id,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "days": compute_free_slots(service, start, end, ((b["date"], b["time"]) for b in taken))
+    }
+
+
 @api_router.post("/services", response_model=Service, tags=["Serviços"])
 async def create_service(
     service_data: ServiceCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: TokenData = Depends(get_token_claims)
 ):
     """
     Cria um novo serviço.
@@ -221,71 +519,152 @@ async def create_service(
     
     # Cria o serviço
     new_service = Service(**service_data.model_dump(), organizer_id=current_user.id)
-    await db.services.insert_one(new_service.model_dump())
+    await db.services.insert_one({**new_service.model_dump(), **touch()})
+    catalog_cache.clear()
     
     return new_service
 
 
 @api_router.get("/services/organizer/my-services", response_model=List[Service], tags=["Serviços"])
-async def get_my_services(current_user: User = Depends(get_current_user)):
+async def get_my_services(
+    after: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    fields: Optional[str] = None,
+    current_user: TokenData = Depends(get_token_claims)
+):
     """
     Lista os serviços criados pelo organizador logado.
     Apenas para organizadores.
+    
+    - **fields**: Campos a retornar, separados por vírgula (ex: id,name)
     """
     if current_user.role != "organizer":
         raise HTTPException(status_code=403, detail="Apenas organizadores têm acesso")
     
-    services = await db.services.find({"organizer_id": current_user.id}).to_list(1000)
-    return [Service(**service) for service in services]
+    query = {"organizer_id": current_user.id}
+    include = parse_fields(Service, fields)
+    service_projection = projection(Service, include)
+    
+    if stream:
+        return ndjson_response(
+            iter_batches(db.services, query, after, projection=service_projection),
+            _to_services, include
+        )
+    
+    services, next_cursor = await fetch_page(
+        db.services, query, after, limit, projection=service_projection
+    )
+    return list_response(
+        Service, await _to_services(services), _cursor_headers(next_cursor), include
+    )
 
 
 @api_router.put("/services/{service_id}", response_model=Service, tags=["Serviços"])
 async def update_service(
     service_id: str,
     updates: dict,
-    current_user: User = Depends(get_current_user)
+    current_user: TokenData = Depends(get_token_claims)
 ):
     """
     Atualiza um serviço.
     Apenas o organizador que criou o serviço pode atualizá-lo.
     """
-    # Busca o serviço
-    service = await db.services.find_one({"id": service_id})
-    if not service:
-        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    # Atualiza (campos de controle e avaliações agregadas são ignorados).
+    # A verificação de posse faz parte do filtro: uma única ida ao banco.
+    updates = {k: v for k, v in updates.items() if k not in PROTECTED_SERVICE_FIELDS}
+    updated_service = await db.services.find_one_and_update(
+        {"id": service_id, "organizer_id": current_user.id},
+        {"$set": {**updates, **touch()}},
+        projection=SERVICE_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
     
-    # Verifica se o usuário é o dono do serviço
-    if service["organizer_id"] != current_user.id:
-        raise HTTPException(status_code=403, detail="Você não tem permissão para editar este serviço")
+    if not updated_service:
+        await _raise_missing_or_forbidden(
+            db.services, service_id,
+            not_found="Serviço não encontrado",
+            forbidden="Você não tem permissão para editar este serviço"
+        )
     
-    # Atualiza
-    await db.services.update_one({"id": service_id}, {"$set": updates})
+    catalog_cache.clear()
+    return Service(**updated_service)
+
+
+@api_router.post("/services/{service_id}/photo", response_model=Service, tags=["Serviços"])
+async def upload_service_photo(
+    service_id: str,
+    request: Request,
+    current_user: TokenData = Depends(get_token_claims)
+):
+    """
+    Envia a foto de um serviço (JPG, PNG ou WebP, até 5MB).
+    O corpo da requisição é o próprio arquivo (ex: Content-Type: image/jpeg).
+    Apenas o organizador que criou o serviço pode enviar a foto.
     
-    # Retorna serviço atualizado
-    updated_service = await db.services.find_one({"id": service_id})
+    O campo "photo" passa a apontar para a miniatura do card e
+    "photo_variants" traz as URLs de cada tamanho.
+    """
+    # Verifica a posse antes de receber o arquivo
+    owned = await db.services.find_one(
+        {"id": service_id, "organizer_id": current_user.id}, {"_id": 1}
+    )
+    if not owned:
+        await _raise_missing_or_forbidden(
+            db.services, service_id,
+            not_found="Serviço não encontrado",
+            forbidden="Você não tem permissão para editar este serviço"
+        )
+    
+    content_hash, extension = await store_upload(request.stream())
+    variants = await create_variants(content_hash, extension)
+    
+    updated_service = await db.services.find_one_and_update(
+        {"id": service_id, "organizer_id": current_user.id},
+        {"$set": {"photo": variants["card"], "photo_variants": variants, **touch()}},
+        projection=SERVICE_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated_service:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    
+    catalog_cache.clear()
     return Service(**updated_service)
 
 
+@api_router.get("/media/photos/{name}", tags=["Serviços"])
+async def get_photo(name: str):
+    """
+    Serve uma foto ou miniatura armazenada.
+    O nome contém o hash do conteúdo, então a resposta pode ficar em cache
+    indefinidamente.
+    """
+    return FileResponse(photo_path(name), headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+
+
 @api_router.delete("/services/{service_id}", tags=["Serviços"])
 async def delete_service(
     service_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: TokenData = Depends(get_token_claims)
 ):
     """
     Deleta (desativa) um serviço.
     Apenas o organizador que criou o serviço pode deletá-lo.
     """
-    # Busca o serviço
-    service = await db.services.find_one({"id": service_id})
-    if not service:
-        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    # Desativa ao invés de deletar (verificação de posse no filtro)
+    result = await db.services.update_one(
+        {"id": service_id, "organizer_id": current_user.id},
+        {"$set": {"active": False, **touch()}}
+    )
     
-    # Verifica permissão
-    if service["organizer_id"] != current_user.id:
-        raise HTTPException(status_code=403, detail="Você não tem permissão para deletar este serviço")
+    if not result.matched_count:
+        await _raise_missing_or_forbidden(
+            db.services, service_id,
+            not_found="Serviço não encontrado",
+            forbidden="Você não tem permissão para deletar este serviço"
+        )
     
-    # Desativa ao invés de deletar
-    await db.services.update_one({"id": service_id}, {"$set": {"active": False}})
+    catalog_cache.clear()
     
     return {"message": "Serviço deletado com sucesso"}
 
@@ -297,129 +676,381 @@ async def delete_service(
 @api_router.post("/bookings", response_model=Booking, tags=["Agendamentos"])
 async def create_booking(
     booking_data: BookingCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: TokenData = Depends(get_token_claims)
 ):
     """
     Cria um novo agendamento.
     Usuários podem agendar serviços disponíveis.
     """
     # Verifica se o serviço existe
-    service = await db.services.find_one({"id": booking_data.service_id, "active": True})
+    service = await db.services.find_one(
+        {"id": booking_data.service_id, "active": True},
+        {"_id": 0, "id": 1, "organizer_id": 1, "availability_days": 1, "time_slots": 1}
+    )
     if not service:
         raise HTTPException(status_code=404, detail="Serviço não encontrado ou inativo")
     
-    # Cria o agendamento
+    # Grava a data sempre como YYYY-MM-DD (comparada como texto pelo índice
+    # único dos horários, pela disponibilidade e pelos contadores)
+    booking_data.date = parse_date(booking_data.date).isoformat()
+    
+    # Verifica se o horário faz parte da agenda do serviço
+    if not is_slot_offered(service, booking_data.date, booking_data.time):
+        raise HTTPException(status_code=400, detail="Horário fora da agenda do serviço")
+    
+    # Nome do usuário (do cache) para a busca de agendamentos do organizador
+    user = await _load_user(current_user.email)
+    
+    # Cria o agendamento (o índice único impede reservar o mesmo horário duas vezes)
     new_booking = Booking(**booking_data.model_dump(), user_id=current_user.id)
-    await db.bookings.insert_one(new_booking.model_dump())
+    try:
+        await db.bookings.insert_one({
+            **new_booking.model_dump(),
+            SLOT_TAKEN_FIELD: True,
+            USER_NAME_FIELD: fold(user.name),
+            **touch()
+        })
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Horário já reservado")
+    
+    await record_booking_created(db, service, new_booking.model_dump())
     
     return new_booking
 
 
 @api_router.get("/bookings/my-bookings", response_model=List[BookingWithDetails], tags=["Agendamentos"])
-async def get_my_bookings(current_user: User = Depends(get_current_user)):
+async def get_my_bookings(
+    after: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    fields: Optional[str] = None,
+    current_user: TokenData = Depends(get_token_claims)
+):
     """
     Lista os agendamentos do usuário logado.
     Retorna os agendamentos com detalhes do serviço.
+    
+    - **fields**: Campos a retornar, separados por vírgula
+      (ex: id,date,time,service.name)
     """
-    bookings = await db.bookings.find({"user_id": current_user.id}).to_list(1000)
-    
-    # Popula com detalhes do serviço
-    result = []
-    for booking in bookings:
-        booking_obj = Booking(**booking)
-        service = await db.services.find_one({"id": booking["service_id"]})
-        
-        booking_with_details = BookingWithDetails(
-            **booking_obj.model_dump(),
-            service=Service(**service) if service else None
+    query = {"user_id": current_user.id}
+    include = parse_fields(BookingWithDetails, fields)
+    relations = ("service",) if selected(include, "service") else ()
+    booking_projection = _booking_projection(include, relations)
+    
+    async def hydrate(bookings):
+        # Popula com detalhes do serviço (uma única consulta por lote)
+        return await hydrate_bookings(
+            db, bookings, include=relations, service_fields=nested_fields(include, "service")
+        )
+    
+    if stream:
+        return ndjson_response(
+            iter_batches(db.bookings, query, after, projection=booking_projection),
+            hydrate, include
         )
-        result.append(booking_with_details)
     
-    return result
+    bookings, next_cursor = await fetch_page(
+        db.bookings, query, after, limit, projection=booking_projection
+    )
+    return list_response(
+        BookingWithDetails, await hydrate(bookings), _cursor_headers(next_cursor), include
+    )
+
+
+@api_router.get("/bookings/my-history", response_model=BookingHistory, tags=["Agendamentos"])
+async def get_my_history(
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    current_user: TokenData = Depends(get_token_claims)
+):
+    """
+    Retorna o histórico do usuário logado agrupado por mês
+    (Total, Realizados, Cancelados, Não Compareceu e Média de Avaliações).
+    
+    - **from**: Data inicial YYYY-MM-DD (opcional)
+    - **to**: Data final YYYY-MM-DD (opcional)
+    """
+    start = parse_date(date_from) if date_from else None
+    end = parse_date(date_to) if date_to else None
+    
+    return BookingHistory(**await get_user_history(db, current_user.id, start, end))
+
+
+@api_router.get("/bookings/organizer/stats", response_model=OrganizerStats, tags=["Agendamentos"])
+async def get_organizer_booking_stats(current_user: TokenData = Depends(get_token_claims)):
+    """
+    Retorna os totais do painel de agendamentos do organizador
+    (Total, Pendentes, Confirmados, Realizados, Cancelados e Hoje).
+    Lê apenas os contadores mantidos a cada escrita, sem percorrer agendamentos.
+    """
+    if current_user.role != "organizer":
+        raise HTTPException(status_code=403, detail="Apenas organizadores têm acesso")
+    
+    return OrganizerStats(**await get_organizer_stats(db, current_user.id))
 
 
 @api_router.get("/bookings/organizer/all", response_model=List[BookingWithDetails], tags=["Agendamentos"])
-async def get_organizer_bookings(current_user: User = Depends(get_current_user)):
+async def get_organizer_bookings(
+    after: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    status: Optional[str] = None,
+    service_id: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    q: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user: TokenData = Depends(get_token_claims)
+):
     """
     Lista todos os agendamentos dos serviços do organizador.
     Apenas para organizadores.
+    
+    Filtros (aplicados no banco):
+    - **status**: Status do agendamento
+    - **service_id**: Um dos serviços do organizador
+    - **date_from** / **date_to**: Intervalo de datas YYYY-MM-DD
+    - **q**: Nome do serviço ou do usuário (sem diferenciar acentos)
+    - **fields**: Campos a retornar, separados por vírgula
+      (ex: id,date,status,service.name,user.name)
     """
     if current_user.role != "organizer":
         raise HTTPException(status_code=403, detail="Apenas organizadores têm acesso")
     
-    # Busca serviços do organizador
-    services = await db.services.find({"organizer_id": current_user.id}).to_list(1000)
-    service_ids = [s["id"] for s in services]
-    
-    # Busca agendamentos desses serviços
-    bookings = await db.bookings.find({"service_id": {"$in": service_ids}}).to_list(1000)
-    
-    # Popula com detalhes
-    result = []
-    for booking in bookings:
-        booking_obj = Booking(**booking)
-        service = await db.services.find_one({"id": booking["service_id"]})
-        user = await db.users.find_one({"id": booking["user_id"]})
-        
-        booking_with_details = BookingWithDetails(
-            **booking_obj.model_dump(),
-            service=Service(**service) if service else None,
-            user=UserResponse(**user) if user else None
+    include = parse_fields(BookingWithDetails, fields)
+    relations = tuple(r for r in ("service", "user") if selected(include, r))
+    
+    # Busca serviços do organizador (já indexados por ID para a junção).
+    # O nome é usado pelo filtro q; os demais campos apenas se pedidos.
+    if "service" in relations:
+        service_projection = projection(Service, nested_fields(include, "service"))
+    else:
+        service_projection = {"_id": 0}
+    service_projection.update({"id": 1, "name": 1})
+    services = await db.services.find(
+        {"organizer_id": current_user.id}, service_projection
+    ).to_list(None)
+    services_by_id = {s["id"]: s for s in services}
+    
+    # Agendamentos desses serviços, com os filtros da busca
+    query = build_booking_filter(
+        services_by_id, status=status, service_id=service_id,
+        date_from=date_from, date_to=date_to, q=q
+    )
+    
+    async def hydrate(bookings):
+        # Serviços já carregados + usuários em uma consulta por lote
+        return await hydrate_bookings(
+            db, bookings, include=relations, services_by_id=services_by_id,
+            user_fields=nested_fields(include, "user")
+        )
+    
+    booking_projection = _booking_projection(include, relations)
+    
+    if stream:
+        return ndjson_response(
+            iter_batches(db.bookings, query, after, projection=booking_projection),
+            hydrate, include
         )
-        result.append(booking_with_details)
     
-    return result
+    bookings, next_cursor = await fetch_page(
+        db.bookings, query, after, limit, projection=booking_projection
+    )
+    return list_response(
+        BookingWithDetails, await hydrate(bookings), _cursor_headers(next_cursor), include
+    )
+
+
+@api_router.post("/bookings/bulk-status", response_model=BulkStatusResult, tags=["Agendamentos"])
+async def bulk_update_booking_status(
+    payload: BulkStatusUpdate,
+    current_user: TokenData = Depends(get_token_claims)
+):
+    """
+    Altera o status de vários agendamentos de uma vez (ex: confirmar ou
+    concluir todos os agendamentos de uma sessão).
+    Apenas para agendamentos dos serviços do organizador logado.
+    
+    Retorna o resultado de cada ID: updated, unchanged, not_found,
+    forbidden, conflict (horário já ocupado ao reativar) ou changed
+    (alterado por outro request entre a leitura e a escrita).
+    """
+    if current_user.role != "organizer":
+        raise HTTPException(status_code=403, detail="Apenas organizadores têm acesso")
+    
+    ids = list(dict.fromkeys(payload.ids))  # Remove duplicados mantendo a ordem
+    
+    # Uma consulta para os agendamentos e uma para validar a posse dos serviços
+    bookings = await db.bookings.find(
+        {"id": {"$in": ids}},
+        {"_id": 0, "id": 1, "service_id": 1, "status": 1, "date": 1}
+    ).to_list(None)
+    bookings_by_id = {b["id"]: b for b in bookings}
+    
+    owned_services = await db.services.find(
+        {"id": {"$in": list({b["service_id"] for b in bookings})}, "organizer_id": current_user.id},
+        {"_id": 0, "id": 1}
+    ).to_list(None)
+    owned_service_ids = {s["id"] for s in owned_services}
+    
+    results = {}
+    to_update = []
+    for booking_id in ids:
+        booking = bookings_by_id.get(booking_id)
+        if not booking:
+            results[booking_id] = "not_found"
+        elif booking["service_id"] not in owned_service_ids:
+            results[booking_id] = "forbidden"
+        elif booking["status"] == payload.status:
+            results[booking_id] = "unchanged"
+        else:
+            to_update.append(booking)
+    
+    # Todas as alterações em um único bulk_write
+    stamp = touch()
+    update_ops = {"$set": {"status": payload.status, **stamp}}
+    if payload.status in RELEASED_STATUSES:
+        update_ops["$unset"] = {SLOT_TAKEN_FIELD: ""}
+    else:
+        update_ops["$set"][SLOT_TAKEN_FIELD] = True
+    
+    conflicts = set()
+    matched = 0
+    if to_update:
+        operations = [
+            # O status anterior no filtro: se outro request alterou o agendamento
+            # depois da leitura, a operação não encontra nada
+            UpdateOne({"id": b["id"], "status": b["status"]}, update_ops)
+            for b in to_update
+        ]
+        try:
+            matched = (await db.bookings.bulk_write(operations, ordered=False)).matched_count
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                if error.get("code") != 11000:
+                    raise
+                conflicts.add(to_update[error["index"]]["id"])
+            matched = e.details.get("nMatched", 0)
+    
+    attempted = [b for b in to_update if b["id"] not in conflicts]
+    changed = set()
+    if matched < len(attempted):
+        # Alguma operação não encontrou o status lido: relê esses agendamentos
+        # (uma consulta) e considera escritos apenas os que têm o nosso status
+        # e a nossa data de modificação
+        current = await db.bookings.find(
+            {"id": {"$in": [b["id"] for b in attempted]}},
+            {"_id": 0, "id": 1, "status": 1, UPDATED_AT_FIELD: 1}
+        ).to_list(None)
+        written = {
+            b["id"] for b in current
+            if b.get("status") == payload.status and b.get(UPDATED_AT_FIELD) == stamp[UPDATED_AT_FIELD]
+        }
+        changed = {b["id"] for b in attempted if b["id"] not in written}
+    
+    applied = [b for b in attempted if b["id"] not in changed]
+    for booking in to_update:
+        if booking["id"] in conflicts:
+            results[booking["id"]] = "conflict"
+        elif booking["id"] in changed:
+            results[booking["id"]] = "changed"
+        else:
+            results[booking["id"]] = "updated"
+    
+    # Contabiliza apenas as escritas confirmadas
+    await record_status_changes(db, ((b, payload.status) for b in applied))
+    
+    return BulkStatusResult(
+        updated=len(applied),
+        results=[{"id": booking_id, "result": results[booking_id]} for booking_id in ids]
+    )
 
 
 @api_router.put("/bookings/{booking_id}", response_model=Booking, tags=["Agendamentos"])
 async def update_booking(
     booking_id: str,
     updates: BookingUpdate,
-    current_user: User = Depends(get_current_user)
+    current_user: TokenData = Depends(get_token_claims)
 ):
     """
     Atualiza um agendamento (status, rating, etc).
     Usuários podem atualizar seus próprios agendamentos.
     """
-    # Busca o agendamento
-    booking = await db.bookings.find_one({"id": booking_id})
-    if not booking:
-        raise HTTPException(status_code=404, detail="Agendamento não encontrado")
-    
-    # Verifica permissão
-    if booking["user_id"] != current_user.id:
-        raise HTTPException(status_code=403, detail="Você não tem permissão para editar este agendamento")
+    # Verificação de posse no filtro: uma única ida ao banco
+    owner_filter = {"id": booking_id, "user_id": current_user.id}
     
     # Atualiza apenas campos não-None
     update_dict = {k: v for k, v in updates.model_dump().items() if v is not None}
     
-    if update_dict:
-        await db.bookings.update_one({"id": booking_id}, {"$set": update_dict})
+    if not update_dict:
+        booking = await db.bookings.find_one(owner_filter, BOOKING_PROJECTION)
+        if not booking:
+            await _raise_missing_or_forbidden(
+                db.bookings, booking_id,
+                not_found="Agendamento não encontrado",
+                forbidden="Você não tem permissão para editar este agendamento"
+            )
+        return Booking(**booking)
+    
+    update_ops = {"$set": update_dict}
+    update_dict.update(touch())
+    
+    # Mudanças de status liberam ou voltam a ocupar o horário
+    if update_dict.get("status") in RELEASED_STATUSES:
+        update_ops["$unset"] = {SLOT_TAKEN_FIELD: ""}
+    elif "status" in update_dict:
+        update_dict[SLOT_TAKEN_FIELD] = True
+    
+    try:
+        # Retorna o documento anterior para atualizar os contadores com o status real
+        previous = await db.bookings.find_one_and_update(
+            owner_filter, update_ops,
+            projection=BOOKING_PROJECTION,
+            return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Horário já reservado")
+    
+    if not previous:
+        await _raise_missing_or_forbidden(
+            db.bookings, booking_id,
+            not_found="Agendamento não encontrado",
+            forbidden="Você não tem permissão para editar este agendamento"
+        )
+    
+    await record_status_change(db, previous, update_dict.get("status"))
+    if await record_rating_change(db, previous, update_dict.get("rating")):
+        catalog_cache.clear()
     
-    # Retorna agendamento atualizado
-    updated_booking = await db.bookings.find_one({"id": booking_id})
-    return Booking(**updated_booking)
+    # Documento atualizado = anterior + campos alterados (sem nova consulta)
+    return Booking(**{**previous, **update_dict})
 
 
 @api_router.delete("/bookings/{booking_id}", tags=["Agendamentos"])
 async def cancel_booking(
     booking_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: TokenData = Depends(get_token_claims)
 ):
     """
     Cancela um agendamento.
     """
-    # Busca o agendamento
-    booking = await db.bookings.find_one({"id": booking_id})
-    if not booking:
-        raise HTTPException(status_code=404, detail="Agendamento não encontrado")
+    # Atualiza status para cancelado (verificação de posse no filtro)
+    previous = await db.bookings.find_one_and_update(
+        {"id": booking_id, "user_id": current_user.id},
+        {"$set": {"status": "cancelled", **touch()}, "$unset": {SLOT_TAKEN_FIELD: ""}},
+        projection={"_id": 0, "service_id": 1, "status": 1, "date": 1},
+        return_document=ReturnDocument.BEFORE
+    )
     
-    # Verifica permissão
-    if booking["user_id"] != current_user.id:
-        raise HTTPException(status_code=403, detail="Você não tem permissão para cancelar este agendamento")
+    if not previous:
+        await _raise_missing_or_forbidden(
+            db.bookings, booking_id,
+            not_found="Agendamento não encontrado",
+            forbidden="Você não tem permissão para cancelar este agendamento"
+        )
     
-    # Atualiza status para cancelado
-    await db.bookings.update_one({"id": booking_id}, {"$set": {"status": "cancelled"}})
+    await record_status_change(db, previous, "cancelled")
     
     return {"message": "Agendamento cancelado com sucesso"}
 
@@ -440,27 +1071,115 @@ async def health_check():
     }
 
 
+@api_router.get("/cache/stats", tags=["Sistema"])
+async def get_cache_stats():
+    """
+    Retorna estatísticas (hits, misses, tamanho) dos caches em memória
+    deste processo.
+    """
+    return cache_stats()
+
+
+@api_router.get("/metrics", tags=["Sistema"])
+async def get_metrics():
+    """
+    Métricas deste processo no formato do Prometheus: latência por rota,
+    comandos do MongoDB por request e tempo gasto no banco por rota.
+    """
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # ============================================================================
 # CONFIGURAÇÃO FINAL
 # ============================================================================
 
-# Incluir o router no app
-app.include_router(api_router)
+# Pool de hash de senhas saturado -> 503 (o cliente pode tentar novamente)
+async def password_hasher_busy_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servidor ocupado, tente novamente em instantes"},
+        headers={"Retry-After": "1"}
+    )
+
+
+async def prepare_database():
+    """
+    Garante que os índices usados pelas rotas existam no MongoDB e preenche
+    os campos/contadores derivados ainda ausentes.
+    """
+    await backfill_slot_flags(db)
+    await backfill_booking_user_names(db)
+    await ensure_indexes(db)
+    await rebuild_stats(db)
+    await rebuild_ratings(db)
+    logger.info("MongoDB indexes ensured")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida do worker. Tudo antes do yield termina antes de o
+    servidor aceitar requests:
+    - Cria o cliente do MongoDB com o pool configurado e abre as conexões
+    - Prepara índices/contadores e calibra o hash de senhas
+    - Aquece as rotas públicas (WARMUP_ENABLED)
+    - Inicia a invalidação de caches entre workers
+    Ao desligar, encerra as tarefas de fundo e fecha a conexão.
+    """
+    global client, db
+    
+    start = time.perf_counter()
+    options = client_options()
+    client = create_client(mongo_url)
+    db = client[os.environ['DB_NAME']]
+    
+    pool_ms = await warm_up_pool(client, options.get("minPoolSize", 0))
+    logger.info(f"MongoDB pool ready ({options}) in {pool_ms:.0f}ms")
+    
+    await prepare_database()
+    await configure_password_hashing_async()
+    
+    if WARMUP_ENABLED:
+        routes_ms = await warm_up_routes(app)
+        logger.info(f"Routes warmed up in {routes_ms:.0f}ms")
+    
+    invalidation_task = asyncio.create_task(watch_changes(db))
+    logger.info(f"Startup completed in {(time.perf_counter() - start) * 1000:.0f}ms")
+    
+    try:
+        yield
+    finally:
+        invalidation_task.cancel()
+        shutdown_photo_pool()
+        client.close()
+        logger.info("MongoDB connection closed")
 
-# Configurar CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-# Evento de shutdown
-@app.on_event("shutdown")
-async def shutdown_db_client():
+def create_app() -> FastAPI:
     """
-    Fecha a conexão com o MongoDB ao desligar o servidor.
+    Cria o app FastAPI com as rotas, middlewares e o lifespan.
     """
-    client.close()
-    logger.info("MongoDB connection closed")
+    app = FastAPI(title="Conectando API", version="1.0.0", lifespan=lifespan)
+    
+    # Incluir o router no app
+    app.include_router(api_router)
+    
+    app.add_exception_handler(PasswordHasherBusy, password_hasher_busy_handler)
+    
+    # Configurar CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
+    )
+    
+    # Métricas por rota (a mais externa, para medir o request inteiro)
+    app.add_middleware(MetricsMiddleware)
+    
+    return app
+
+
+app = create_app()
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../context/AuthContext';
 import Header from '../components/Layout/Header';
-import { bookingsAPI } from '../services/api';
+import { bookingsAPI, mediaUrl } from '../services/api';
 import { Card } from '../components/ui/card';
 import { Badge } from '../components/ui/badge';
 import { Input } from '../components/ui/input';
@@ -14,6 +14,7 @@ const Agendamentos = () => {
   const [filterStatus, setFilterStatus] = useState('todos');
   const [filterService, setFilterService] = useState('todos');
   const [bookings, setBookings] = useState([]);
+  const [stats, setStats] = useState({ total: 0, pending: 0, confirmed: 0, completed: 0, today: 0 });
   const [loading, setLoading] = useState(true);
 
   // Carregar agendamentos ao montar
@@ -23,8 +24,12 @@ const Agendamentos = () => {
 
   const loadBookings = async () => {
     try {
-      const data = await bookingsAPI.getOrganizerBookings();
+      const [data, statsData] = await Promise.all([
+        bookingsAPI.getOrganizerBookings(),
+        bookingsAPI.getOrganizerStats()
+      ]);
       setBookings(data);
+      setStats(statsData);
     } catch (error) {
       console.error('Erro ao carregar agendamentos:', error);
     } finally {
@@ -45,15 +50,6 @@ const Agendamentos = () => {
     return matchesSearch && matchesStatus && matchesService;
   });
 
-  // Count bookings by status
-  const stats = {
-    total: bookings.length,
-    pending: bookings.filter(b => b.status === 'pending').length,
-    confirmed: bookings.filter(b => b.status === 'confirmed').length,
-    completed: bookings.filter(b => b.status === 'completed').length,
-    today: 0 // Mock value
-  };
-
   const getStatusBadge = (status) => {
     const statusConfig = {
       pending: { label: 'Pendente', className: 'bg-yellow-100 text-yellow-800' },
@@ -190,7 +186,7 @@ const Agendamentos = () => {
                 <div className="flex items-start justify-between">
                   <div className="flex items-start space-x-4 flex-1">
                     <img
-                      src={booking.service?.photo}
+                      src={mediaUrl(booking.service?.photo_variants?.thumb || booking.service?.photo)}
                       alt={booking.service?.name}
                       className="w-16 h-16 rounded-lg object-cover"
                     />
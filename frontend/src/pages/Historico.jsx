@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../context/AuthContext';
 import Header from '../components/Layout/Header';
-import { bookingsAPI } from '../services/api';
+import { bookingsAPI, mediaUrl } from '../services/api';
 import { Card } from '../components/ui/card';
 import { Badge } from '../components/ui/badge';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '../components/ui/select';
@@ -189,7 +189,7 @@ const Historico = () => {
                     <div className="flex items-start justify-between">
                       <div className="flex items-start space-x-3 flex-1">
                         <img
-                          src={booking.service.photo}
+                          src={mediaUrl(booking.service.photo_variants?.thumb || booking.service.photo)}
                           alt={booking.service.name}
                           className="w-12 h-12 rounded-lg object-cover"
                         />
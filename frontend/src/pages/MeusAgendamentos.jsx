@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../context/AuthContext';
 import Header from '../components/Layout/Header';
-import { bookingsAPI } from '../services/api';
+import { bookingsAPI, mediaUrl } from '../services/api';
 import { Card } from '../components/ui/card';
 import { Button } from '../components/ui/button';
 import { Badge } from '../components/ui/badge';
@@ -133,7 +133,7 @@ const MeusAgendamentos = () => {
                 <div className="flex items-start justify-between mb-4">
                   <div className="flex items-start space-x-4">
                     <img
-                      src={booking.service.photo}
+                      src={mediaUrl(booking.service.photo_variants?.thumb || booking.service.photo)}
                       alt={booking.service.name}
                       className="w-16 h-16 rounded-lg object-cover"
                     />
@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import Header from '../components/Layout/Header';
-import { servicesAPI } from '../services/api';
+import { servicesAPI, mediaUrl } from '../services/api';
 import { Card } from '../components/ui/card';
 import { Button } from '../components/ui/button';
 import { Plus, Calendar, MapPin, Edit, Trash2 } from 'lucide-react';
@@ -105,7 +105,7 @@ const MeusServicos = () => {
             {services.map((service) => (
               <Card key={service.id} className="bg-white overflow-hidden hover:shadow-xl transition-shadow">
                 <img
-                  src={service.photo}
+                  src={mediaUrl(service.photo)}
                   alt={service.name}
                   className="w-full h-48 object-cover"
                 />
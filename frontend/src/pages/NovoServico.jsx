@@ -17,6 +17,7 @@ const NovoServico = () => {
   const navigate = useNavigate();
   const { toast } = useToast();
   const [loading, setLoading] = useState(false);
+  const [photoFile, setPhotoFile] = useState(null);
   const [formData, setFormData] = useState({
     name: '',
     type: '',
@@ -53,14 +54,17 @@ const NovoServico = () => {
 
   const handleFileChange = (e) => {
     const file = e.target.files[0];
-    if (file) {
-      // Para simplificar, vamos usar uma URL de placeholder
-      // Em produção, você faria upload para um serviço como Cloudinary ou S3
-      setFormData(prev => ({ 
-        ...prev, 
-        photo: 'https://images.unsplash.com/photo-1488521787991-ed7bbaae773c?w=400' 
-      }));
+    if (file && file.size > 5 * 1024 * 1024) {
+      toast({
+        title: 'Erro',
+        description: 'A foto deve ter no máximo 5MB',
+        variant: 'destructive'
+      });
+      e.target.value = '';
+      return;
     }
+    // A foto é enviada depois que o serviço for criado
+    setPhotoFile(file || null);
   };
 
   const handleSubmit = async (e) => {
@@ -88,7 +92,10 @@ const NovoServico = () => {
     setLoading(true);
 
     try {
-      await servicesAPI.create(formData);
+      const service = await servicesAPI.create(formData);
+      if (photoFile) {
+        await servicesAPI.uploadPhoto(service.id, photoFile);
+      }
       
       toast({
         title: 'Serviço criado!',
@@ -193,11 +200,11 @@ const NovoServico = () => {
                   <Input
                     id="photo"
                     type="file"
-                    accept="image/*"
+                    accept="image/jpeg,image/png,image/webp"
                     onChange={handleFileChange}
                     className="mt-2"
                   />
-                  <p className="text-xs text-gray-500 mt-1">Formato: JPG, PNG. Tamanho máximo: 5MB</p>
+                  <p className="text-xs text-gray-500 mt-1">Formato: JPG, PNG, WebP. Tamanho máximo: 5MB</p>
                 </div>
               </div>
             </div>
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../context/AuthContext';
 import Header from '../components/Layout/Header';
-import { servicesAPI, bookingsAPI } from '../services/api';
+import { servicesAPI, bookingsAPI, mediaUrl } from '../services/api';
 import { Card } from '../components/ui/card';
 import { Button } from '../components/ui/button';
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogDescription } from '../components/ui/dialog';
@@ -112,7 +112,7 @@ const Servicos = () => {
           {services.map((service) => (
             <Card key={service.id} className="bg-white overflow-hidden hover:shadow-xl transition-shadow">
               <img
-                src={service.photo || 'https://images.unsplash.com/photo-1488521787991-ed7bbaae773c?w=400'}
+                src={mediaUrl(service.photo) || 'https://images.unsplash.com/photo-1488521787991-ed7bbaae773c?w=400'}
                 alt={service.name}
                 className="w-full h-48 object-cover"
               />
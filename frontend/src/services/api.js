@@ -36,6 +36,28 @@ api.interceptors.request.use(
   }
 );
 
+// ============================================================================
+// PAGINAÇÃO
+// ============================================================================
+
+// Itens por página nas listagens (máximo aceito pela API: 1000)
+const PAGE_SIZE = 500;
+
+/**
+ * Busca todas as páginas de uma listagem, seguindo o cursor do header
+ * X-Next-Cursor até a última página (que vem sem o header).
+ */
+const getAllPages = async (url, params = {}) => {
+  const items = [];
+  let after;
+  do {
+    const response = await api.get(url, { params: { ...params, limit: PAGE_SIZE, after } });
+    items.push(...response.data);
+    after = response.headers['x-next-cursor'];
+  } while (after);
+  return items;
+};
+
 // ============================================================================
 // SERVIÇOS - FUNÇÕES DE CHAMADA À API
 // ============================================================================
@@ -45,10 +67,7 @@ api.interceptors.request.use(
  */
 export const servicesAPI = {
   // Lista todos os serviços ativos
-  getAll: async () => {
-    const response = await api.get('/services');
-    return response.data;
-  },
+  getAll: async () => getAllPages('/services'),
 
   // Obtém detalhes de um serviço específico
   getById: async (serviceId) => {
@@ -57,10 +76,7 @@ export const servicesAPI = {
   },
 
   // Lista serviços do organizador logado
-  getMyServices: async () => {
-    const response = await api.get('/services/organizer/my-services');
-    return response.data;
-  },
+  getMyServices: async () => getAllPages('/services/organizer/my-services'),
 
   // Cria um novo serviço (apenas organizadores)
   create: async (serviceData) => {
@@ -79,6 +95,14 @@ export const servicesAPI = {
     const response = await api.delete(`/services/${serviceId}`);
     return response.data;
   },
+
+  // Envia a foto do serviço (o corpo da requisição é o próprio arquivo)
+  uploadPhoto: async (serviceId, file) => {
+    const response = await api.post(`/services/${serviceId}/photo`, file, {
+      headers: { 'Content-Type': file.type || 'application/octet-stream' },
+    });
+    return response.data;
+  },
 };
 
 /**
@@ -92,14 +116,14 @@ export const bookingsAPI = {
   },
 
   // Lista agendamentos do usuário logado
-  getMyBookings: async () => {
-    const response = await api.get('/bookings/my-bookings');
-    return response.data;
-  },
+  getMyBookings: async () => getAllPages('/bookings/my-bookings'),
 
   // Lista agendamentos dos serviços do organizador
-  getOrganizerBookings: async () => {
-    const response = await api.get('/bookings/organizer/all');
+  getOrganizerBookings: async () => getAllPages('/bookings/organizer/all'),
+
+  // Totais do painel do organizador (calculados no servidor)
+  getOrganizerStats: async () => {
+    const response = await api.get('/bookings/organizer/stats');
     return response.data;
   },
 
@@ -133,4 +157,16 @@ export const usersAPI = {
   },
 };
 
+// ============================================================================
+// MÍDIA
+// ============================================================================
+
+/**
+ * URL de uma imagem para usar em <img src>.
+ * Fotos enviadas por upload são servidas pela API com caminho relativo
+ * (ex: /api/media/photos/...), que precisa do endereço do backend;
+ * URLs externas são usadas como estão.
+ */
+export const mediaUrl = (url) => (url && url.startsWith('/') ? `${BACKEND_URL}${url}` : url);
+
 export default api;
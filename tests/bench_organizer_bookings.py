@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# ============================================================================
+# BENCH_ORGANIZER_BOOKINGS.PY - Agendamentos do organizador: antes e depois
+# ============================================================================
+# Compara, com 100, 1.000 e 10.000 agendamentos de um organizador:
+# - Antes: o caminho anterior de GET /api/bookings/organizer/all, que busca
+#   o serviço e o usuário de cada agendamento (2 consultas por agendamento)
+# - Depois: a rota atual (serviços já carregados + usuários em lote), em
+#   streaming para retornar todos os agendamentos, como o caminho anterior
+#
+# Os dois caminhos rodam como rotas do app (mesmo custo de HTTP e de
+# serialização) e são medidos em comandos do MongoDB (QueryCounter) e em
+# latência (mediana das repetições).
+#
+# Executar na raiz do projeto:
+#   python tests/bench_organizer_bookings.py
+#   python tests/bench_organizer_bookings.py --sizes 100,1000 --repeat 5
+#   TEST_MONGO_URL=mongodb://localhost:27017 python tests/bench_organizer_bookings.py
+#
+# Sem TEST_MONGO_URL, usa o mongomock: cada consulta conta como um comando
+# (o driver enviaria também um getMore a cada lote de resultados) e as
+# buscas por ID percorrem a coleção, então a latência do caminho anterior
+# cresce mais do que cresceria em um mongod com índices.
+# ============================================================================
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+USE_REAL_MONGO = bool(os.getenv("TEST_MONGO_URL"))
+os.environ["MONGO_URL"] = os.getenv("TEST_MONGO_URL", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = os.getenv("TEST_DB_NAME", "conectando_bench")
+os.environ.setdefault("WARMUP_ENABLED", "0")
+os.environ.setdefault("PASSWORD_HASH_TARGET_MS", "0")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+if not USE_REAL_MONGO:
+    import database  # noqa: E402
+    from mongomock_monitoring import MonitoredMockClient  # noqa: E402
+    database.AsyncIOMotorClient = MonitoredMockClient
+
+from fastapi import Depends  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+import server  # noqa: E402
+from availability import WEEKDAYS  # noqa: E402
+from models import Booking, BookingWithDetails, Service, TokenData, User, UserResponse  # noqa: E402
+from query_monitor import QueryCounter  # noqa: E402
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+DEFAULT_SIZES = "100,1000,10000"
+SERVICES = 20
+MAX_USERS = 500  # Usuários distintos (agendamentos repetem usuários)
+TIME_SLOTS = ["08:00", "09:00", "10:00", "11:00", "13:00", "14:00", "15:00", "16:00"]
+
+OLD_ROUTE = "/bench/organizer-bookings-antes"
+NEW_ROUTE = "/api/bookings/organizer/all?stream=true"
+
+
+# ============================================================================
+# CAMINHO ANTERIOR (uma consulta de serviço e uma de usuário por agendamento)
+# ============================================================================
+
+async def old_organizer_bookings(current_user: TokenData = Depends(server.get_token_claims)):
+    db = server.db
+    services = await db.services.find({"organizer_id": current_user.id}).to_list(None)
+    service_ids = [s["id"] for s in services]
+
+    bookings = await db.bookings.find({"service_id": {"$in": service_ids}}).to_list(None)
+
+    result = []
+    for booking in bookings:
+        booking_obj = Booking(**booking)
+        service = await db.services.find_one({"id": booking["service_id"]})
+        user = await db.users.find_one({"id": booking["user_id"]})
+        result.append(BookingWithDetails(
+            **booking_obj.model_dump(),
+            service=Service(**service) if service else None,
+            user=UserResponse(**user) if user else None
+        ))
+    return result
+
+
+server.app.add_api_route(OLD_ROUTE, old_organizer_bookings, response_model=List[BookingWithDetails])
+
+
+# ============================================================================
+# DADOS
+# ============================================================================
+
+async def seed(organizer_id: str, size: int) -> None:
+    """
+    Garante size agendamentos nos serviços do organizador (incremental:
+    cada tamanho reaproveita os agendamentos do anterior).
+    """
+    db = server.db
+    services = await db.services.find({"organizer_id": organizer_id}, {"id": 1}).to_list(None)
+    if not services:
+        services = [
+            Service(
+                name=f"Serviço {i}", type="Saúde", description="Benchmark",
+                organizer_id=organizer_id, availability_days=WEEKDAYS, time_slots=TIME_SLOTS
+            ).model_dump()
+            for i in range(SERVICES)
+        ]
+        await db.services.insert_many(services)
+
+    users = await db.users.find({"role": "user"}, {"id": 1}).to_list(None)
+    if len(users) < min(size, MAX_USERS):
+        new_users = [
+            User(email=f"user{i}@bench.com", name=f"Usuário {i}", hashed_password="-").model_dump()
+            for i in range(len(users), min(size, MAX_USERS))
+        ]
+        await db.users.insert_many(new_users)
+        users += new_users
+
+    # Horários distintos: serviço, depois horário, depois dia
+    existing = await db.bookings.count_documents({})
+    today = date.today()
+    bookings = []
+    for i in range(existing, size):
+        slot = i // len(services)
+        bookings.append(Booking(
+            service_id=services[i % len(services)]["id"],
+            user_id=users[i % len(users)]["id"],
+            date=(today + timedelta(days=slot // len(TIME_SLOTS))).isoformat(),
+            time=TIME_SLOTS[slot % len(TIME_SLOTS)],
+        ).model_dump())
+    if bookings:
+        await db.bookings.insert_many(bookings)
+
+
+# ============================================================================
+# MEDIÇÃO
+# ============================================================================
+
+def measure(client: TestClient, url: str, headers: dict, repeat: int) -> dict:
+    """
+    Comandos de uma chamada e mediana da latência em repeat chamadas.
+    """
+    counter = QueryCounter()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with counter:
+            response = client.get(url, headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.text
+    if url == NEW_ROUTE:
+        items = len(response.text.splitlines())
+    else:
+        items = len(response.json())
+    return {"commands": counter.count, "ms": statistics.median(timings), "items": items}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agendamentos do organizador: caminho anterior vs atual")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Quantidades de agendamentos")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições por caminho")
+    args = parser.parse_args()
+
+    # Sem o log de cada request e os avisos de N+1 do caminho anterior
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("query_monitor").setLevel(logging.ERROR)
+
+    with TestClient(server.app) as client:
+        for name in client.portal.call(server.db.list_collection_names):
+            client.portal.call(server.db.drop_collection, name)
+
+        response = client.post("/api/auth/register", json={
+            "email": "org@bench.com", "password": "senha-123", "name": "Organizador", "role": "organizer"
+        })
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        organizer_id = response.json()["user"]["id"]
+
+        print(f"{'agendamentos':>12} | {'antes: comandos':>15} {'ms':>9} | {'depois: comandos':>16} {'ms':>9}")
+        for size in (int(s) for s in args.sizes.split(",")):
+            client.portal.call(seed, organizer_id, size)
+            old = measure(client, OLD_ROUTE, headers, args.repeat)
+            new = measure(client, NEW_ROUTE, headers, args.repeat)
+            assert old["items"] == new["items"] == size, (old, new)
+            print(f"{size:>12} | {old['commands']:>15} {old['ms']:>9.1f} | {new['commands']:>16} {new['ms']:>9.1f}")
+
+        if USE_REAL_MONGO:
+            client.portal.call(server.client.drop_database, os.environ["DB_NAME"])
+
+
+if __name__ == "__main__":
+    main()
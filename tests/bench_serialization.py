@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# ============================================================================
+# BENCH_SERIALIZATION.PY - Serialização de listas: response_model vs dump_list
+# ============================================================================
+# Compara, em listas de 1.000 itens como as de get_all_services e
+# get_organizer_bookings:
+# - Antes: modelos criados com validação ([Service(**d) for d in docs]) e
+#   serializados pelo caminho do response_model do FastAPI (revalidação,
+#   jsonable_encoder e json.dumps do JSONResponse)
+# - Depois: modelos montados sem validação (construct) e serializados
+#   direto para bytes JSON (dump_list, ver serialization.py)
+#
+# Reporta a mediana de cada etapa (montagem dos modelos e serialização) e
+# confere que os dois caminhos geram o mesmo JSON.
+#
+# Executar na raiz do projeto:
+#   python tests/bench_serialization.py
+#   python tests/bench_serialization.py --items 5000 --repeat 20
+# ============================================================================
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+from availability import WEEKDAYS  # noqa: E402
+from models import Booking, BookingWithDetails, Service, User, UserResponse  # noqa: E402
+from serialization import construct, dump_list  # noqa: E402
+
+DEFAULT_ITEMS = 1000
+DEFAULT_REPEAT = 10
+TIME_SLOTS = ["08:00", "09:00", "10:00", "11:00", "13:00", "14:00", "15:00", "16:00"]
+
+
+# ============================================================================
+# DADOS (documentos como lidos do MongoDB)
+# ============================================================================
+
+def service_docs(count: int) -> List[dict]:
+    return [
+        Service(
+            name=f"Serviço {i}", type="Saúde", description=f"Serviço de saúde número {i}",
+            organizer_id="org-1", availability_days=WEEKDAYS[:5], time_slots=TIME_SLOTS,
+            location=f"Bairro {i % 10}", rating_sum=9, rating_count=2, rating_average=4.5
+        ).model_dump()
+        for i in range(count)
+    ]
+
+
+def booking_docs(count: int, services: List[dict]) -> List[dict]:
+    users = [
+        User(email=f"user{i}@bench.com", name=f"Usuário {i}", hashed_password="-").model_dump()
+        for i in range(50)
+    ]
+    return [
+        {
+            **Booking(
+                service_id=services[i % len(services)]["id"], user_id=users[i % len(users)]["id"],
+                date="2026-10-20", time=TIME_SLOTS[i % len(TIME_SLOTS)], status="confirmed"
+            ).model_dump(),
+            "service": services[i % len(services)],
+            "user": users[i % len(users)],
+        }
+        for i in range(count)
+    ]
+
+
+# ============================================================================
+# CAMINHOS
+# ============================================================================
+
+def validated_services(docs):
+    return [Service(**d) for d in docs]
+
+
+def constructed_services(docs):
+    return [construct(Service, d) for d in docs]
+
+
+def validated_bookings(docs):
+    # Como get_organizer_bookings antes: Booking validado + relações validadas
+    return [
+        BookingWithDetails(
+            **Booking(**d).model_dump(), service=Service(**d["service"]), user=UserResponse(**d["user"])
+        )
+        for d in docs
+    ]
+
+
+def constructed_bookings(docs):
+    # Como hydrate_bookings: sem revalidação
+    return [
+        construct(BookingWithDetails, {
+            **d, "service": construct(Service, d["service"]), "user": construct(UserResponse, d["user"])
+        })
+        for d in docs
+    ]
+
+
+def response_model_body(model, items) -> bytes:
+    """
+    Corpo gerado pelo FastAPI para response_model=List[model].
+    """
+    field = create_response_field(name="Response", type_=List[model], mode="serialization")
+    content = asyncio.run(serialize_response(field=field, response_content=items, is_coroutine=True))
+    return JSONResponse(content).body
+
+
+# ============================================================================
+# MEDIÇÃO
+# ============================================================================
+
+def median_ms(action: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def compare(name: str, model, docs, validated, constructed, repeat: int) -> None:
+    before_items = validated(docs)
+    after_items = constructed(docs)
+    assert json.loads(response_model_body(model, before_items)) == json.loads(dump_list(model, after_items))
+
+    rows = [
+        ("montagem", median_ms(lambda: validated(docs), repeat), median_ms(lambda: constructed(docs), repeat)),
+        ("serialização", median_ms(lambda: response_model_body(model, before_items), repeat),
+         median_ms(lambda: dump_list(model, after_items), repeat)),
+    ]
+    rows.append(("total", rows[0][1] + rows[1][1], rows[0][2] + rows[1][2]))
+
+    print(f"\n{name} ({len(docs)} itens)")
+    print(f"  {'etapa':14} {'antes (ms)':>11} {'depois (ms)':>12} {'ganho':>7}")
+    for step, before, after in rows:
+        print(f"  {step:14} {before:>11.2f} {after:>12.2f} {before / after:>6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialização de listas: response_model vs dump_list")
+    parser.add_argument("--items", type=int, default=DEFAULT_ITEMS, help="Itens por lista")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Repetições por etapa")
+    args = parser.parse_args()
+
+    services = service_docs(args.items)
+    compare("get_all_services", Service, services,
+            validated_services, constructed_services, args.repeat)
+    compare("get_organizer_bookings", BookingWithDetails, booking_docs(args.items, services),
+            validated_bookings, constructed_bookings, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
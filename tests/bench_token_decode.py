@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# ============================================================================
+# BENCH_TOKEN_DECODE.PY - Verificação do JWT: jwt.decode vs cache
+# ============================================================================
+# Compara o custo por chamada de:
+# - jwt.decode: o que toda requisição autenticada fazia antes do cache
+# - verify_token com o token no cache (verified_tokens): o caso comum,
+#   um mesmo token usado em várias requisições
+# - verify_token sem o token no cache (primeira requisição do token)
+#
+# Executar na raiz do projeto:
+#   python tests/bench_token_decode.py
+#   python tests/bench_token_decode.py --number 200000
+# ============================================================================
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from jose import jwt  # noqa: E402
+from auth import ALGORITHM, SECRET_KEY, create_access_token, verified_tokens, verify_token  # noqa: E402
+
+DEFAULT_NUMBER = 50000
+REPEAT = 5
+
+
+def best_us(stmt, number: int) -> float:
+    """
+    Melhor tempo por chamada (microssegundos) entre REPEAT rodadas.
+    """
+    timer = timeit.Timer(stmt)
+    return min(timer.repeat(repeat=REPEAT, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="jwt.decode vs verify_token com cache")
+    parser.add_argument("--number", type=int, default=DEFAULT_NUMBER, help="Chamadas por rodada")
+    args = parser.parse_args()
+
+    token = create_access_token({"sub": "bench@example.com", "role": "user"})
+    assert verify_token(token) == jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+    decode = best_us(lambda: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]), args.number)
+    hit = best_us(lambda: verify_token(token), args.number)
+
+    # Sem o cache: limpa antes de cada chamada (o clear entra na medida)
+    def miss():
+        verified_tokens.clear()
+        verify_token(token)
+    miss_us = best_us(miss, max(args.number // 10, 1))
+
+    print(f"{'jwt.decode':36} {decode:8.2f} µs/chamada")
+    print(f"{'verify_token (token em cache)':36} {hit:8.2f} µs/chamada   {decode / hit:6.1f}x mais rápido")
+    print(f"{'verify_token (token fora do cache)':36} {miss_us:8.2f} µs/chamada")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# ============================================================================
+# CONFTEST.PY - Configuração e fixtures dos testes
+# ============================================================================
+# Os testes usam o app real (server.app, com o lifespan) e:
+# - Um mongod de verdade, se TEST_MONGO_URL estiver definido (o banco
+#   DB_NAME de teste é apagado ao fim de cada teste)
+# - Caso contrário, o mongomock (em memória), com eventos de comando
+#   emitidos como pelo driver (ver mongomock_monitoring.py)
+#
+# Executar na raiz do projeto:
+#   python -m pytest tests
+#   TEST_MONGO_URL=mongodb://localhost:27017 python -m pytest tests
+# ============================================================================
+
+import os
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Configuração de teste, antes de importar o servidor (o .env não sobrescreve)
+USE_REAL_MONGO = bool(os.getenv("TEST_MONGO_URL"))
+os.environ["MONGO_URL"] = os.getenv("TEST_MONGO_URL", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = os.getenv("TEST_DB_NAME", "conectando_test")
+os.environ.setdefault("WARMUP_ENABLED", "0")
+os.environ.setdefault("PASSWORD_HASH_TARGET_MS", "0")  # Sem calibração
+os.environ.setdefault("BCRYPT_ROUNDS", "4")  # Hash rápido nos testes
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+if not USE_REAL_MONGO:
+    import database  # noqa: E402
+    from .mongomock_monitoring import MonitoredMockClient  # noqa: E402
+    database.AsyncIOMotorClient = MonitoredMockClient
+
+import server  # noqa: E402
+from availability import WEEKDAYS  # noqa: E402
+from cache import CACHES  # noqa: E402
+from query_monitor import QueryCounter  # noqa: E402
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+@pytest.fixture
+def client():
+    """
+    Cliente HTTP do app, com o lifespan executado (banco limpo a cada teste).
+    """
+    with TestClient(server.app) as test_client:
+        yield test_client
+        if USE_REAL_MONGO:
+            test_client.portal.call(server.client.drop_database, os.environ["DB_NAME"])
+
+    # Caches do processo não podem vazar entre testes
+    for cache in CACHES.values():
+        cache.clear()
+
+
+@pytest.fixture
+def query_counter() -> QueryCounter:
+    """
+    QueryCounter para verificar a quantidade de comandos do MongoDB
+    executados por uma rota (ver QueryCounter.assert_constant).
+    """
+    return QueryCounter()
+
+
+@pytest.fixture
+def register(client):
+    """
+    Cadastra um usuário e retorna os headers com o token.
+
+    Exemplo:
+        >>> headers = register("org@example.com", role="organizer")
+    """
+    def _register(email: str, role: str = "user", name: str = "Teste") -> dict:
+        response = client.post("/api/auth/register", json={
+            "email": email, "password": "senha-123", "name": name, "role": role
+        })
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return _register
+
+
+@pytest.fixture
+def create_service(client):
+    """
+    Cria um serviço (todos os dias, horários 09:00 e 10:00 por padrão)
+    e retorna o documento.
+
+    Exemplo:
+        >>> service = create_service(organizer, time_slots=["08:00"])
+    """
+    def _create_service(headers: dict, **fields) -> dict:
+        response = client.post("/api/services", headers=headers, json={
+            "name": "Consulta", "type": "Saúde", "description": "Teste",
+            "availability_days": WEEKDAYS, "time_slots": ["09:00", "10:00"], **fields
+        })
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return _create_service
+
+
+@pytest.fixture
+def book(client):
+    """
+    Envia POST /api/bookings (amanhã às 09:00 por padrão) e retorna a resposta.
+    """
+    def _book(headers: dict, service: dict, day=None, time: str = "09:00", **extra):
+        day = day or date.today() + timedelta(days=1)
+        return client.post("/api/bookings", headers=headers, json={
+            "service_id": service["id"], "date": day if isinstance(day, str) else day.isoformat(),
+            "time": time, **extra
+        })
+
+    return _book
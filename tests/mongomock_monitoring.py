@@ -0,0 +1,142 @@
+# ============================================================================
+# MONGOMOCK_MONITORING.PY - Cliente mongomock com eventos de comando
+# ============================================================================
+# O mongomock não envia eventos de monitoramento do pymongo, então os
+# listeners da aplicação (metrics.py e query_monitor.py, inclusive o
+# QueryCounter) não veriam nenhum comando. Este arquivo:
+# - Envolve os métodos das coleções do mongomock para emitir um
+#   CommandStartedEvent/CommandSucceededEvent por comando, no mesmo
+#   formato que o driver envia ao servidor (find, aggregate, update...)
+# - Fornece MonitoredMockClient, que aceita os mesmos argumentos do
+#   AsyncIOMotorClient (event_listeners, opções do pool)
+#
+# Cada chamada de método conta como um comando (uma ida ao banco), como no
+# driver para resultados que cabem no primeiro lote (até 101 documentos).
+# ============================================================================
+
+import itertools
+import threading
+import time
+from datetime import timedelta
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+from mongomock.collection import Collection
+from mongomock_motor import AsyncMongoMockClient
+from pymongo import monitoring
+
+# Listeners do último cliente criado (os testes usam um cliente por vez)
+_listeners: List[monitoring.CommandListener] = []
+_request_ids = itertools.count(1)
+_local = threading.local()  # Evita contar chamadas internas do mongomock
+
+CONNECTION_ID = ("mongomock", 27017)
+
+
+def _arg(args: tuple, kwargs: dict, index: int, name: str, default: Any = None) -> Any:
+    """
+    Argumento posicional ou nomeado de um método da coleção.
+    """
+    if len(args) > index:
+        return args[index]
+    return kwargs.get(name, default)
+
+
+def _bulk_commands(name: str, args: tuple, kwargs: dict) -> List[dict]:
+    """
+    Comandos enviados por um bulk_write: um por tipo de operação (em ordem,
+    agrupando as operações consecutivas do mesmo tipo, como o driver).
+    """
+    kinds = {"Insert": "insert", "Update": "update", "Replace": "update", "Delete": "delete"}
+    commands = []
+    for request in _arg(args, kwargs, 0, "requests", []):
+        kind = next(k for prefix, k in kinds.items() if type(request).__name__.startswith(prefix))
+        if not commands or kind not in commands[-1]:
+            commands.append({kind: name})
+    return commands
+
+
+# Método da coleção -> comandos enviados (nome da coleção, args, kwargs)
+COMMANDS: Dict[str, Callable[[str, tuple, dict], List[dict]]] = {
+    "find": lambda c, a, k: [{"find": c, "filter": _arg(a, k, 0, "filter") or {}}],
+    "find_one": lambda c, a, k: [{"find": c, "filter": _arg(a, k, 0, "filter") or {}}],
+    "count_documents": lambda c, a, k: [{"aggregate": c, "pipeline": [{"$match": _arg(a, k, 0, "filter")}]}],
+    "distinct": lambda c, a, k: [{"distinct": c, "key": _arg(a, k, 0, "key"), "query": _arg(a, k, 1, "filter")}],
+    "aggregate": lambda c, a, k: [{"aggregate": c, "pipeline": _arg(a, k, 0, "pipeline")}],
+    "find_one_and_update": lambda c, a, k: [{"findAndModify": c, "query": _arg(a, k, 0, "filter")}],
+    "find_one_and_replace": lambda c, a, k: [{"findAndModify": c, "query": _arg(a, k, 0, "filter")}],
+    "find_one_and_delete": lambda c, a, k: [{"findAndModify": c, "query": _arg(a, k, 0, "filter")}],
+    "update_one": lambda c, a, k: [{"update": c, "updates": [{"q": _arg(a, k, 0, "filter")}]}],
+    "update_many": lambda c, a, k: [{"update": c, "updates": [{"q": _arg(a, k, 0, "filter")}]}],
+    "replace_one": lambda c, a, k: [{"update": c, "updates": [{"q": _arg(a, k, 0, "filter")}]}],
+    "delete_one": lambda c, a, k: [{"delete": c, "deletes": [{"q": _arg(a, k, 0, "filter")}]}],
+    "delete_many": lambda c, a, k: [{"delete": c, "deletes": [{"q": _arg(a, k, 0, "filter")}]}],
+    "insert_one": lambda c, a, k: [{"insert": c}],
+    "insert_many": lambda c, a, k: [{"insert": c}],
+    "bulk_write": lambda c, a, k: _bulk_commands(c, a, k),
+}
+
+
+def _emit(commands: List[dict], database_name: str, call: Callable[[], Any]) -> Any:
+    """
+    Executa a chamada entre os eventos de início e de fim dos comandos.
+    """
+    started = []
+    for command in commands:
+        request_id = next(_request_ids)
+        event = monitoring.CommandStartedEvent(command, database_name, request_id, CONNECTION_ID, request_id)
+        for listener in _listeners:
+            listener.started(event)
+        started.append((next(iter(command)), request_id))
+
+    start = time.perf_counter()
+    try:
+        result = call()
+    except Exception as e:
+        duration = timedelta(seconds=time.perf_counter() - start)
+        for command_name, request_id in started:
+            event = monitoring.CommandFailedEvent(
+                duration, {"ok": 0, "errmsg": str(e)}, command_name, request_id, CONNECTION_ID, request_id
+            )
+            for listener in _listeners:
+                listener.failed(event)
+        raise
+
+    duration = timedelta(seconds=time.perf_counter() - start)
+    for command_name, request_id in started:
+        event = monitoring.CommandSucceededEvent(
+            duration, {"ok": 1}, command_name, request_id, CONNECTION_ID, request_id
+        )
+        for listener in _listeners:
+            listener.succeeded(event)
+    return result
+
+
+def _monitored(method_name: str, method: Callable) -> Callable:
+    @wraps(method)
+    def wrapper(self: Collection, *args, **kwargs):
+        if getattr(_local, "active", False):
+            return method(self, *args, **kwargs)
+
+        commands = COMMANDS[method_name](self.name, args, kwargs)
+        _local.active = True
+        try:
+            return _emit(commands, self.database.name, lambda: method(self, *args, **kwargs))
+        finally:
+            _local.active = False
+
+    return wrapper
+
+
+for _name in COMMANDS:
+    setattr(Collection, _name, _monitored(_name, getattr(Collection, _name)))
+
+
+class MonitoredMockClient(AsyncMongoMockClient):
+    """
+    AsyncMongoMockClient que repassa os comandos aos event_listeners,
+    como o AsyncIOMotorClient (ver database.create_client).
+    """
+
+    def __init__(self, *args, event_listeners: Optional[List[monitoring.CommandListener]] = None, **kwargs):
+        super().__init__()
+        _listeners[:] = list(event_listeners or [])
@@ -0,0 +1,141 @@
+# ============================================================================
+# TEST_BOOKING_STATS.PY - Contadores do painel, histórico e avaliações
+# ============================================================================
+
+from datetime import date
+import pytest
+import server
+from booking_stats import rebuild_ratings, rebuild_stats
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def organizer(register):
+    return register("org@example.com", role="organizer")
+
+
+@pytest.fixture
+def user(register):
+    return register("usuario@example.com")
+
+
+@pytest.fixture
+def service(create_service, organizer):
+    return create_service(organizer)
+
+
+def stats(client, organizer: dict) -> dict:
+    return client.get("/api/bookings/organizer/stats", headers=organizer).json()
+
+
+def counters(**values) -> dict:
+    return {"total": 0, "pending": 0, "confirmed": 0, "completed": 0, "cancelled": 0, "today": 0, **values}
+
+
+# ============================================================================
+# CONTADORES
+# ============================================================================
+
+def test_contadores_seguem_o_status(client, book, organizer, user, service):
+    booking = book(user, service, day=TODAY).json()
+    book(user, service, day=TODAY, time="10:00")
+    assert stats(client, organizer) == counters(total=2, pending=2, today=2)
+
+    def set_status(status):
+        response = client.put(f"/api/bookings/{booking['id']}", headers=user, json={"status": status})
+        assert response.status_code == 200, response.text
+        return stats(client, organizer)
+
+    assert set_status("confirmed") == counters(total=2, pending=1, confirmed=1, today=2)
+    assert set_status("confirmed") == counters(total=2, pending=1, confirmed=1, today=2)
+    # Cancelado deixa de contar no dia; reativado volta a contar
+    assert set_status("cancelled") == counters(total=2, pending=1, cancelled=1, today=1)
+    assert set_status("pending") == counters(total=2, pending=2, today=2)
+
+    client.delete(f"/api/bookings/{booking['id']}", headers=user)
+    assert stats(client, organizer) == counters(total=2, pending=1, cancelled=1, today=1)
+
+
+def test_contadores_iguais_a_reconstrucao(client, book, register, organizer, user, service):
+    other = register("outro@example.com")
+    first = book(user, service, day=TODAY).json()
+    second = book(other, service, day=TODAY, time="10:00").json()
+    client.put(f"/api/bookings/{first['id']}", headers=user, json={"status": "completed"})
+    client.delete(f"/api/bookings/{second['id']}", headers=other)
+    client.post("/api/bookings/bulk-status", headers=organizer, json={"ids": [first["id"]], "status": "no_show"})
+    incremental = stats(client, organizer)
+
+    client.portal.call(rebuild_stats, server.db, False)
+
+    assert stats(client, organizer) == incremental
+    # no_show não tem total próprio no painel, mas não libera o horário do dia
+    assert incremental == counters(total=2, cancelled=1, today=1)
+
+
+# ============================================================================
+# HISTÓRICO
+# ============================================================================
+
+def test_historico_por_mes(client, book, user, service):
+    def booking(day: str, status: str, rating=None) -> None:
+        created = book(user, service, day=day).json()
+        response = client.put(f"/api/bookings/{created['id']}", headers=user, json={
+            "status": status, "rating": rating
+        })
+        assert response.status_code == 200, response.text
+
+    booking("2030-01-10", "completed", rating=5)
+    booking("2030-01-20", "completed", rating=3)
+    booking("2030-02-05", "no_show")
+    booking("2030-03-01", "cancelled")
+
+    response = client.get("/api/bookings/my-history", headers=user, params={"to": "2030-02-28"})
+
+    assert response.status_code == 200, response.text
+    history = response.json()
+    assert history["summary"] == {
+        "total": 3, "completed": 2, "cancelled": 0, "no_show": 1, "rating_count": 2, "average_rating": 4.0
+    }
+    assert [(m["month"], m["total"], m["average_rating"]) for m in history["months"]] == [
+        ("2030-02", 1, None),
+        ("2030-01", 2, 4.0),
+    ]
+
+
+# ============================================================================
+# AVALIAÇÕES
+# ============================================================================
+
+def test_avaliacoes_agregadas_no_servico(client, book, register, user, service):
+    other = register("outro@example.com")
+    first = book(user, service, time="09:00").json()
+    second = book(other, service, time="10:00").json()
+
+    def rate(headers, booking, rating) -> dict:
+        response = client.put(f"/api/bookings/{booking['id']}", headers=headers, json={"rating": rating})
+        assert response.status_code == 200, response.text
+        current = client.get(f"/api/services/{service['id']}").json()
+        return {k: current[k] for k in ("rating_sum", "rating_count", "rating_average")}
+
+    assert rate(user, first, 5) == {"rating_sum": 5, "rating_count": 1, "rating_average": 5.0}
+    assert rate(other, second, 3) == {"rating_sum": 8, "rating_count": 2, "rating_average": 4.0}
+    # Alterar uma avaliação não conta de novo
+    assert rate(user, first, 1) == {"rating_sum": 4, "rating_count": 2, "rating_average": 2.0}
+    assert rate(user, first, 1) == {"rating_sum": 4, "rating_count": 2, "rating_average": 2.0}
+
+    client.portal.call(rebuild_ratings, server.db, False)
+    rebuilt = client.get(f"/api/services/{service['id']}").json()
+    assert (rebuilt["rating_sum"], rebuilt["rating_count"]) == (4, 2)
+
+
+def test_catalogo_ordenado_pela_media(client, book, create_service, organizer, user):
+    worse = create_service(organizer, name="Pior")
+    better = create_service(organizer, name="Melhor")
+    for service, rating in ((worse, 2), (better, 5)):
+        booking = book(user, service).json()
+        client.put(f"/api/bookings/{booking['id']}", headers=user, json={"rating": rating})
+
+    names = [s["name"] for s in client.get("/api/services", params={"sort": "top_rated"}).json()]
+
+    assert names == ["Melhor", "Pior"]
@@ -0,0 +1,128 @@
+# ============================================================================
+# TEST_BOOKINGS.PY - Criação de agendamentos e disponibilidade
+# ============================================================================
+
+from datetime import date, timedelta
+import pytest
+from availability import WEEKDAYS
+
+TOMORROW = date.today() + timedelta(days=1)
+
+
+@pytest.fixture
+def organizer(register):
+    return register("org@example.com", role="organizer")
+
+
+@pytest.fixture
+def user(register):
+    return register("usuario@example.com")
+
+
+@pytest.fixture
+def service(create_service, organizer):
+    return create_service(organizer)
+
+
+# ============================================================================
+# CRIAÇÃO
+# ============================================================================
+
+def test_cria_agendamento(book, user, service):
+    response = book(user, service)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["date"] == TOMORROW.isoformat()
+    assert response.json()["status"] == "pending"
+
+
+@pytest.mark.parametrize("spelling", [
+    TOMORROW.strftime("%Y%m%d"),           # Compacta
+    TOMORROW.strftime("%G-W%V-%u"),        # Semana ISO
+    TOMORROW.isoformat() + "T00:00",       # Com horário
+])
+def test_data_em_outro_formato_e_rejeitada(client, book, user, service, spelling):
+    # Outra grafia da mesma data escaparia do índice único dos horários
+    assert book(user, service).status_code == 200
+
+    response = book(user, service, day=spelling)
+
+    assert response.status_code == 400
+    assert len(client.get("/api/bookings/my-bookings", headers=user).json()) == 1
+
+
+def test_horario_ja_reservado(book, register, user, service):
+    assert book(user, service).status_code == 200
+
+    response = book(register("outro@example.com"), service)
+
+    assert response.status_code == 409
+
+
+def test_cancelar_libera_o_horario(client, book, register, user, service):
+    booking = book(user, service).json()
+    client.delete(f"/api/bookings/{booking['id']}", headers=user)
+
+    assert book(register("outro@example.com"), service).status_code == 200
+
+
+@pytest.mark.parametrize("day,time", [
+    (TOMORROW, "11:00"),                      # Horário fora de time_slots
+    (TOMORROW + timedelta(days=1), "09:00"),  # Dia fora de availability_days
+])
+def test_horario_fora_da_agenda(book, create_service, organizer, user, day, time):
+    service = create_service(organizer, availability_days=[WEEKDAYS[TOMORROW.weekday()]])
+
+    response = book(user, service, day=day, time=time)
+
+    assert response.status_code == 400
+
+
+# ============================================================================
+# DISPONIBILIDADE
+# ============================================================================
+
+def test_disponibilidade_sem_horarios_reservados(client, book, register, user, service):
+    other = register("outro@example.com")
+    book(user, service, time="09:00")
+    cancelled = book(other, service, time="10:00").json()
+    client.delete(f"/api/bookings/{cancelled['id']}", headers=other)
+    day_after = TOMORROW + timedelta(days=1)
+
+    response = client.get(
+        f"/api/services/{service['id']}/availability",
+        params={"from": TOMORROW.isoformat(), "to": day_after.isoformat()}
+    )
+
+    assert response.status_code == 200
+    assert [(d["date"], d["slots"]) for d in response.json()["days"]] == [
+        (TOMORROW.isoformat(), ["10:00"]),  # 09:00 reservado; 10:00 cancelado
+        (day_after.isoformat(), ["09:00", "10:00"]),
+    ]
+
+
+@pytest.mark.parametrize("params", [
+    {"from": TOMORROW.isoformat(), "to": date.today().isoformat()},
+    {"from": TOMORROW.isoformat(), "to": (TOMORROW + timedelta(days=90)).isoformat()},
+    {"from": TOMORROW.strftime("%Y%m%d")},
+])
+def test_disponibilidade_intervalo_invalido(client, service, params):
+    response = client.get(f"/api/services/{service['id']}/availability", params=params)
+
+    assert response.status_code == 400
+
+
+# ============================================================================
+# STATUS
+# ============================================================================
+
+@pytest.mark.parametrize("status", ["$weird", "pending.x", "aprovado"])
+def test_status_desconhecido_e_rejeitado(client, book, organizer, user, service, status):
+    # O status vira chave dos contadores ($inc em "status.<status>")
+    booking = book(user, service).json()
+
+    response = client.put(f"/api/bookings/{booking['id']}", headers=user, json={"status": status})
+
+    assert response.status_code == 422
+    stats = client.get("/api/bookings/organizer/stats", headers=organizer).json()
+    assert (stats["total"], stats["pending"]) == (1, 1)
@@ -0,0 +1,110 @@
+# ============================================================================
+# TEST_BULK_STATUS.PY - Alteração de status em lote (POST /bookings/bulk-status)
+# ============================================================================
+
+from datetime import datetime
+import pytest
+import server
+from invalidation import UPDATED_AT_FIELD
+
+
+@pytest.fixture
+def organizer(register):
+    return register("org@example.com", role="organizer")
+
+
+@pytest.fixture
+def user(register):
+    return register("usuario@example.com")
+
+
+@pytest.fixture
+def bookings(book, create_service, organizer, user):
+    """
+    Dois agendamentos pendentes no serviço do organizador (09:00 e 10:00).
+    """
+    service = create_service(organizer)
+    return [book(user, service, time=time).json()["id"] for time in ("09:00", "10:00")]
+
+
+def bulk(client, headers: dict, ids: list, status: str):
+    return client.post("/api/bookings/bulk-status", headers=headers, json={"ids": ids, "status": status})
+
+
+def stats(client, organizer: dict) -> dict:
+    return client.get("/api/bookings/organizer/stats", headers=organizer).json()
+
+
+def test_resultado_por_agendamento(client, register, book, create_service, organizer, user, bookings):
+    other = register("outro@example.com", role="organizer")
+    foreign = book(user, create_service(other)).json()["id"]
+    client.put(f"/api/bookings/{bookings[1]}", headers=user, json={"status": "confirmed"})
+
+    response = bulk(client, organizer, [bookings[0], bookings[1], foreign, "inexistente", bookings[0]], "confirmed")
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "updated": 1,
+        "results": [
+            {"id": bookings[0], "result": "updated"},
+            {"id": bookings[1], "result": "unchanged"},
+            {"id": foreign, "result": "forbidden"},
+            {"id": "inexistente", "result": "not_found"},
+        ],
+    }
+    assert stats(client, organizer)["confirmed"] == 2
+    assert stats(client, other)["pending"] == 1
+
+
+def test_apenas_organizadores(client, user, bookings):
+    assert bulk(client, user, bookings, "confirmed").status_code == 403
+
+
+def test_reativar_horario_ocupado_e_conflito(client, register, book, organizer, user, bookings):
+    # Cancelado libera o horário, que é reservado por outro usuário
+    bulk(client, organizer, [bookings[0]], "cancelled")
+    service_id = client.get("/api/bookings/my-bookings", headers=user).json()[0]["service_id"]
+    assert book(register("outro@example.com"), {"id": service_id}).status_code == 200
+
+    response = bulk(client, organizer, bookings, "confirmed")
+
+    assert response.json() == {
+        "updated": 1,
+        "results": [
+            {"id": bookings[0], "result": "conflict"},
+            {"id": bookings[1], "result": "updated"},
+        ],
+    }
+    current = {b["id"]: b["status"] for b in client.get("/api/bookings/my-bookings", headers=user).json()}
+    assert current == {bookings[0]: "cancelled", bookings[1]: "confirmed"}
+    assert stats(client, organizer) == {
+        "total": 3, "pending": 1, "confirmed": 1, "completed": 0, "cancelled": 1, "today": 0
+    }
+
+
+@pytest.mark.parametrize("concurrent", [
+    {"status": "cancelled"},
+    # Mesmo status do lote, gravado por outro request: não é contado de novo
+    {"status": "confirmed", UPDATED_AT_FIELD: datetime(2000, 1, 1)},
+])
+def test_alterado_entre_leitura_e_escrita(client, monkeypatch, organizer, bookings, concurrent):
+    collection = type(server.db.bookings)
+    bulk_write = collection.bulk_write
+
+    async def racing_bulk_write(self, operations, **kwargs):
+        # Outro request altera o primeiro agendamento depois da leitura
+        await server.db.bookings.update_one({"id": bookings[0]}, {"$set": concurrent})
+        return await bulk_write(self, operations, **kwargs)
+
+    monkeypatch.setattr(collection, "bulk_write", racing_bulk_write)
+    response = bulk(client, organizer, bookings, "confirmed")
+
+    assert response.json() == {
+        "updated": 1,
+        "results": [
+            {"id": bookings[0], "result": "changed"},
+            {"id": bookings[1], "result": "updated"},
+        ],
+    }
+    # Apenas a escrita confirmada entra nos contadores
+    assert stats(client, organizer)["confirmed"] == 1
@@ -0,0 +1,49 @@
+# ============================================================================
+# TEST_PAGINATION.PY - Paginação por cursor (X-Next-Cursor)
+# ============================================================================
+
+import pytest
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+
+
+def all_pages(client, url: str, headers: dict, limit: int) -> list:
+    """
+    Segue o cursor até a última página, como getAllPages no frontend.
+    """
+    pages = []
+    after = None
+    while True:
+        response = client.get(url, headers=headers, params={"limit": limit, "after": after})
+        assert response.status_code == 200, response.text
+        pages.append([item["id"] for item in response.json()])
+        after = response.headers.get(NEXT_CURSOR_HEADER)
+        if not after:
+            return pages
+
+
+def test_pagina_padrao_menor_que_a_maxima():
+    assert DEFAULT_PAGE_SIZE < MAX_PAGE_SIZE
+
+
+@pytest.mark.parametrize("url,owner", [
+    ("/api/bookings/my-bookings", "user"),
+    ("/api/bookings/organizer/all", "organizer"),
+])
+def test_cursor_percorre_todos_os_itens(client, register, book, create_service, url, owner):
+    headers = {"organizer": register("org@example.com", role="organizer"), "user": register("usuario@example.com")}
+    service = create_service(headers["organizer"], time_slots=["08:00", "09:00", "10:00", "11:00", "14:00"])
+    created = [
+        book(headers["user"], service, time=time).json()["id"]
+        for time in ("08:00", "09:00", "10:00", "11:00", "14:00")
+    ]
+
+    pages = all_pages(client, url, headers[owner], limit=2)
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [item for page in pages for item in page] == created
+
+
+def test_cursor_invalido(client, register):
+    response = client.get("/api/bookings/my-bookings", headers=register("usuario@example.com"), params={"after": "x"})
+
+    assert response.status_code == 400
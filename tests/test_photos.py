@@ -0,0 +1,59 @@
+# ============================================================================
+# TEST_PHOTOS.PY - Upload das fotos dos serviços e miniaturas
+# ============================================================================
+
+import io
+import pytest
+import photos
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture(autouse=True)
+def media_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(photos, "PHOTOS_DIR", tmp_path / "photos")
+    monkeypatch.setattr(photos, "UPLOAD_TMP_DIR", tmp_path / "tmp")
+    return tmp_path
+
+
+@pytest.fixture
+def organizer(register):
+    return register("org@example.com", role="organizer")
+
+
+def png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("L", (width, height)).save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def upload(client, headers: dict, service: dict, content: bytes):
+    return client.post(
+        f"/api/services/{service['id']}/photo", headers={**headers, "Content-Type": "image/png"}, content=content
+    )
+
+
+def test_upload_gera_miniaturas(client, create_service, organizer):
+    service = create_service(organizer)
+
+    response = upload(client, organizer, service, png(1600, 1200))
+
+    assert response.status_code == 200, response.text
+    variants = response.json()["photo_variants"]
+    assert response.json()["photo"] == variants["card"]
+    for size, expected in (("card", (800, 384)), ("thumb", (128, 128))):
+        image = client.get(variants[size])
+        assert image.status_code == 200
+        assert Image.open(io.BytesIO(image.content)).size == expected
+
+
+def test_resolucao_acima_do_maximo(client, create_service, organizer, media_dir, monkeypatch):
+    # Arquivo pequeno (PNG de uma cor) que ocuparia muita memória decodificado
+    monkeypatch.setattr(photos, "MAX_PHOTO_PIXELS", 1_000_000)
+    service = create_service(organizer)
+
+    response = upload(client, organizer, service, png(2000, 2000))
+
+    assert response.status_code == 413
+    assert list((media_dir / "photos").iterdir()) == []
+    assert client.get(f"/api/services/{service['id']}").json()["photo_variants"] is None
@@ -0,0 +1,58 @@
+# ============================================================================
+# TEST_QUERY_MONITOR.PY - Quantidade de comandos do MongoDB por rota (N+1)
+# ============================================================================
+
+from datetime import date, timedelta
+from availability import WEEKDAYS
+
+TIME_SLOTS = ["08:00", "09:00", "10:00", "11:00", "14:00", "15:00"]
+
+
+def _booking_factory(client, organizer: dict, user: dict):
+    """
+    Retorna setup(n): garante n agendamentos do usuário, cada um em um
+    serviço diferente (a listagem precisa popular n serviços).
+    """
+    created = []
+
+    def setup(size: int) -> None:
+        while len(created) < size:
+            service = client.post("/api/services", headers=organizer, json={
+                "name": f"Serviço {len(created)}", "type": "Saúde", "description": "Teste",
+                "availability_days": WEEKDAYS, "time_slots": TIME_SLOTS,
+            })
+            assert service.status_code == 200, service.text
+            booking = client.post("/api/bookings", headers=user, json={
+                "service_id": service.json()["id"],
+                "date": (date.today() + timedelta(days=1)).isoformat(),
+                "time": TIME_SLOTS[0],
+            })
+            assert booking.status_code == 200, booking.text
+            created.append(booking.json()["id"])
+
+    return setup
+
+
+def test_my_bookings_sem_n_mais_1(client, register, query_counter):
+    organizer = register("org@example.com", role="organizer")
+    user = register("usuario@example.com")
+
+    counts = query_counter.assert_constant(
+        lambda: client.get("/api/bookings/my-bookings", headers=user),
+        setup=_booking_factory(client, organizer, user),
+        sizes=(1, 10, 50)
+    )
+
+    # Agendamentos + serviços em uma consulta por lote
+    assert counts == {1: 2, 10: 2, 50: 2}
+
+
+def test_my_bookings_retorna_servicos(client, register):
+    organizer = register("org@example.com", role="organizer")
+    user = register("usuario@example.com")
+    _booking_factory(client, organizer, user)(3)
+
+    bookings = client.get("/api/bookings/my-bookings", headers=user).json()
+
+    assert len(bookings) == 3
+    assert {b["service"]["name"] for b in bookings} == {"Serviço 0", "Serviço 1", "Serviço 2"}
@@ -0,0 +1,178 @@
+# ============================================================================
+# TEST_WRITE_ROUND_TRIPS.PY - Idas ao banco e latência por escrita
+# ============================================================================
+# Micro-benchmark das escritas com verificação de posse: compara o caminho
+# anterior (lê o documento, verifica o dono, escreve e relê) com o atual
+# (verificação no filtro de um único find_one_and_update/update_one).
+#
+# - Idas ao banco: comandos na coleção escrita pelo caminho anterior e pela
+#   rota atual (request completo)
+# - Latência: média dos dois caminhos executados direto no banco, sem o
+#   custo do HTTP (python -m pytest tests -s). Com TEST_MONGO_URL, as
+#   latências são as de um mongod real.
+# ============================================================================
+
+import time
+from datetime import date, timedelta
+import pytest
+import server
+from availability import WEEKDAYS
+from pymongo import ReturnDocument
+
+ITERATIONS = 20
+
+
+# ============================================================================
+# CAMINHOS ANTERIORES (ler, verificar o dono, escrever, reler)
+# ============================================================================
+
+async def _old_update_service(ctx):
+    service = await server.db.services.find_one({"id": ctx["service_id"]})
+    assert service["organizer_id"] == ctx["organizer_id"]
+    await server.db.services.update_one({"id": ctx["service_id"]}, {"$set": {"description": "Antes"}})
+    return await server.db.services.find_one({"id": ctx["service_id"]})
+
+
+async def _old_delete_service(ctx):
+    service = await server.db.services.find_one({"id": ctx["service_id"]})
+    assert service["organizer_id"] == ctx["organizer_id"]
+    await server.db.services.update_one({"id": ctx["service_id"]}, {"$set": {"active": False}})
+
+
+async def _old_update_booking(ctx):
+    booking = await server.db.bookings.find_one({"id": ctx["booking_id"]})
+    assert booking["user_id"] == ctx["user_id"]
+    await server.db.bookings.find_one_and_update(
+        {"id": ctx["booking_id"]}, {"$set": {"notes": "Antes"}}, return_document=ReturnDocument.BEFORE
+    )
+    return await server.db.bookings.find_one({"id": ctx["booking_id"]})
+
+
+async def _old_cancel_booking(ctx):
+    booking = await server.db.bookings.find_one({"id": ctx["booking_id"]})
+    assert booking["user_id"] == ctx["user_id"]
+    await server.db.bookings.find_one_and_update(
+        {"id": ctx["booking_id"]}, {"$set": {"status": "cancelled"}}, return_document=ReturnDocument.BEFORE
+    )
+
+
+async def _old_update_profile(ctx):
+    await server.db.users.update_one({"id": ctx["user_id"]}, {"$set": {"name": "Antes"}})
+    return await server.db.users.find_one({"id": ctx["user_id"]})
+
+
+# ============================================================================
+# CAMINHOS ATUAIS (consulta das rotas, posse no filtro)
+# ============================================================================
+
+async def _new_update_service(ctx):
+    return await server.db.services.find_one_and_update(
+        {"id": ctx["service_id"], "organizer_id": ctx["organizer_id"]},
+        {"$set": {"description": "Depois"}}, return_document=ReturnDocument.AFTER
+    )
+
+
+async def _new_delete_service(ctx):
+    await server.db.services.update_one(
+        {"id": ctx["service_id"], "organizer_id": ctx["organizer_id"]}, {"$set": {"active": False}}
+    )
+
+
+async def _new_update_booking(ctx):
+    await server.db.bookings.find_one_and_update(
+        {"id": ctx["booking_id"], "user_id": ctx["user_id"]},
+        {"$set": {"notes": "Depois"}}, return_document=ReturnDocument.BEFORE
+    )
+
+
+async def _new_cancel_booking(ctx):
+    await server.db.bookings.find_one_and_update(
+        {"id": ctx["booking_id"], "user_id": ctx["user_id"]},
+        {"$set": {"status": "cancelled"}}, return_document=ReturnDocument.BEFORE
+    )
+
+
+async def _new_update_profile(ctx):
+    return await server.db.users.find_one_and_update(
+        {"id": ctx["user_id"]}, {"$set": {"name": "Depois"}}, return_document=ReturnDocument.AFTER
+    )
+
+
+# ============================================================================
+# CASOS
+# ============================================================================
+# (nome, coleção escrita, caminho anterior, caminho atual, request da rota,
+#  idas antes, idas depois)
+
+CASES = [
+    ("update_service", "services", _old_update_service, _new_update_service,
+     lambda c, ctx: c.put(f"/api/services/{ctx['service_id']}", headers=ctx["organizer"],
+                          json={"description": "Depois"}), 3, 1),
+    ("delete_service", "services", _old_delete_service, _new_delete_service,
+     lambda c, ctx: c.delete(f"/api/services/{ctx['service_id']}", headers=ctx["organizer"]), 2, 1),
+    ("update_booking", "bookings", _old_update_booking, _new_update_booking,
+     lambda c, ctx: c.put(f"/api/bookings/{ctx['booking_id']}", headers=ctx["user"],
+                          json={"notes": "Depois"}), 3, 1),
+    ("cancel_booking", "bookings", _old_cancel_booking, _new_cancel_booking,
+     lambda c, ctx: c.delete(f"/api/bookings/{ctx['booking_id']}", headers=ctx["user"]), 2, 1),
+    ("update_user_profile", "users", _old_update_profile, _new_update_profile,
+     lambda c, ctx: c.put("/api/users/me", headers=ctx["user"], json={"name": "Depois"}), 2, 1),
+]
+
+
+@pytest.fixture
+def ctx(client, register):
+    """
+    Organizador com um serviço e usuário com um agendamento nele.
+    """
+    organizer = register("org@example.com", role="organizer")
+    user = register("usuario@example.com")
+    service = client.post("/api/services", headers=organizer, json={
+        "name": "Serviço", "type": "Saúde", "description": "Teste",
+        "availability_days": WEEKDAYS, "time_slots": ["09:00"],
+    }).json()
+    booking = client.post("/api/bookings", headers=user, json={
+        "service_id": service["id"], "date": (date.today() + timedelta(days=1)).isoformat(), "time": "09:00",
+    }).json()
+    return {
+        "organizer": organizer, "user": user,
+        "organizer_id": service["organizer_id"], "user_id": booking["user_id"],
+        "service_id": service["id"], "booking_id": booking["id"],
+    }
+
+
+def _round_trips(counter, collection: str) -> int:
+    """
+    Comandos executados na coleção escrita (ex: "find services {...}").
+    """
+    return sum(1 for shape in counter.shapes if shape.split()[1:2] == [collection])
+
+
+def _mean_ms(action) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        action()
+    return (time.perf_counter() - start) * 1000 / ITERATIONS
+
+
+@pytest.mark.parametrize(
+    "name,collection,old_path,new_path,route,before,after", CASES, ids=[c[0] for c in CASES]
+)
+def test_escrita_em_uma_ida_ao_banco(
+    client, ctx, query_counter, name, collection, old_path, new_path, route, before, after
+):
+    def run_route():
+        response = route(client, ctx)
+        assert response.status_code == 200, response.text
+
+    query_counter.measure(lambda: client.portal.call(old_path, ctx))
+    old_trips = _round_trips(query_counter, collection)
+    query_counter.measure(run_route)
+    new_trips = _round_trips(query_counter, collection)
+
+    old_ms = _mean_ms(lambda: client.portal.call(old_path, ctx))
+    new_ms = _mean_ms(lambda: client.portal.call(new_path, ctx))
+    print(f"\n{name:22} idas ao banco: {old_trips} -> {new_trips}   "
+          f"latência média: {old_ms:.2f}ms -> {new_ms:.2f}ms")
+
+    assert (old_trips, new_trips) == (before, after)